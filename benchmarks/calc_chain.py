@@ -0,0 +1,53 @@
+"""Compares the expression graph of nine chained Calculator maps with a single
+CalculatorChain map, the way cnwi_stack builds its Sentinel-2 indices.
+
+usage: python benchmarks/calc_chain.py
+"""
+import ee
+
+ee.Initialize()
+
+import eeng
+from eeng.server.calc import NDVI, SAVI, TasselCap, CalculatorChain
+from eeng.server.graph import graph_stats
+
+
+def seasonal_calculators():
+    calculators = []
+    for season in ("a_spri", "b_summ", "c_fall"):
+        calculators.append(NDVI(nir=f"{season}_b08_10m", red=f"{season}_b04_10m"))
+    for season in ("a_spri", "b_summ", "c_fall"):
+        calculators.append(SAVI(nir=f"{season}_b08_10m", red=f"{season}_b04_10m"))
+    for season in ("a_spri", "b_summ", "c_fall"):
+        calculators.append(
+            TasselCap(
+                blue=f"{season}_b02_10m",
+                green=f"{season}_b03_10m",
+                red=f"{season}_b04_10m",
+                nir=f"{season}_b08_10m",
+                swir1=f"{season}_b11_20m",
+                swir2=f"{season}_b12_20m",
+            )
+        )
+    return calculators
+
+
+def main():
+    col = ee.ImageCollection("COPERNICUS/S2_SR")
+    calculators = seasonal_calculators()
+
+    chained = col
+    for calculator in calculators:
+        chained = chained.map(calculator)
+
+    fused = col.map(CalculatorChain(*calculators))
+
+    before = graph_stats(chained.mosaic())
+    after = graph_stats(fused.mosaic())
+    print(f"{'':>10} {'bytes':>8} {'nodes':>6}")
+    print(f"{'chained':>10} {before.bytes:>8} {before.nodes:>6}")
+    print(f"{'fused':>10} {after.bytes:>8} {after.nodes:>6}")
+
+
+if __name__ == "__main__":
+    main()
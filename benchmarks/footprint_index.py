@@ -0,0 +1,53 @@
+"""Times matching AOIs to scene ids with FootprintIndex against testing every
+footprint for every AOI.
+
+usage: python benchmarks/footprint_index.py [scenes] [aois]
+"""
+import sys
+import time
+
+import numpy as np
+import shapely
+from shapely.geometry import box
+
+from eeng.client.footprints import FootprintIndex
+
+
+def catalogue(scenes: int, seed: int = 0) -> FootprintIndex:
+    rng = np.random.default_rng(seed)
+    x, y = rng.uniform(-95, -74, scenes), rng.uniform(42, 56, scenes)
+    footprints = [box(a, b, a + 2.5, b + 1.5) for a, b in zip(x, y)]
+    dates = np.datetime64("2019-01-01") + rng.integers(0, 365, scenes)
+    orbits = rng.integers(1, 175, scenes)
+    return FootprintIndex([f"S1A_{i:06d}" for i in range(scenes)], footprints, dates, orbits)
+
+
+def main():
+    scenes, n_aois = (int(a) for a in (sys.argv[1:] + ["20000", "5000"][len(sys.argv[1:]):]))
+    index = catalogue(scenes)
+    rng = np.random.default_rng(1)
+    aois = [box(a, b, a + 0.1, b + 0.1) for a, b in zip(rng.uniform(-95, -74, n_aois), rng.uniform(42, 56, n_aois))]
+
+    start = time.perf_counter()
+    index.tree
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matched = index.query_bulk(aois, start="2019-05-01", end="2019-09-01")
+    bulk = time.perf_counter() - start
+
+    sample = aois[:200]
+    start = time.perf_counter()
+    keep = (index.dates >= np.datetime64("2019-05-01")) & (index.dates < np.datetime64("2019-09-01"))
+    for aoi, ids in zip(sample, matched):
+        hits = index.ids[shapely.intersects(index.geometries, aoi) & keep]
+        assert sorted(hits.tolist()) == ids
+    loop = (time.perf_counter() - start) * n_aois / len(sample)
+
+    print(f"STRtree build: {build * 1000:.1f}ms for {scenes} footprints")
+    print(f"query_bulk: {bulk * 1000:.1f}ms for {n_aois} aois")
+    print(f"brute force (extrapolated): {loop * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Measures the request graph and the payload of generate_samples before it
+selected bands and pruned the points, the same sampleRegions call with all
+bands, scale=10, tileScale=16 and the class property, against a band subset
+with pruned points and an automatic tileScale.
+
+usage: python benchmarks/generate_samples.py <points asset> <class property> [bands...]
+"""
+import json
+import sys
+import time
+
+import ee
+
+ee.Initialize()
+
+import eeng
+from eeng.server.graph import graph_stats
+
+
+def measure(samples: ee.FeatureCollection, limit: int = 500):
+    stats = graph_stats(samples)
+    start = time.perf_counter()
+    payload = len(json.dumps(samples.limit(limit).getInfo()).encode())
+    return stats.bytes, stats.nodes, payload, time.perf_counter() - start
+
+
+def main():
+    asset, class_property, *bands = sys.argv[1:]
+    points = ee.FeatureCollection(asset)
+    image = (
+        ee.ImageCollection("COPERNICUS/S2_SR")
+        .filterBounds(points)
+        .filterDate("2020-06-01", "2020-09-01")
+        .median()
+    )
+    bands = bands or ["B2", "B3", "B4", "B8"]
+
+    # the call generate_samples made before bands and pruning were added
+    full = image.sampleRegions(collection=points, scale=10, properties=[class_property], tileScale=16)
+    lean = points.generateSamples(image, props=[class_property], scale=10, tileScale=None, bands=bands)
+
+    print(f"{'':>6} {'graph bytes':>12} {'nodes':>6} {'payload':>10} {'seconds':>8}")
+    for name, samples in (("full", full), ("lean", lean)):
+        graph, nodes, payload, seconds = measure(samples)
+        print(f"{name:>6} {graph:>12} {nodes:>6} {payload:>10} {seconds:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
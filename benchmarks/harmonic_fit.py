@@ -0,0 +1,52 @@
+"""Times fit_cube against fitting every pixel of a synthetic time series cube
+in a loop.
+
+usage: python benchmarks/harmonic_fit.py [times] [rows] [cols]
+"""
+import sys
+import time
+
+import numpy as np
+
+from eeng.client import harmonics
+
+
+def cube(times: int, rows: int, cols: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    dates = np.datetime64("2018-01-01") + np.sort(rng.integers(0, 3 * 365, times))
+    t = harmonics.time_radians(dates)
+    values = 0.4 + 0.2 * np.cos(t)[:, None, None] + rng.normal(0, 0.05, (times, rows, cols))
+    values[rng.random(values.shape) < 0.05] = np.nan
+    return values, t
+
+
+def per_pixel(values, t, cycles=3):
+    out = np.full((2 + 2 * cycles,) + values.shape[1:], np.nan)
+    for r in range(values.shape[1]):
+        for c in range(values.shape[2]):
+            series = values[:, r, c]
+            valid = ~np.isnan(series)
+            if valid.sum() >= out.shape[0]:
+                out[:, r, c] = list(harmonics.fit(series[valid], t[valid], cycles).values())
+    return out
+
+
+def main():
+    times, rows, cols = (int(a) for a in (sys.argv[1:] + ["60", "200", "200"][len(sys.argv[1:]):]))
+    values, t = cube(times, rows, cols)
+
+    start = time.perf_counter()
+    expected = per_pixel(values, t)
+    loop = time.perf_counter() - start
+
+    for workers in (None, 4):
+        start = time.perf_counter()
+        fit = harmonics.fit_cube(values, t, max_workers=workers)
+        batched = time.perf_counter() - start
+        np.testing.assert_allclose(fit.coefficients, expected, rtol=1e-5, atol=1e-8)
+        print(f"fit_cube (max_workers={workers}): {batched:.3f}s")
+    print(f"per pixel loop: {loop:.3f}s for {rows * cols} pixels")
+
+
+if __name__ == "__main__":
+    main()
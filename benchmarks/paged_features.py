@@ -0,0 +1,62 @@
+"""Times fetching a large fake footprint catalogue as one toList request
+against fetch_pages with concurrent pages.
+
+The fake server answers every request after a fixed latency plus a cost per
+feature, a single request therefore pays for the whole catalogue serially
+while pages overlap. On Earth Engine the single toList of a multi year
+Sentinel-1 catalogue usually fails with a memory error before it gets there.
+
+usage: python benchmarks/paged_features.py [features] [page_size]
+"""
+import sys
+import time
+
+from eeng.server.fetch import BatchFetcher, FakeTransport, fetch_pages
+
+LATENCY = 0.2
+COST_PER_FEATURE = 20e-6
+
+
+class FakeCatalogue:
+    def __init__(self, n: int) -> None:
+        self.n = n
+
+    def size(self):
+        return ("size",)
+
+    def toList(self, count, offset=0):
+        return ("list", count, offset)
+
+    def resolve(self, request):
+        if request[0] == "size":
+            return self.n
+        _, count, offset = request
+        ids = range(offset, min(offset + count, self.n))
+        time.sleep(COST_PER_FEATURE * len(ids))
+        return [
+            {"type": "Feature", "geometry": None, "properties": {"system_id": f"S1A_{i:06d}", "relativeOrbitNumber_start": i % 175}}
+            for i in ids
+        ]
+
+
+def main():
+    n, page_size = (int(a) for a in (sys.argv[1:] + ["50000", "2000"][len(sys.argv[1:]):]))
+    catalogue = FakeCatalogue(n)
+
+    fetcher = BatchFetcher(FakeTransport(catalogue.resolve, latency=LATENCY))
+    start = time.perf_counter()
+    single = fetcher.fetch({"all": catalogue.toList(n)})["all"]
+    elapsed = time.perf_counter() - start
+    print(f"single toList: {elapsed:.2f}s, 1 request")
+
+    for workers in (1, 4, 8):
+        transport = FakeTransport(catalogue.resolve, latency=LATENCY)
+        start = time.perf_counter()
+        paged = fetch_pages(catalogue, page_size, BatchFetcher(transport), max_workers=workers)
+        elapsed = time.perf_counter() - start
+        assert paged == single
+        print(f"fetch_pages (max_workers={workers}): {elapsed:.2f}s, {transport.round_trips} requests")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Compares the expression graph of the per-direction Perona-Malik filter the
+filters module used to build with PeronaMalik.filter for 10 to 50 iterations.
+
+usage: python benchmarks/perona_malik.py
+"""
+import ee
+
+ee.Initialize()
+
+from eeng.server.filters import PeronaMalik
+from eeng.server.graph import graph_stats
+
+
+def per_direction(img, K, iterations):
+    """the graph the filter built before, one convolution and conductance per
+    direction and new constant images in every iteration"""
+    kernels = [
+        ee.Kernel.fixed(3, 3, [[0, 0, 0], [1, -1, 0], [0, 0, 0]]),
+        ee.Kernel.fixed(3, 3, [[0, 0, 0], [0, -1, 1], [0, 0, 0]]),
+        ee.Kernel.fixed(3, 3, [[0, 1, 0], [0, -1, 0], [0, 0, 0]]),
+        ee.Kernel.fixed(3, 3, [[0, 0, 0], [0, -1, 0], [0, 1, 0]]),
+    ]
+    k2 = ee.Image(K).multiply(ee.Image(K))
+    for _ in range(iterations):
+        flux = None
+        for kernel in kernels:
+            d = img.convolve(kernel)
+            c = ee.Image(1.0).divide(ee.Image(1.0).add(d.multiply(d).divide(k2)))
+            flux = c.multiply(d) if flux is None else flux.add(c.multiply(d))
+        img = img.add(ee.Image(0.2).multiply(flux))
+    return img
+
+
+def main():
+    image = ee.Image("COPERNICUS/S1_GRD/S1A_IW_GRDH_1SDV_20190601T001624_20190601T001649_027485_031A1D_7E46")
+    image = image.select(["VV", "VH"])
+
+    print(f"{'iterations':>10} {'old bytes':>10} {'old nodes':>10} {'new bytes':>10} {'new nodes':>10}")
+    for iterations in (10, 20, 30, 40, 50):
+        before = graph_stats(per_direction(image, 3.5, iterations))
+        after = graph_stats(PeronaMalik(iterations=iterations).filter(image))
+        print(
+            f"{iterations:>10} {before.bytes:>10} {before.nodes:>10} "
+            f"{after.bytes:>10} {after.nodes:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
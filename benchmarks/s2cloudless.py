@@ -0,0 +1,28 @@
+"""Compares the expression graph of the default S2 Cloudless masking with the
+lean mode, mapped over a joined Sentinel-2 / s2cloudless collection.
+
+usage: python benchmarks/s2cloudless.py
+"""
+import ee
+
+ee.Initialize()
+
+import eeng
+from eeng.server.cmasking import S2CloudlessAlgorithm
+from eeng.server.graph import graph_stats
+
+
+def main():
+    aoi = ee.Geometry.Point([-75.7, 45.4])
+    s2 = ee.ImageCollection.sentinel2SR("2020-06-01", "2020-09-01", aoi, 60)
+    prob = ee.ImageCollection.sentinel2CloudProbability("2020-06-01", "2020-09-01", aoi)
+    col = ee.ImageCollection.sentinel2Cloudless(s2, prob)
+
+    print(f"{'':>8} {'bytes':>8} {'nodes':>6} {'depth':>6}")
+    for name, lean in (("default", False), ("lean", True)):
+        stats = graph_stats(col.map(S2CloudlessAlgorithm(lean=lean)).median())
+        print(f"{name:>8} {stats.bytes:>8} {stats.nodes:>6} {stats.depth:>6}")
+
+
+if __name__ == "__main__":
+    main()
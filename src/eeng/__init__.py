@@ -7,6 +7,7 @@ ee.ImageCollection.addDependent = addDependent
 ee.ImageCollection.addConstant = addConstant
 ee.ImageCollection.addTime = addTime
 ee.ImageCollection.addHarmonics = addHarmonics
+ee.ImageCollection.addHarmonicTerms = addHarmonicTerms
 ee.ImageCollection.addCloudMask = add_cloud_mask
 ee.ImageCollection.sentinel2SR = sentinel2SR
 ee.ImageCollection.sentinel2TOA = sentinel2TOA
@@ -1,42 +1,118 @@
+import glob
 import json
-from typing import Any, Dict
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Sequence, Union
 
 import geopandas as gpd
 import pandas as pd
 import numpy as np
 
+try:
+    import ijson
+except ImportError:  # eeng[stream], GeoJSON files are otherwise parsed with json.load
+    ijson = None
+
 AssessmentTable = pd.DataFrame
 AssessmentFileName = str
 
+# properties of the assessment features that make up the table
+ASSESSMENT_PROPERTIES = ("cfm", "labels", "pro", "con", "acc")
+
+LINE_DELIMITED = (".geojsonl", ".geojsons", ".jsonl", ".ndjson")
+ASSESSMENT_FILES = (".geojson", ".json") + LINE_DELIMITED
 
-def confusion_matrix_from_file(datafile):
-    with open(datafile, "r") as f:
-        data = json.load(f)
 
-    features = data["features"]
-    props = [_.get("properties") for _ in features]
-    data = {k: v for _ in props for k, v in _.items()}
+def confusion_matrix_from_file(datafile: AssessmentFileName) -> AssessmentTable:
+    """reads an exported assessment into a confusion matrix with the producers,
+    consumers and overall accuracy. Line delimited files are read one feature
+    at a time, GeoJSON files are streamed when ijson is installed"""
+    data = {}
+    for props in _iter_properties(datafile):
+        for k in ASSESSMENT_PROPERTIES:
+            if k in props:
+                data[k] = props[k]
 
-    # this construct the base table for the cond
-    cfm = pd.DataFrame(
-        data=data.get("cfm"),
-        columns=data.get("labels"),
-        index=data.get("labels"),
+    return assessment_table(
+        cfm=data.get("cfm"),
+        labels=data.get("labels"),
+        producers=data.get("pro"),
+        consumers=data.get("con"),
+        accuracy=data.get("acc"),
     )
 
-    # add producers to the base table
-    cfm = cfm.reindex(columns=cfm.columns.tolist() + ["Producers"])
-    pro = list(map(lambda x: round(x * 100, 2), data.get("pro")))
 
-    cfm["Producers"] = pro
+def assessment_table(
+    cfm: Sequence[Sequence[float]],
+    labels: Sequence[Any],
+    producers: Sequence[float],
+    consumers: Sequence[float],
+    accuracy: float,
+) -> AssessmentTable:
+    """lays the confusion matrix out with a Producers column, a Consumers row and
+    an Overall Accuracy row. Accuracies are expected as fractions"""
+    labels = list(labels)
+    n = len(labels)
+
+    table = np.full((n + 2, n + 1), np.nan)
+    table[:n, :n] = np.asarray(cfm, dtype=float)
+    table[:n, n] = np.round(np.asarray(producers, dtype=float) * 100, 2)
+    table[n, :n] = np.round(np.asarray(consumers, dtype=float) * 100)
+    table[n + 1, 0] = round(float(accuracy) * 100, 2)
+
+    return pd.DataFrame(
+        table,
+        index=labels + ["Consumers", "Overall Accuracy"],
+        columns=labels + ["Producers"],
+    )
+
+
+def confusion_matrices_from_files(
+    source: Union[str, List[AssessmentFileName]], processes: int = None
+) -> AssessmentTable:
+    """reads every assessment in a directory, glob pattern or list of files and
+    stacks them into one table indexed by region (the file name without its
+    extension). processes > 1 reads the files in a process pool"""
+    files = _assessment_files(source)
+    if not files:
+        raise FileNotFoundError(f"no assessment files found in {source}")
+
+    if processes is not None and processes > 1:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            tables = list(pool.map(confusion_matrix_from_file, files))
+    else:
+        tables = [confusion_matrix_from_file(f) for f in files]
+
+    regions = [os.path.splitext(os.path.basename(f))[0] for f in files]
+    return pd.concat(tables, keys=regions, names=["region", None])
+
+
+def _assessment_files(source: Union[str, List[AssessmentFileName]]) -> List[AssessmentFileName]:
+    if not isinstance(source, str):
+        return list(source)
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(source, f)
+            for f in os.listdir(source)
+            if f.lower().endswith(ASSESSMENT_FILES)
+        )
+    return sorted(glob.glob(source))
 
-    # add consumers to the base table
-    new_index = pd.Index(cfm.index.tolist() + ["Consumers"])
-    cfm = cfm.reindex(new_index).fillna(value=np.nan)
-    cfm.iloc[-1, 0:-1] = list(map(lambda x: round(x * 100), data.get("con")))
 
-    # insert overall accuracy
-    cfm = cfm.reindex(cfm.index.tolist() + ["Overall Accuracy"]).fillna(value=np.nan)
-    cfm.iloc[-1, 0] = round(data.get("acc") * 100, 2)
+def _iter_properties(datafile: AssessmentFileName) -> Iterator[Dict[str, Any]]:
+    if datafile.lower().endswith(LINE_DELIMITED):
+        with open(datafile, "r") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line).get("properties") or {}
+        return
 
-    return cfm
+    with open(datafile, "rb") as f:
+        if ijson is not None:
+            # use_float keeps the values as floats instead of Decimal
+            for props in ijson.items(f, "features.item.properties", use_float=True):
+                yield props or {}
+            return
+        features = json.load(f)["features"]
+    for feature in features:
+        yield feature.get("properties") or {}
@@ -0,0 +1,197 @@
+"""Client side index of scene footprints.
+
+Picking the Sentinel-1 swaths or Sentinel-2 tiles that cover an AOI normally
+takes a filterBounds on the server and a getInfo of the footprints for every
+AOI. A FootprintIndex is built once from an exported footprint table, the
+toFeatureCollection of a collection with addPrefix (and addFDate) applied, and
+matches any number of AOIs to scene ids locally with an STRtree. The ids are
+the system:index of the images, so the selection goes back to the server as a
+single ee.Filter.inList("system:index", ids).
+
+An index is saved as one .npz file holding the footprints as WKB, the ids, the
+acquisition dates and the relative orbits.
+"""
+from typing import Any, List, Sequence
+
+import ee
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry.base import BaseGeometry
+
+ColumnName = str
+SceneId = str
+
+# property that identifies the scene on the server
+INDEX_PROPERTY = "system:index"
+# orbit value of scenes without a relative orbit
+NO_ORBIT = -1
+
+
+def scene_id(value: Any) -> SceneId:
+    """system:index of an image from its system:id or system:index"""
+    return str(value).rsplit("/", 1)[-1]
+
+
+def parse_dates(values: pd.Series) -> np.ndarray:
+    """acquisition days from formatted dates or system:time_start milliseconds"""
+    if pd.api.types.is_numeric_dtype(values):
+        dates = pd.to_datetime(values, unit="ms")
+    else:
+        dates = pd.to_datetime(values)
+    return dates.to_numpy().astype("datetime64[D]")
+
+
+def _geometries(aois) -> np.ndarray:
+    if isinstance(aois, BaseGeometry):
+        return np.array([aois], dtype=object)
+    if hasattr(aois, "geometry"):
+        # GeoDataFrame or GeoSeries
+        aois = aois.geometry
+    return np.asarray(list(aois), dtype=object)
+
+
+class FootprintIndex:
+    """Scene footprints with their ids, dates and orbits, see from_frame"""
+
+    def __init__(
+        self,
+        ids: Sequence[SceneId],
+        geometries: Sequence[BaseGeometry],
+        dates: Sequence[Any] = None,
+        orbits: Sequence[int] = None,
+    ) -> None:
+        self.ids = np.asarray(ids, dtype=str)
+        self.geometries = np.asarray(geometries, dtype=object)
+        n = len(self.ids)
+        if len(self.geometries) != n:
+            raise ValueError("ids and geometries differ in length")
+        if dates is None:
+            dates = np.full(n, np.datetime64("NaT"), "datetime64[D]")
+        if orbits is None:
+            orbits = np.full(n, NO_ORBIT, np.int32)
+        self.dates = np.asarray(dates, "datetime64[D]")
+        self.orbits = np.asarray(orbits, np.int32)
+        self._tree = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def tree(self) -> shapely.STRtree:
+        """the STRtree over the footprints, built on first use"""
+        if self._tree is None:
+            self._tree = shapely.STRtree(self.geometries)
+        return self._tree
+
+    @classmethod
+    def from_frame(
+        cls,
+        frame: pd.DataFrame,
+        id_column: ColumnName = "system_id",
+        date_column: ColumnName = "date",
+        orbit_column: ColumnName = "relativeOrbitNumber_start",
+    ) -> "FootprintIndex":
+        """builds the index from an exported footprint table, a GeoDataFrame or
+        a csv export with the footprints as GeoJSON in a .geo column. The date
+        and orbit columns are optional"""
+        if "geometry" in frame.columns:
+            geometries = np.asarray(frame["geometry"], dtype=object)
+        elif ".geo" in frame.columns:
+            geometries = shapely.from_geojson(frame[".geo"].to_numpy())
+        else:
+            raise KeyError("the table has no geometry or .geo column")
+
+        ids = [scene_id(v) for v in frame[id_column]]
+        dates = parse_dates(frame[date_column]) if date_column in frame.columns else None
+        orbits = None
+        if orbit_column in frame.columns:
+            orbits = frame[orbit_column].fillna(NO_ORBIT).astype(np.int32).to_numpy()
+        return cls(ids, geometries, dates, orbits)
+
+    @classmethod
+    def from_file(cls, path: str, **columns: ColumnName) -> "FootprintIndex":
+        """reads a csv export with pandas, any other format with geopandas"""
+        if path.endswith(".csv"):
+            frame = pd.read_csv(path)
+        else:
+            import geopandas as gpd
+
+            frame = gpd.read_file(path)
+        return cls.from_frame(frame, **columns)
+
+    def save(self, path: str) -> None:
+        wkb = shapely.to_wkb(self.geometries)
+        offsets = np.concatenate([[0], np.cumsum([len(w) for w in wkb])]).astype(np.int64)
+        np.savez_compressed(
+            path,
+            ids=self.ids,
+            wkb=np.frombuffer(b"".join(wkb), dtype=np.uint8),
+            offsets=offsets,
+            dates=self.dates,
+            orbits=self.orbits,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "FootprintIndex":
+        with np.load(path, allow_pickle=False) as data:
+            buffer = data["wkb"].tobytes()
+            offsets = data["offsets"]
+            wkb = [buffer[offsets[i] : offsets[i + 1]] for i in range(len(offsets) - 1)]
+            return cls(data["ids"], shapely.from_wkb(wkb), data["dates"], data["orbits"])
+
+    def _keep(self, start, end, orbits) -> np.ndarray:
+        """mask of the scenes acquired in [start, end) on one of the orbits"""
+        keep = np.ones(len(self), dtype=bool)
+        if start is not None:
+            keep &= self.dates >= np.datetime64(start, "D")
+        if end is not None:
+            keep &= self.dates < np.datetime64(end, "D")
+        if orbits is not None:
+            keep &= np.isin(self.orbits, list(orbits))
+        return keep
+
+    def query_bulk(
+        self,
+        aois,
+        start: Any = None,
+        end: Any = None,
+        orbits: Sequence[int] = None,
+        predicate: str = "intersects",
+    ) -> List[List[SceneId]]:
+        """the scene ids of every AOI, in one STRtree query. aois is a
+        sequence of shapely geometries or a GeoDataFrame, end is exclusive
+        like ee.Filter.date. predicate is a shapely predicate tested as
+        predicate(aoi, footprint)"""
+        geometries = _geometries(aois)
+        # bounding box candidates are cut down by date and orbit before the
+        # exact predicate, which is the expensive part of the query
+        aoi_index, scene_index = self.tree.query(geometries)
+        keep = self._keep(start, end, orbits)[scene_index]
+        aoi_index, scene_index = aoi_index[keep], scene_index[keep]
+        matched = getattr(shapely, predicate)(geometries[aoi_index], self.geometries[scene_index])
+        aoi_index, scene_index = aoi_index[matched], scene_index[matched]
+
+        order = np.argsort(aoi_index.astype(np.int64) * len(self) + scene_index)
+        aoi_index, scene_index = aoi_index[order], scene_index[order]
+        bounds = np.searchsorted(aoi_index, np.arange(len(geometries) + 1))
+        ids = self.ids[scene_index]
+        return [ids[bounds[i] : bounds[i + 1]].tolist() for i in range(len(geometries))]
+
+    def query(self, aoi: BaseGeometry, **kwargs) -> List[SceneId]:
+        """the scene ids of one AOI, takes the arguments of query_bulk"""
+        return self.query_bulk([aoi], **kwargs)[0]
+
+    def scenes(self, aois, **kwargs) -> List[SceneId]:
+        """the distinct scene ids covering any of the AOIs"""
+        matches = self.query_bulk(_geometries(aois), **kwargs)
+        return sorted({i for ids in matches for i in ids})
+
+    def filter(self, aois, **kwargs) -> ee.Filter:
+        """server side filter selecting the scenes covering any of the AOIs"""
+        return scene_filter(self.scenes(aois, **kwargs))
+
+
+def scene_filter(ids: Sequence[SceneId]) -> ee.Filter:
+    """ee.Filter.inList on system:index"""
+    return ee.Filter.inList(INDEX_PROPERTY, sorted(set(ids)))
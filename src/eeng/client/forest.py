@@ -0,0 +1,215 @@
+"""Local random forest with the hyperparameters of eeng.server.models.
+
+Used to tune a forest on exported samples (see eeng.client.samples) without
+training a smileRandomForest on the server for every configuration. The
+parameters keep the names of RandomForestClassifier and map onto scikit-learn:
+
+    n_trees        numberOfTrees      n_estimators
+    var_per_split  variablesPerSplit  max_features (None is the square root)
+    min_leaf_pop   minLeafPopulation  min_samples_leaf
+    bag_frac       bagFraction        max_samples
+    max_nodes      maxNodes           max_leaf_nodes
+    seed           seed               random_state
+
+Smile samples the bag without replacement when bag_frac < 1, scikit-learn always
+bootstraps with replacement, so scores are close but not identical.
+"""
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence
+
+import ee
+import numpy as np
+import pandas as pd
+
+try:
+    from sklearn.ensemble import RandomForestClassifier as _SklearnForest
+    from sklearn.model_selection import StratifiedKFold
+except ImportError:  # optional, install eeng[local]
+    _SklearnForest = None
+    StratifiedKFold = None
+
+from ..server.models import RandomForestClassifier
+from .trees import TreeString, forest_to_strings
+
+# RandomForestClassifier parameter -> ee.Classifier.smileRandomForest argument
+EE_PARAMETERS = {
+    "n_trees": "numberOfTrees",
+    "var_per_split": "variablesPerSplit",
+    "min_leaf_pop": "minLeafPopulation",
+    "bag_frac": "bagFraction",
+    "max_nodes": "maxNodes",
+    "seed": "seed",
+}
+
+
+class LocalRandomForest:
+    """scikit-learn random forest configured like RandomForestClassifier"""
+
+    def __init__(
+        self,
+        n_trees: int = 1000,
+        var_per_split: int = None,
+        min_leaf_pop: int = 1,
+        bag_frac: float = 0.5,
+        max_nodes: int = None,
+        seed: int = 0,
+        n_jobs: int = None,
+    ) -> None:
+        if _SklearnForest is None:
+            raise ImportError("LocalRandomForest requires scikit-learn, install eeng[local]")
+        self.n_trees = n_trees
+        self.var_per_split = var_per_split
+        self.min_leaf_pop = min_leaf_pop
+        self.bag_frac = bag_frac
+        self.max_nodes = max_nodes
+        self.seed = seed
+        self.n_jobs = n_jobs
+        self._model = None
+
+    def __repr__(self) -> str:
+        params = ", ".join(f"{k}={v}" for k, v in self.params.items())
+        return f"LocalRandomForest({params})"
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in EE_PARAMETERS}
+
+    @property
+    def model(self):
+        """the fitted sklearn.ensemble.RandomForestClassifier"""
+        return self._model
+
+    def sklearn_params(self) -> Dict[str, Any]:
+        return {
+            "n_estimators": self.n_trees,
+            "max_features": "sqrt" if self.var_per_split is None else self.var_per_split,
+            "min_samples_leaf": self.min_leaf_pop,
+            "bootstrap": True,
+            "max_samples": None if self.bag_frac >= 1 else self.bag_frac,
+            "max_leaf_nodes": self.max_nodes,
+            "random_state": self.seed,
+            "n_jobs": self.n_jobs,
+        }
+
+    def fit(self, X: np.ndarray, y: Sequence[Any]) -> "LocalRandomForest":
+        self._model = _SklearnForest(**self.sklearn_params()).fit(X, y)
+        return self
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        if self._model is None:
+            raise ValueError("Forest has not been trained. Call the fit method before calling predict")
+        return self._model.predict(X)
+
+    def score(self, X: np.ndarray, y: Sequence[Any]) -> float:
+        """overall accuracy"""
+        return float(np.mean(self.predict(X) == np.asarray(y)))
+
+    def ee_params(self) -> Dict[str, Any]:
+        """the keyword arguments of ee.Classifier.smileRandomForest"""
+        return {EE_PARAMETERS[k]: v for k, v in self.params.items()}
+
+    def to_ee(self) -> ee.Classifier:
+        """an untrained ee.Classifier.smileRandomForest with the same parameters"""
+        return ee.Classifier.smileRandomForest(**self.ee_params())
+
+    def to_classifier(self) -> RandomForestClassifier:
+        """the server side RandomForestClassifier with the same parameters"""
+        return RandomForestClassifier(**self.params)
+
+    def to_trees(self, feature_names: Sequence[str], lookup: Dict[Any, Any] = None) -> List[TreeString]:
+        """the fitted trees as ee.Classifier.decisionTreeEnsemble strings, see
+        eeng.client.trees"""
+        if self._model is None:
+            raise ValueError("Forest has not been trained. Call the fit method before calling to_trees")
+        return forest_to_strings(self._model, feature_names, lookup)
+
+
+def cross_validate(
+    params: Dict[str, Any], X: np.ndarray, y: np.ndarray, folds: int = 3, n_jobs: int = None
+) -> List[float]:
+    """overall accuracy of every stratified fold"""
+    if StratifiedKFold is None:
+        raise ImportError("cross_validate requires scikit-learn, install eeng[local]")
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=params.get("seed", 0))
+    scores = []
+    for train, test in splitter.split(X, y):
+        forest = LocalRandomForest(**params, n_jobs=n_jobs).fit(X[train], y[train])
+        scores.append(forest.score(X[test], y[test]))
+    return scores
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    """Scores of every configuration of a search, best first"""
+
+    results: pd.DataFrame
+    best_params: Dict[str, Any]
+
+    @property
+    def best_score(self) -> float:
+        return float(self.results["score"].iloc[0])
+
+    def best_forest(self, n_jobs: int = None) -> LocalRandomForest:
+        return LocalRandomForest(**self.best_params, n_jobs=n_jobs)
+
+
+def grid_search(
+    X: np.ndarray,
+    y: Sequence[Any],
+    grid: Dict[str, Sequence[Any]],
+    folds: int = 3,
+    processes: int = None,
+    n_jobs: int = 1,
+) -> SearchResult:
+    """cross validates every combination of the parameter lists in grid.
+    Configurations run in a pool of processes, each forest uses n_jobs threads"""
+    names = list(grid)
+    configs = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+    return _search(X, y, configs, folds, processes, n_jobs)
+
+
+def random_search(
+    X: np.ndarray,
+    y: Sequence[Any],
+    space: Dict[str, Sequence[Any]],
+    n_iter: int = 10,
+    seed: int = 0,
+    folds: int = 3,
+    processes: int = None,
+    n_jobs: int = 1,
+) -> SearchResult:
+    """cross validates n_iter distinct configurations drawn from the parameter
+    lists in space"""
+    rng = np.random.default_rng(seed)
+    n_configs = int(np.prod([len(v) for v in space.values()]))
+    configs: List[Dict[str, Any]] = []
+    while len(configs) < min(n_iter, n_configs):
+        config = {k: v[rng.integers(len(v))] for k, v in space.items()}
+        config = {k: v.item() if isinstance(v, np.generic) else v for k, v in config.items()}
+        if config not in configs:
+            configs.append(config)
+    return _search(X, y, configs, folds, processes, n_jobs)
+
+
+def _search(X, y, configs, folds, processes, n_jobs) -> SearchResult:
+    unknown = {k for config in configs for k in config} - set(EE_PARAMETERS)
+    if unknown:
+        raise ValueError(f"unknown parameters: {sorted(unknown)}")
+    X = np.asarray(X)
+    y = np.asarray(y)
+    args = ([config, X, y, folds, n_jobs] for config in configs)
+
+    if processes is not None and processes > 1:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            scores = list(pool.map(cross_validate, *zip(*args)))
+    else:
+        scores = [cross_validate(*a) for a in args]
+
+    results = pd.DataFrame(configs)
+    results["score"] = [np.mean(s) for s in scores]
+    results["std"] = [np.std(s) for s in scores]
+    order = results["score"].sort_values(ascending=False, kind="stable").index
+    results = results.loc[order].reset_index(drop=True)
+    return SearchResult(results=results, best_params=configs[order[0]])
@@ -1,43 +1,45 @@
 import geopandas as gpd
+import numpy as np
 import pandas as pd
 
-from typing import List
+from typing import Dict, List, Tuple
 
+DayOfYear = int
+Season = Tuple[DayOfYear, DayOfYear]
 
-def extract_s1_swaths(gdf: gpd.GeoDataFrame, relobits: List[int]):
-    """Extract S1 Swaths from a data frame by rel obrits"""
-    gdfc = gdf.copy()
+# default season windows, first and last day of year inclusive
+SEASONS: Dict[str, Season] = {"early": (135, 181), "mid": (182, 243)}
+
+
+def extract_s1_swaths(
+    gdf: gpd.GeoDataFrame, relobits: List[int], seasons: Dict[str, Season] = None
+):
+    """Extract S1 Swaths from a data frame by rel obrits. For every group_id and
+    season keeps the swaths acquired closest to the middle of the season window.
+    When windows overlap a day belongs to the first season that contains it."""
+    seasons = SEASONS if seasons is None else seasons
+    if not seasons:
+        raise ValueError("at least one season is required")
+
+    gdfc = gdf[gdf["relorb"].isin(relobits)].copy()
     gdfc["date"] = pd.to_datetime(gdfc["date"], format="%Y-%m-%d")
     gdfc["doy"] = gdfc["date"].dt.dayofyear
 
-    def es_mid(gdf):
-        return (181 + 135) // 2
+    doy = gdfc["doy"].to_numpy()
+    # np.select is np.where over any number of season windows
+    in_season = [(doy >= start) & (doy <= end) for start, end in seasons.values()]
+    mid_points = [(start + end) // 2 for start, end in seasons.values()]
 
-    def ls_mid(gdf):
-        return (243 + 182) // 2
+    gdfc["season"] = np.select(in_season, list(seasons), default="")
+    gdfc["mid_point"] = np.select(in_season, mid_points, default=-1)
+    gdfc = gdfc[np.logical_or.reduce(in_season)]
 
-    gdfc = gdfc[gdfc["relorb"].isin(relobits)]
-
-    gdfc = gdfc[(gdfc["doy"] >= 135) & (gdfc["doy"] <= 243)]
-    gdfc["season"] = gdfc["doy"].apply(lambda x: "early" if x <= 181 else "mid")
-    gdfc["mid_point"] = gdfc.apply(
-        lambda x: es_mid(x) if x["season"] == "early" else ls_mid(x), axis=1
-    )
-    gdfc["diff"] = gdfc.apply(lambda x: x["doy"] - x["mid_point"], axis=1)
+    gdfc["diff"] = gdfc["doy"] - gdfc["mid_point"]
     gdfc["diff_abs"] = gdfc["diff"].abs()
 
-    diffs = gdfc.groupby(["group_id", "season"])["diff_abs"].min().reset_index()
-
-    frames = []
-    gdf2 = gdfc.copy()
-    for idx, d in diffs.iterrows():
-        frames.append(
-            gdf2[
-                (gdf2["group_id"] == d["group_id"])
-                & (gdf2["season"] == d["season"])
-                & (gdf2["diff_abs"] == d["diff_abs"])
-            ]
-        )
-
-    out = pd.concat(frames, ignore_index=True)
-    return out
+    closest = gdfc.groupby(["group_id", "season"])["diff_abs"].transform("min")
+    out = gdfc[gdfc["diff_abs"] == closest]
+
+    # same row order as selecting each (group_id, season) group in turn
+    out = out.sort_values(["group_id", "season"], kind="stable")
+    return out.reset_index(drop=True)
@@ -0,0 +1,137 @@
+"""Reference harmonic regression for validating eeng.server.tsm.fourier offline.
+
+The design matrix has the same columns, in the same order, as the independent
+bands of a HarmonicsCollection: constant, t, cos_1..cos_k, sin_1..sin_k where
+t is the time in radians (years since 1970 * 2 * pi * omega).
+"""
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from math import pi
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+ColumnName = str
+
+# pixels solved together, bounds the (time, pixels) working arrays of a chunk
+CHUNK_PIXELS = 65_536
+
+
+def time_radians(dates: Sequence, omega: float = 1.0) -> np.ndarray:
+    """years since 1970-01-01 in radians, using a year of 365.25 days. ee uses
+    calendar years, the difference is well below a day"""
+    days = np.asarray(dates, dtype="datetime64[ms]").astype(np.int64) / 86_400_000
+    return days / 365.25 * 2 * pi * omega
+
+
+def harmonic_names(cycles: int) -> List[ColumnName]:
+    cos = [f"cos_{i}" for i in range(1, cycles + 1)]
+    sin = [f"sin_{i}" for i in range(1, cycles + 1)]
+    return ["constant", "t"] + cos + sin
+
+
+def design_matrix(t: Sequence[float], cycles: int = 3) -> np.ndarray:
+    """(time, 2 + 2 * cycles) matrix of the independent variables"""
+    t = np.asarray(t, dtype=float)
+    angles = t[:, None] * np.arange(1, cycles + 1)
+    return np.hstack([np.ones((len(t), 1)), t[:, None], np.cos(angles), np.sin(angles)])
+
+
+def fit(y: Sequence[float], t: Sequence[float], cycles: int = 3) -> Dict[ColumnName, float]:
+    """least squares fit of a single series, keyed by <band>_coeff like the
+    coefficient image of HarmonicModel"""
+    coefficients, *_ = np.linalg.lstsq(design_matrix(t, cycles), np.asarray(y, dtype=float), rcond=None)
+    return {f"{name}_coeff": c for name, c in zip(harmonic_names(cycles), coefficients)}
+
+
+def amplitude_phase(coefficients: Dict[ColumnName, float], cycles: int = 3) -> Dict[ColumnName, float]:
+    """amp_<cycle> and phase_<cycle> as FourierTransform computes them"""
+    out = {}
+    for i in range(1, cycles + 1):
+        sin, cos = coefficients[f"sin_{i}_coeff"], coefficients[f"cos_{i}_coeff"]
+        out[f"amp_{i}"] = float(np.hypot(sin, cos))
+        out[f"phase_{i}"] = float(np.arctan2(sin, cos))
+    return out
+
+
+@dataclass(frozen=True)
+class CubeFit:
+    """Harmonic fit of every pixel of a (time, rows, cols) cube. coefficients
+    has one layer per name in names, amplitude and phase one per cycle"""
+
+    names: List[ColumnName]
+    coefficients: np.ndarray
+    amplitude: np.ndarray
+    phase: np.ndarray
+
+
+def fit_cube(
+    cube: np.ndarray,
+    t: Sequence[float],
+    cycles: int = 3,
+    chunk_pixels: int = CHUNK_PIXELS,
+    max_workers: int = None,
+) -> CubeFit:
+    """fits every pixel of a (time, rows, cols) cube, t is the time in radians of
+    each layer. The pseudo-inverse of the design matrix is computed once and
+    applied to whole blocks of rows, pixels with NaN observations are solved
+    from their own normal equations in one batch per block. Pixels with fewer
+    valid observations than coefficients are NaN.
+
+    The cube is read block by block, so it can be an np.memmap larger than
+    memory. max_workers > 1 solves the blocks in a thread pool."""
+    if cube.ndim != 3:
+        raise ValueError("cube must have the shape (time, rows, cols)")
+    n_times, rows, cols = cube.shape
+    x = design_matrix(t, cycles)
+    if len(x) != n_times:
+        raise ValueError("t must have one value per layer of the cube")
+    pinv = np.linalg.pinv(x)
+    n_coef = x.shape[1]
+
+    coefficients = np.full((n_coef, rows, cols), np.nan)
+    block_rows = max(1, chunk_pixels // max(cols, 1))
+    blocks = [slice(r, min(r + block_rows, rows)) for r in range(0, rows, block_rows)]
+
+    def solve(block: slice) -> None:
+        y = np.asarray(cube[:, block, :], dtype=float).reshape(n_times, -1)
+        coefficients[:, block, :] = _solve(x, pinv, y).reshape(n_coef, -1, cols)
+
+    if max_workers is not None and max_workers > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(solve, blocks))
+    else:
+        for block in blocks:
+            solve(block)
+
+    cos, sin = coefficients[2 : 2 + cycles], coefficients[2 + cycles :]
+    return CubeFit(
+        names=harmonic_names(cycles),
+        coefficients=coefficients,
+        amplitude=np.hypot(sin, cos),
+        phase=np.arctan2(sin, cos),
+    )
+
+
+def _solve(x: np.ndarray, pinv: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """(coefficients, pixels) least squares solution of y (time, pixels)"""
+    valid = ~np.isnan(y)
+    complete = valid.all(axis=0)
+    out = np.full((x.shape[1], y.shape[1]), np.nan)
+    out[:, complete] = pinv @ y[:, complete]
+
+    partial = np.flatnonzero(~complete & (valid.sum(axis=0) >= x.shape[1]))
+    if len(partial):
+        w = valid[:, partial].astype(float)
+        yp = np.where(valid[:, partial], y[:, partial], 0.0)
+        n_coef = x.shape[1]
+        # every pixel's x.T @ diag(w) @ x as one matrix product
+        outer = (x[:, :, None] * x[:, None, :]).reshape(len(x), -1)
+        xtwx = (w.T @ outer).reshape(-1, n_coef, n_coef)
+        xtwy = (yp.T @ x)[:, :, None]
+        try:
+            solution = np.linalg.solve(xtwx, xtwy)
+        except np.linalg.LinAlgError:
+            solution = np.linalg.pinv(xtwx) @ xtwy
+        out[:, partial] = solution[:, :, 0].T
+    return out
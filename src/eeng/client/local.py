@@ -0,0 +1,261 @@
+"""NumPy backend that evaluates eeng calculators, spatial filters and cloud
+masks on in-memory band arrays, without a connection to Earth Engine.
+
+Images are plain dictionaries of band name to 2D array, rows run north to
+south. Outputs follow the same band naming rules as the server side classes.
+"""
+from functools import singledispatch
+from typing import Dict
+
+import numpy as np
+
+from eeng.server.calc import (
+    Calculator,
+    CalculatorChain,
+    NDVI,
+    SAVI,
+    TasselCap,
+    Ratio,
+    TASSEL_CAP_COEFFICIENTS,
+)
+from eeng.server.filters import SpatialFilters, BoxCar, Gaussian, PeronaMalik
+from eeng.server.cmasking import S2CloudMasks, S2CloudlessAlgorithm
+
+BandName = str
+LocalImage = Dict[BandName, np.ndarray]
+
+# offsets (row, col) of the 4 neighbours used by the Perona-Malik filter
+NEIGHBOURS = ((-1, 0), (1, 0), (0, 1), (0, -1))
+
+
+def evaluate(operation, image: LocalImage) -> LocalImage:
+    """evaluates a Calculator, SpatialFilters or S2CloudMasks instance on the
+    image, the same way calling it on an ee.Image would"""
+    return _evaluate(operation, image)
+
+
+def add_bands(image: LocalImage, bands: LocalImage) -> LocalImage:
+    """adds the bands to the image, a band name that is already taken gets a
+    numbered suffix the same way ee.Image.addBands does"""
+    out = dict(image)
+    for name, band in bands.items():
+        unique, n = name, 0
+        while unique in out:
+            n += 1
+            unique = f"{name}_{n}"
+        out[unique] = band
+    return out
+
+
+@singledispatch
+def calc(calculator: Calculator, image: LocalImage) -> LocalImage:
+    """returns only the bands produced by the calculator"""
+    raise TypeError(f"no local implementation for {type(calculator).__name__}")
+
+
+@calc.register
+def _(calculator: CalculatorChain, image: LocalImage) -> LocalImage:
+    out = {}
+    for c in calculator.calculators:
+        out = add_bands(out, calc(c, image))
+    return out
+
+
+@calc.register
+def _(calculator: NDVI, image: LocalImage) -> LocalImage:
+    nir = _float(image[calculator.nir])
+    red = _float(image[calculator.red])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {calculator.name: (nir - red) / (nir + red)}
+
+
+@calc.register
+def _(calculator: SAVI, image: LocalImage) -> LocalImage:
+    nir = _float(image[calculator.nir])
+    red = _float(image[calculator.red])
+    L = calculator.L
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {calculator.name: (1 + L) * (nir - red) / (nir + red + L)}
+
+
+@calc.register
+def _(calculator: Ratio, image: LocalImage) -> LocalImage:
+    numerator = _float(image[calculator.numerator])
+    demoninator = _float(image[calculator.demoninator])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {calculator.name: numerator / demoninator}
+
+
+@calc.register
+def _(calculator: TasselCap, image: LocalImage) -> LocalImage:
+    names = [
+        calculator.blue,
+        calculator.green,
+        calculator.red,
+        calculator.nir,
+        calculator.swir1,
+        calculator.swir2,
+    ]
+    stack = np.stack([_float(image[name]) for name in names])
+    components = np.tensordot(np.array(TASSEL_CAP_COEFFICIENTS), stack, axes=1)
+    return dict(zip(["Brightness", "Greenness", "Wetness"], components))
+
+
+@singledispatch
+def kernel(algorithm: SpatialFilters) -> np.ndarray:
+    """returns the convolution weights for a kernel based spatial filter"""
+    raise TypeError(f"no local implementation for {type(algorithm).__name__}")
+
+
+@kernel.register
+def _(algorithm: BoxCar) -> np.ndarray:
+    radius = _pixels(algorithm.radius, algorithm.units)
+    weights = np.ones((2 * radius + 1, 2 * radius + 1))
+    return _scale_kernel(weights, algorithm.normalize, algorithm.magnitude)
+
+
+@kernel.register
+def _(algorithm: Gaussian) -> np.ndarray:
+    radius = _pixels(algorithm.radius, algorithm.units)
+    offsets = np.arange(-radius, radius + 1)
+    yy, xx = np.meshgrid(offsets, offsets, indexing="ij")
+    weights = np.exp(-(xx**2 + yy**2) / (2 * algorithm.sigma**2))
+    return _scale_kernel(weights, algorithm.normalize, algorithm.magnitude)
+
+
+def convolve(band: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """applies the kernel weights to every pixel of the band, the edges are
+    padded by repeating the outermost pixels"""
+    ry, rx = weights.shape[0] // 2, weights.shape[1] // 2
+    padded = np.pad(_float(band), ((ry, ry), (rx, rx)), mode="edge")
+    windows = np.lib.stride_tricks.sliding_window_view(padded, weights.shape)
+    return np.einsum("ijkl,kl->ij", windows, weights)
+
+
+def perona_malik(band: np.ndarray, K: float = 3.5, iterations: int = 10, method: int = 2, lamb: float = 0.2) -> np.ndarray:
+    """anisotropic diffusion of a single band, see filters.PeronaMalik"""
+    img = _float(band)
+    for _ in range(iterations):
+        padded = np.pad(img, 1, mode="edge")
+        rows, cols = img.shape
+        gradients = np.stack(
+            [padded[1 + dy : 1 + dy + rows, 1 + dx : 1 + dx + cols] for dy, dx in NEIGHBOURS]
+        ) - img
+        squared = gradients * gradients
+        if method == 1:
+            conductance = np.exp(squared * (-1.0 / K))
+        else:
+            conductance = 1.0 / (1.0 + squared / (K * K))
+        img = img + lamb * (conductance * gradients).sum(axis=0)
+    return img
+
+
+def cloud_mask(algorithm: S2CloudMasks, image: LocalImage) -> np.ndarray:
+    """returns True where the QA60 band flags neither clouds nor cirrus"""
+    qa = np.asarray(image[algorithm._qa_band]).astype(np.int64)
+    cloud_bit_mask = 1 << 10
+    cirrus_bit_mask = 1 << 11
+    return ((qa & cloud_bit_mask) == 0) & ((qa & cirrus_bit_mask) == 0)
+
+
+def directional_projection(source: np.ndarray, angle: float, max_distance: float) -> np.ndarray:
+    """True where a True source pixel lies within max_distance pixels in the
+    direction angle (degrees counterclockwise from east), like the mask of
+    ee.Image.directionalDistanceTransform. Source pixels are included"""
+    source = np.asarray(source, dtype=bool)
+    rows, cols = source.shape
+    dx, dy = np.cos(np.radians(angle)), np.sin(np.radians(angle))
+    out = source.copy()
+    for k in range(1, int(np.floor(max_distance)) + 1):
+        # rows run north to south, so north is a negative row offset
+        r, c = int(round(-k * dy)), int(round(k * dx))
+        if abs(r) >= rows or abs(c) >= cols:
+            break
+        shifted = np.zeros_like(source)
+        shifted[max(-r, 0) : rows - max(r, 0), max(-c, 0) : cols - max(c, 0)] = source[
+            max(r, 0) : rows - max(-r, 0), max(c, 0) : cols - max(-c, 0)
+        ]
+        out |= shifted
+    return out
+
+
+def focal(mask: np.ndarray, radius: float, operation: str) -> np.ndarray:
+    """focalMin / focalMax of a boolean band with a circle of radius pixels,
+    pixels outside the band are ignored"""
+    mask = np.asarray(mask, dtype=bool)
+    r = int(np.floor(radius))
+    yy, xx = np.mgrid[-r : r + 1, -r : r + 1]
+    footprint = yy**2 + xx**2 <= radius**2
+    fill = operation == "min"
+    padded = np.pad(mask, r, mode="constant", constant_values=fill)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, footprint.shape)[..., footprint]
+    return windows.all(axis=-1) if operation == "min" else windows.any(axis=-1)
+
+
+def s2cloudless_mask(algorithm: S2CloudlessAlgorithm, image: LocalImage, solar_azimuth: float) -> np.ndarray:
+    """True where S2CloudlessAlgorithm.cloud_shadow_mask flags cloud or shadow.
+    The probability, B8 and SCL bands are expected at the algorithm's mask_scale"""
+    clouds = np.asarray(image["probability"]) > algorithm.cloud_prb_thresh
+    dark = (np.asarray(image["B8"]) < algorithm.nir_drk_thresh * algorithm.sr_band_scale) & (
+        np.asarray(image["SCL"]) != 6
+    )
+    projection = directional_projection(clouds, 90 - solar_azimuth, algorithm.projection_distance)
+    mask = clouds | (projection & dark)
+    mask = focal(mask, 2, "min")
+    return focal(mask, algorithm.buffer * 2 / algorithm.mask_scale, "max")
+
+
+@singledispatch
+def _evaluate(operation, image: LocalImage) -> LocalImage:
+    raise TypeError(f"no local implementation for {type(operation).__name__}")
+
+
+@_evaluate.register
+def _(operation: Calculator, image: LocalImage) -> LocalImage:
+    return add_bands(image, calc(operation, image))
+
+
+@_evaluate.register
+def _(operation: SpatialFilters, image: LocalImage) -> LocalImage:
+    if isinstance(operation, PeronaMalik):
+        return {
+            name: perona_malik(
+                band, operation.K, operation.iterations, operation.method, operation.lamb
+            )
+            for name, band in image.items()
+        }
+    weights = kernel(operation)
+    return {name: convolve(band, weights) for name, band in image.items()}
+
+
+@_evaluate.register
+def _(operation: S2CloudMasks, image: LocalImage) -> LocalImage:
+    mask = cloud_mask(operation, image)
+    return {name: np.ma.masked_where(~mask, band) for name, band in image.items()}
+
+
+@_evaluate.register
+def _(operation: S2CloudlessAlgorithm, image: LocalImage) -> LocalImage:
+    azimuth = float(np.asarray(image["MEAN_SOLAR_AZIMUTH_ANGLE"]))
+    mask = s2cloudless_mask(operation, image, azimuth)
+    return {
+        name: np.ma.masked_where(mask, band)
+        for name, band in image.items()
+        if name.startswith("B") and np.ndim(band) == 2
+    }
+
+
+def _float(band: np.ndarray) -> np.ndarray:
+    return np.asarray(band, dtype=np.float64)
+
+
+def _pixels(radius: float, units: str) -> int:
+    if units != "pixels":
+        raise ValueError("only kernels with pixel units can be evaluated locally")
+    return int(np.ceil(radius))
+
+
+def _scale_kernel(weights: np.ndarray, normalize: bool, magnitude: float) -> np.ndarray:
+    if normalize:
+        weights = weights / weights.sum()
+    return weights * magnitude
@@ -0,0 +1,197 @@
+"""Accuracy metrics computed locally from exported validation samples.
+
+Confusion matrices follow ee.ConfusionMatrix: rows are the true (validation)
+labels and columns the predicted labels. Every metric accepts a single matrix
+or a stack of matrices with shape (..., k, k).
+"""
+from typing import Any, Dict, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .assessment import AssessmentTable, assessment_table
+
+ColumnName = str
+ConfusionMatrix = np.ndarray
+
+# upper bound on the number of sample indices drawn per bootstrap batch
+BOOTSTRAP_BATCH_ELEMENTS = 10_000_000
+
+
+def encode(values: Sequence[Any], labels: Sequence[Any]) -> np.ndarray:
+    """returns the position of every value in labels"""
+    values = np.asarray(values)
+    labels = np.asarray(labels)
+    sorter = np.argsort(labels)
+    pos = np.searchsorted(labels, values, sorter=sorter)
+    pos = sorter[np.clip(pos, 0, len(labels) - 1)]
+    if not np.array_equal(labels[pos], values):
+        raise ValueError("values contain labels that are not in labels")
+    return pos
+
+
+def confusion_matrix(
+    y_true: Sequence[Any], y_pred: Sequence[Any], labels: Sequence[Any] = None
+) -> Tuple[ConfusionMatrix, np.ndarray]:
+    """counts the true and predicted label pairs, labels default to the sorted
+    union of both columns. Returns the matrix and the labels"""
+    y_true = np.asarray(y_true)
+    y_pred = np.asarray(y_pred)
+    if y_true.shape != y_pred.shape:
+        raise ValueError("y_true and y_pred must have the same length")
+    labels = np.union1d(y_true, y_pred) if labels is None else np.asarray(labels)
+    k = len(labels)
+    pairs = encode(y_true, labels) * k + encode(y_pred, labels)
+    return np.bincount(pairs, minlength=k * k).reshape(k, k), labels
+
+
+def overall_accuracy(cm: ConfusionMatrix) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.trace(cm, axis1=-2, axis2=-1) / cm.sum(axis=(-2, -1))
+
+
+def producers_accuracy(cm: ConfusionMatrix) -> np.ndarray:
+    """correct samples over the validation samples of each class (recall)"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.diagonal(cm, axis1=-2, axis2=-1) / cm.sum(axis=-1)
+
+
+def consumers_accuracy(cm: ConfusionMatrix) -> np.ndarray:
+    """correct samples over the predicted samples of each class (precision)"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.diagonal(cm, axis1=-2, axis2=-1) / cm.sum(axis=-2)
+
+
+def kappa(cm: ConfusionMatrix) -> np.ndarray:
+    total = cm.sum(axis=(-2, -1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        expected = (cm.sum(axis=-1) * cm.sum(axis=-2)).sum(axis=-1) / total**2
+        return (overall_accuracy(cm) - expected) / (1 - expected)
+
+
+def f1_score(cm: ConfusionMatrix) -> np.ndarray:
+    producers = producers_accuracy(cm)
+    consumers = consumers_accuracy(cm)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 2 * producers * consumers / (producers + consumers)
+
+
+METRICS = {
+    "overall": overall_accuracy,
+    "kappa": kappa,
+    "producers": producers_accuracy,
+    "consumers": consumers_accuracy,
+    "f1": f1_score,
+}
+
+
+def bootstrap_matrices(
+    true_codes: np.ndarray,
+    pred_codes: np.ndarray,
+    k: int,
+    n_resamples: int = 1000,
+    seed: int = 0,
+) -> np.ndarray:
+    """confusion matrices of n_resamples bootstrap resamples, shape (n, k, k).
+    The resamples are drawn and counted in batches with a single bincount each"""
+    n = len(true_codes)
+    pairs = true_codes * k + pred_codes
+    rng = np.random.default_rng(seed)
+    batch = max(1, BOOTSTRAP_BATCH_ELEMENTS // max(n, 1))
+
+    out = np.empty((n_resamples, k, k), dtype=np.int64)
+    for start in range(0, n_resamples, batch):
+        size = min(batch, n_resamples - start)
+        idx = rng.integers(0, n, size=(size, n))
+        flat = pairs[idx] + (np.arange(size) * k * k)[:, None]
+        out[start : start + size] = np.bincount(
+            flat.ravel(), minlength=size * k * k
+        ).reshape(size, k, k)
+    return out
+
+
+class AccuracyAssessment:
+    """Confusion matrix and accuracy metrics of a validation table"""
+
+    def __init__(self, y_true: Sequence[Any], y_pred: Sequence[Any], labels: Sequence[Any] = None) -> None:
+        self.matrix, self.labels = confusion_matrix(y_true, y_pred, labels)
+        self._true = encode(y_true, self.labels)
+        self._pred = encode(y_pred, self.labels)
+
+    @classmethod
+    def from_frame(
+        cls,
+        frame: pd.DataFrame,
+        on: ColumnName = None,
+        name: ColumnName = None,
+        labels: Sequence[Any] = None,
+    ) -> "AccuracyAssessment":
+        """on and name default to the columns make_confusion_matrix uses"""
+        on = "Wetland" if on is None else on
+        name = "classification" if name is None else name
+        return cls(frame[on].to_numpy(), frame[name].to_numpy(), labels)
+
+    @classmethod
+    def from_file(cls, datafile: str, on: ColumnName = None, name: ColumnName = None, labels: Sequence[Any] = None) -> "AccuracyAssessment":
+        """reads an exported validation table, csv or any format geopandas reads"""
+        if datafile.lower().endswith(".csv"):
+            frame = pd.read_csv(datafile)
+        else:
+            import geopandas as gpd
+
+            frame = gpd.read_file(datafile)
+        return cls.from_frame(frame, on, name, labels)
+
+    @property
+    def overall(self) -> float:
+        return float(overall_accuracy(self.matrix))
+
+    @property
+    def producers(self) -> np.ndarray:
+        return producers_accuracy(self.matrix)
+
+    @property
+    def consumers(self) -> np.ndarray:
+        return consumers_accuracy(self.matrix)
+
+    @property
+    def kappa(self) -> float:
+        return float(kappa(self.matrix))
+
+    @property
+    def f1(self) -> np.ndarray:
+        return f1_score(self.matrix)
+
+    def table(self) -> AssessmentTable:
+        """the same layout as confusion_matrix_from_file"""
+        return assessment_table(
+            cfm=self.matrix,
+            labels=self.labels.tolist(),
+            producers=self.producers,
+            consumers=self.consumers,
+            accuracy=self.overall,
+        )
+
+    def confidence_intervals(
+        self, n_resamples: int = 1000, confidence: float = 0.95, seed: int = 0
+    ) -> Dict[str, pd.DataFrame]:
+        """percentile bootstrap intervals of every metric. Returns one frame per
+        metric with the estimate, lower and upper bound, per class where it applies"""
+        matrices = bootstrap_matrices(
+            self._true, self._pred, len(self.labels), n_resamples, seed
+        )
+        tail = (1 - confidence) / 2 * 100
+        out = {}
+        for metric, func in METRICS.items():
+            samples = func(matrices)
+            lower, upper = np.nanpercentile(samples, [tail, 100 - tail], axis=0)
+            index = self.labels.tolist() if samples.ndim > 1 else [metric]
+            out[metric] = pd.DataFrame(
+                {
+                    "estimate": np.atleast_1d(func(self.matrix)),
+                    "lower": np.atleast_1d(lower),
+                    "upper": np.atleast_1d(upper),
+                },
+                index=index,
+            )
+        return out
@@ -0,0 +1,177 @@
+"""Columnar on-disk store for exported training samples.
+
+A store is a directory with a schema.json and one .npy file per column. Columns
+are opened as read only memory maps the first time they are used, so loading a
+store reads nothing and a read only touches the columns it asks for. String
+columns, like the class property, are stored as integer codes with their
+categories in the schema.
+"""
+import json
+import os
+from typing import Any, Dict, List, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+ColumnName = str
+
+SCHEMA_FILE = "schema.json"
+
+
+class SampleStore:
+    """Read access to a sample store directory, see SampleStore.from_frame"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(os.path.join(path, SCHEMA_FILE), "r") as f:
+            self.schema: Dict[str, Any] = json.load(f)
+        self._columns: Dict[ColumnName, np.ndarray] = {}
+
+    @classmethod
+    def from_frame(
+        cls,
+        frame: pd.DataFrame,
+        path: str,
+        class_property: ColumnName = None,
+        properties: Sequence[ColumnName] = None,
+    ) -> "SampleStore":
+        """writes a sample table to path. properties are the TrainingPoints
+        properties of the samples, they come first in the schema followed by
+        the sampled bands. Geometry columns are dropped"""
+        properties = [p for p in (properties or []) if p is not None]
+        if class_property is not None and class_property not in properties:
+            properties.insert(0, class_property)
+        missing = [p for p in properties if p not in frame.columns]
+        if missing:
+            raise KeyError(f"columns not in the table: {missing}")
+
+        frame = pd.DataFrame(frame)
+        geometry = [c for c in frame.columns if c == "geometry" or c == ".geo"]
+        bands = [c for c in frame.columns if c not in properties and c not in geometry]
+
+        os.makedirs(path, exist_ok=True)
+        columns = {}
+        for i, name in enumerate(properties + bands):
+            values = frame[name]
+            entry = {"file": f"c{i}.npy"}
+            if not (pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values)):
+                categorical = pd.Categorical(values)
+                entry["categories"] = categorical.categories.tolist()
+                array = categorical.codes.astype(np.int32)
+            else:
+                array = values.to_numpy()
+            entry["dtype"] = array.dtype.str
+            np.save(os.path.join(path, entry["file"]), array, allow_pickle=False)
+            columns[name] = entry
+
+        schema = {
+            "length": len(frame),
+            "class_property": class_property,
+            "properties": properties,
+            "bands": bands,
+            "columns": columns,
+        }
+        with open(os.path.join(path, SCHEMA_FILE), "w") as f:
+            json.dump(schema, f, indent=2)
+        return cls(path)
+
+    @classmethod
+    def from_file(
+        cls,
+        datafile: str,
+        path: str,
+        class_property: ColumnName = None,
+        properties: Sequence[ColumnName] = None,
+    ) -> "SampleStore":
+        """converts an exported sample table, csv or any format geopandas reads"""
+        if datafile.lower().endswith(".csv"):
+            frame = pd.read_csv(datafile)
+            frame = frame.drop(columns=["system:index"], errors="ignore")
+        else:
+            import geopandas as gpd
+
+            frame = gpd.read_file(datafile)
+        return cls.from_frame(frame, path, class_property, properties)
+
+    def __len__(self) -> int:
+        return self.schema["length"]
+
+    def __repr__(self) -> str:
+        return f"SampleStore({self.path!r}, rows={len(self)}, columns={len(self.columns)})"
+
+    @property
+    def columns(self) -> List[ColumnName]:
+        return list(self.schema["columns"])
+
+    @property
+    def class_property(self) -> ColumnName:
+        return self.schema["class_property"]
+
+    @property
+    def properties(self) -> List[ColumnName]:
+        return list(self.schema["properties"])
+
+    @property
+    def bands(self) -> List[ColumnName]:
+        return list(self.schema["bands"])
+
+    def categories(self, name: ColumnName) -> List[Any]:
+        """categories of a categorical column, None for numeric columns"""
+        return self._entry(name).get("categories")
+
+    def column(self, name: ColumnName) -> np.ndarray:
+        """the stored column as a read only memory map, codes for categorical columns"""
+        if name not in self._columns:
+            entry = self._entry(name)
+            self._columns[name] = np.load(
+                os.path.join(self.path, entry["file"]), mmap_mode="r", allow_pickle=False
+            )
+        return self._columns[name]
+
+    def rows(self, classes: Sequence[Any] = None) -> Union[slice, np.ndarray]:
+        """indices of the samples whose class property is in classes, only the
+        class column is read"""
+        if classes is None:
+            return slice(None)
+        if self.class_property is None:
+            raise ValueError("the store has no class property")
+        values = self.column(self.class_property)
+        categories = self.categories(self.class_property)
+        if categories is not None:
+            lookup = {c: i for i, c in enumerate(categories)}
+            classes = [lookup[c] for c in classes if c in lookup]
+        return np.flatnonzero(np.isin(values, classes))
+
+    def read(self, columns: Sequence[ColumnName] = None, classes: Sequence[Any] = None) -> pd.DataFrame:
+        """reads columns (all by default) of the samples in classes into a frame,
+        categorical columns are decoded to pandas Categoricals"""
+        columns = self.columns if columns is None else list(columns)
+        rows = self.rows(classes)
+        data = {}
+        for name in columns:
+            values = np.asarray(self.column(name)[rows])
+            categories = self.categories(name)
+            if categories is not None:
+                values = pd.Categorical.from_codes(values, categories=categories)
+            data[name] = values
+        return pd.DataFrame(data, columns=columns)
+
+    def arrays(self, bands: Sequence[ColumnName] = None, classes: Sequence[Any] = None):
+        """(features, labels) for training, features is (samples, bands) and
+        labels are the class property values"""
+        bands = self.bands if bands is None else list(bands)
+        rows = self.rows(classes)
+        features = np.column_stack([self.column(b)[rows] for b in bands]) if bands else None
+        labels = None
+        if self.class_property is not None:
+            labels = np.asarray(self.column(self.class_property)[rows])
+            categories = self.categories(self.class_property)
+            if categories is not None:
+                labels = np.asarray(pd.Categorical.from_codes(labels, categories=categories))
+        return features, labels
+
+    def _entry(self, name: ColumnName) -> Dict[str, Any]:
+        try:
+            return self.schema["columns"][name]
+        except KeyError:
+            raise KeyError(f"no column {name!r} in the store") from None
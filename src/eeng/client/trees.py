@@ -0,0 +1,143 @@
+"""Decision tree strings for ee.Classifier.decisionTreeEnsemble.
+
+A forest trained with eeng.client.forest is written out as one string per tree
+so the server classifies with a fixed model instead of training a
+smileRandomForest in every request. Each string lists the nodes in the rpart
+layout Earth Engine reads, one node per line, indented by depth:
+
+    1) root 120 48 2
+      2) NDVI<=0.31 50 5 1 *
+      3) NDVI>0.31 70 19 2
+        6) VV<=-14.2 40 3 3 *
+        7) VV>-14.2 30 5 2 *
+
+The fields are the node id (children of n are 2n and 2n+1), the split, the
+number of bootstrap samples, the misclassified samples and the class value,
+leaves end with " *". Trees are stored as a csv with one tree per row and the
+newlines replaced by "#", the same table can be uploaded as an asset.
+"""
+import re
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ..server.models import LINE_SEPARATOR, TREE_COLUMN
+
+ColumnName = str
+TreeString = str
+
+_NODE = re.compile(r"^(\d+)\) (\S+) (\S+) (\S+) (\S+)( \*)?$")
+_SPLIT = re.compile(r"^(.+?)(<=|>)(\S+)$")
+
+
+def tree_to_string(estimator, feature_names: Sequence[ColumnName], class_values: Sequence[Any]) -> TreeString:
+    """writes a fitted sklearn DecisionTreeClassifier, class_values are the
+    numeric class values of the estimator's classes in order"""
+    tree = estimator.tree_
+    lines = []
+    # (sklearn node, node id, depth, split)
+    stack = [(0, 1, 0, "root")]
+    while stack:
+        node, node_id, depth, split = stack.pop()
+        n = tree.weighted_n_node_samples[node]
+        fractions = tree.value[node][0] / tree.value[node][0].sum()
+        best = int(np.argmax(fractions))
+        loss = n * (1 - fractions[best])
+        left, right = tree.children_left[node], tree.children_right[node]
+        leaf = left == -1
+        lines.append(
+            f"{'  ' * depth}{node_id}) {split} {n:.0f} {loss:.0f} {class_values[best]}{' *' if leaf else ''}"
+        )
+        if not leaf:
+            feature = feature_names[tree.feature[node]]
+            threshold = repr(float(tree.threshold[node]))
+            # right is pushed first so the left subtree is written first
+            stack.append((right, 2 * node_id + 1, depth + 1, f"{feature}>{threshold}"))
+            stack.append((left, 2 * node_id, depth + 1, f"{feature}<={threshold}"))
+    return "\n".join(lines)
+
+
+def forest_to_strings(
+    forest, feature_names: Sequence[ColumnName], lookup: Dict[Any, Any] = None
+) -> List[TreeString]:
+    """one string per tree of a fitted sklearn forest. lookup maps the class
+    labels to the numeric values the server uses, e.g. the lookup of
+    TrainingPoints.fetchLookup, numeric labels are used as they are"""
+    classes = forest.classes_
+    if lookup is not None:
+        class_values = [lookup[c] for c in classes]
+    elif np.issubdtype(np.asarray(classes).dtype, np.number):
+        class_values = list(classes)
+    else:
+        raise ValueError("class labels are not numeric, give a lookup of label -> value")
+    class_values = [v.item() if isinstance(v, np.generic) else v for v in class_values]
+    return [tree_to_string(e, feature_names, class_values) for e in forest.estimators_]
+
+
+def save_trees(trees: Sequence[TreeString], path: str) -> None:
+    """writes the trees as a csv table with one tree per row"""
+    rows = [t.replace("\n", LINE_SEPARATOR) for t in trees]
+    pd.DataFrame({TREE_COLUMN: rows}).to_csv(path, index=False)
+
+
+def load_trees(path: str) -> List[TreeString]:
+    rows = pd.read_csv(path)[TREE_COLUMN]
+    return [t.replace(LINE_SEPARATOR, "\n") for t in rows]
+
+
+class ParsedTree:
+    """Node arrays of a tree string, used to predict offline"""
+
+    def __init__(self, tree: TreeString, feature_names: Sequence[ColumnName]) -> None:
+        index = {name: i for i, name in enumerate(feature_names)}
+        nodes = {}
+        for line in tree.strip().splitlines():
+            match = _NODE.match(line.strip())
+            if match is None:
+                raise ValueError(f"not a tree node: {line!r}")
+            node_id, split, _, _, value, leaf = match.groups()
+            nodes[int(node_id)] = (split, float(value), leaf is not None)
+
+        ids = sorted(nodes)
+        self._position = {node_id: i for i, node_id in enumerate(ids)}
+        self.value = np.array([nodes[i][1] for i in ids])
+        self.leaf = np.array([nodes[i][2] for i in ids])
+        self.feature = np.full(len(ids), -1)
+        self.threshold = np.full(len(ids), np.nan)
+        self.left = np.full(len(ids), -1)
+        self.right = np.full(len(ids), -1)
+        for i, node_id in enumerate(ids):
+            if nodes[node_id][2]:
+                continue
+            split = _SPLIT.match(nodes[2 * node_id][0])
+            self.feature[i] = index[split.group(1)]
+            self.threshold[i] = float(split.group(3))
+            self.left[i] = self._position[2 * node_id]
+            self.right[i] = self._position[2 * node_id + 1]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=float)
+        node = np.full(len(X), self._position[1])
+        active = np.flatnonzero(~self.leaf[node])
+        while len(active):
+            current = node[active]
+            go_left = X[active, self.feature[current]] <= self.threshold[current]
+            node[active] = np.where(go_left, self.left[current], self.right[current])
+            active = active[~self.leaf[node[active]]]
+        return self.value[node]
+
+
+def predict_trees(trees: Sequence[TreeString], feature_names: Sequence[ColumnName], X: np.ndarray) -> np.ndarray:
+    """majority vote of the trees, ties go to the smallest class value.
+
+    This is a hard vote over the class of every tree, like
+    ee.Classifier.decisionTreeEnsemble. sklearn's RandomForestClassifier.predict
+    averages the class probabilities of the leaves instead, so the two differ
+    where leaves are impure (min_leaf_pop > 1 or max_nodes set)"""
+    votes = np.column_stack([ParsedTree(t, feature_names).predict(X) for t in trees])
+    classes, codes = np.unique(votes, return_inverse=True)
+    k = len(classes)
+    flat = codes.reshape(votes.shape) + (np.arange(len(votes)) * k)[:, None]
+    counts = np.bincount(flat.ravel(), minlength=len(votes) * k).reshape(-1, k)
+    return classes[np.argmax(counts, axis=1)]
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any
+
+CacheKey = str
+
+# returned by ResultCache.get when there is no usable entry for a key
+MISSING = object()
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".eeng", "cache.sqlite")
+
+
+def graph_key(obj: Any) -> CacheKey:
+    """content address of a computed object, the sha256 of its serialized graph"""
+    if hasattr(obj, "serialize"):
+        serialized = obj.serialize()
+    else:
+        serialized = json.dumps(obj, sort_keys=True, default=repr)
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+class ResultCache:
+    """Persistent cache of computed Earth Engine results, stored in sqlite and
+    keyed by the hash of the serialized graph that produced them.
+
+    Entries older than ttl seconds are treated as misses. When max_entries or
+    max_bytes is exceeded, the least recently used entries are evicted.
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        ttl: float = None,
+        max_entries: int = None,
+        max_bytes: int = None,
+    ) -> None:
+        self.path = DEFAULT_CACHE_PATH if path is None else path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed INTEGER NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def __repr__(self) -> str:
+        return f"ResultCache(path={self.path!r}, ttl={self.ttl}, max_entries={self.max_entries}, max_bytes={self.max_bytes})"
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def __contains__(self, key: CacheKey) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created FROM results WHERE key = ?", (key,)
+            ).fetchone()
+        return row is not None and not self._expired(row[0])
+
+    @property
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self)}
+
+    def get(self, key: CacheKey) -> Any:
+        """returns the cached value or MISSING"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or self._expired(row[1]):
+                if row is not None:
+                    self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return MISSING
+
+            self._conn.execute(
+                "UPDATE results SET accessed = ? WHERE key = ?", (time.time_ns(), key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: CacheKey, value: Any) -> None:
+        """stores a json serializable value and evicts entries over the limits"""
+        payload = json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), time.time(), time.time_ns()),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def _evict(self) -> None:
+        if self.ttl is not None:
+            self._conn.execute(
+                "DELETE FROM results WHERE created < ?", (time.time() - self.ttl,)
+            )
+
+        if self.max_entries is not None:
+            self._conn.execute(
+                """DELETE FROM results WHERE key IN (
+                    SELECT key FROM results ORDER BY accessed DESC LIMIT -1 OFFSET ?
+                )""",
+                (self.max_entries,),
+            )
+
+        if self.max_bytes is not None:
+            total = 0
+            stale = []
+            rows = self._conn.execute(
+                "SELECT key, size FROM results ORDER BY accessed DESC"
+            )
+            for key, size in rows.fetchall():
+                total += size
+                if total > self.max_bytes:
+                    stale.append((key,))
+            self._conn.executemany("DELETE FROM results WHERE key = ?", stale)
@@ -1,12 +1,21 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, List
 import ee
 
+from .graph import instrument
+
 
 BandName = str
 
+TASSEL_CAP_COEFFICIENTS = [
+    [0.3037, 0.2793, 0.4743, 0.5585, 0.5082, 0.1863],
+    [-0.2848, -0.2435, -0.5436, 0.7243, 0.0840, -0.1800],
+    [0.1509, 0.1973, 0.3279, 0.3406, -0.7112, -0.4572],
+]
+
 
 class Calculator(ABC):
+    @instrument()
     def __call__(self, image: ee.Image) -> ee.Image:
         return image.addBands(self.calc(image))
 
@@ -16,10 +25,10 @@ class Calculator(ABC):
 
 
 class Ratio(Calculator):
-    def __init__(self):
-        self.numerator: BandName = "VV"
-        self.demoninator: BandName = "VH"
-        self.name: str = "VV/VH"
+    def __init__(self, numerator: BandName = None, denominator: BandName = None, name: str = None):
+        self.numerator: BandName = "VV" if numerator is None else numerator
+        self.demoninator: BandName = "VH" if denominator is None else denominator
+        self.name: str = f"{self.numerator}/{self.demoninator}" if name is None else name
 
     def __call__(self, image: ee.Image) -> ee.Image:
         return super().__call__(image)
@@ -83,13 +92,7 @@ class TasselCap(Calculator):
 
     def calc(self, image: ee.Image) -> ee.Image:
         image = image.select(list(self.__dict__.values()))
-        co_array = [
-            [0.3037, 0.2793, 0.4743, 0.5585, 0.5082, 0.1863],
-            [-0.2848, -0.2435, -0.5436, 0.7243, 0.0840, -0.1800],
-            [0.1509, 0.1973, 0.3279, 0.3406, -0.7112, -0.4572],
-        ]
-
-        co = ee.Array(co_array)
+        co = ee.Array(TASSEL_CAP_COEFFICIENTS)
 
         arrayImage1D = image.toArray()
         arrayImage2D = arrayImage1D.toArray(1)
@@ -102,3 +105,30 @@ class TasselCap(Calculator):
         )
 
         return components_image
+
+
+class CalculatorChain(Calculator):
+    """Merges any number of calculators into a single calculator. Every
+    calculator reads from the input image and all of the outputs are added in
+    one addBands call, so a collection only needs to be mapped once."""
+
+    def __init__(self, *calculators: Calculator) -> None:
+        self.calculators: List[Calculator] = []
+        for calculator in calculators:
+            if not isinstance(calculator, Calculator):
+                raise TypeError("calculators must be subclasses of Calculator")
+            if isinstance(calculator, CalculatorChain):
+                self.calculators.extend(calculator.calculators)
+            else:
+                self.calculators.append(calculator)
+
+    def __repr__(self) -> str:
+        return f"CalculatorChain({', '.join(map(repr, self.calculators))})"
+
+    def __len__(self) -> int:
+        return len(self.calculators)
+
+    def calc(self, image: ee.Image) -> ee.Image:
+        if not self.calculators:
+            raise ValueError("CalculatorChain has no calculators")
+        return ee.Image.cat(*[c.calc(image) for c in self.calculators])
@@ -2,32 +2,44 @@
 # Purpose: Collection of functions that are used by the server. 
 # That are to be bounded to either the base class of ee.ImageCollection or ee.FeatureCollection 
 
-from math import pi
 import ee
 
+from .calc import Calculator, CalculatorChain
+from .collections import CollectionQuery, ImageCollectionIDs
+from .fetch import get_info
+from .graph import instrument
+from .sampling import auto_tile_scale
+from .tsm.fourier import harmonic_bands, harmonic_terms, time_band
+
+IDS = ImageCollectionIDs()
+
 # image collection factory functions
 @classmethod
+@instrument()
 def sentinel2SR(cls, start, end, aoi, cloud_px_percent: int = 10):
     """ """
-    instance = cls("COPERNICUS/S2_SR").filterBounds(aoi).filterDate(start, end).filter(ee.Filter.lt("CLOUDY_PIXEL_PERCENTAGE", cloud_px_percent))
-    return instance
+    query = CollectionQuery(IDS.s2_sr, start, end, aoi, cloud_cover=cloud_px_percent)
+    return query.build(cls(query.dataset))
 
 
 @classmethod
+@instrument()
 def sentinel2TOA(cls, start, end, aoi, cloud_px_percent: int = 10):
     """ """
-    instance = cls("COPERNICUS/S2").filterBounds(aoi).filterDate(start, end).filter(ee.Filter.lt("CLOUDY_PIXEL_PERCENTAGE", cloud_px_percent))
-    return instance
+    query = CollectionQuery(IDS.s2, start, end, aoi, cloud_cover=cloud_px_percent)
+    return query.build(cls(query.dataset))
 
 
 @classmethod
+@instrument()
 def sentinel2CloudProbability(cls, start, end, aoi):
     """ """
-    instance = cls("COPERNICUS/S2_CLOUD_PROBABILITY").filterBounds(aoi).filterDate(start, end)
-    return instance
+    query = CollectionQuery(IDS.s2_cloud_prob, start, end, aoi)
+    return query.build(cls(query.dataset))
 
 
 @classmethod
+@instrument()
 def sentinel2Cloudless(cls, s2_col, s2_prob):
     join = ee.Join.saveFirst('s2cloudless').apply(**{
         'primary': s2_col,
@@ -42,25 +54,31 @@ def sentinel2Cloudless(cls, s2_col, s2_prob):
 
 
 @classmethod
+@instrument()
 def sentinel1DV(cls, start, end, aoi):
-    instance = cls("COPERNICUS/S1_GRD").filterBounds(aoi).filterDate(start, end).filter(ee.Filter([
-        ee.Filter.listContains('transmitterReceiverPolarisation', 'VV'),
-        ee.Filter.listContains('transmitterReceiverPolarisation', 'VH')
-    ]))
-    return instance.select("VV", "VH")
+    query = CollectionQuery(IDS.s1, start, end, aoi, polarisations=("VV", "VH"))
+    return query.build(cls(query.dataset)).select("VV", "VH")
 
 @classmethod
+@instrument()
 def alos(cls, start, end, aoi):
-    instance = cls("JAXA/ALOS/PALSAR/YEARLY/SAR").filterBounds(aoi).filterDate(start, end)
-    return instance.select("HH", "HV")
+    query = CollectionQuery(IDS.alos, start, end, aoi)
+    return query.build(cls(query.dataset)).select("HH", "HV")
 
 # funtions that are to bound to the image collection
 def denoise(self, filter: callable):
     return self.map(filter)
 
 
-def addCalculator(self, calc: callable):
-    return self.map(calc)
+def addCalculator(self, *calcs: callable):
+    """ maps the calculators over the collection. Calculator instances are merged
+    into one CalculatorChain so every output band is added in a single pass"""
+    if len(calcs) > 1 and all(isinstance(c, Calculator) for c in calcs):
+        return self.map(CalculatorChain(*calcs))
+    col = self
+    for calc in calcs:
+        col = col.map(calc)
+    return col
 
 
 def add_cloud_mask(self, cloud_mask: callable):
@@ -79,27 +97,25 @@ def addConstant(self):
 
 def addTime(self, omega: float = 1.0):
     def _addTime(image: ee.Image):
-        date = ee.Date(image.get("system:time_start"))
-        years = date.difference(ee.Date("1970-01-01"), "year")
-        time_radians = ee.Image(years.multiply(2 * pi * omega).rename("t"))
-        return image.addBands(time_radians.float())
+        return image.addBands(time_band(image, omega))
     return self.map(_addTime)
 
 
 def addHarmonics(self, cycles: int = 3):
-    sin = [f"cos_{i}" for i in range(1, cycles + 1)]
-    cos = [f"sin_{i}" for i in range(1, cycles + 1)]
-
     def _addHarmonics(image: ee.Image):
-        frequencies = ee.Image.constant(cycles)
-        time = ee.Image(image).select("t")
-        cosines = time.multiply(frequencies).cos().rename(cos)
-        sines = time.multiply(frequencies).sin().rename(sin)
-        return image.addBands(cosines).addBands(sines)
+        return image.addBands(harmonic_bands(ee.Image(image).select("t"), cycles))
 
     return self.map(_addHarmonics)
 
 
+def addHarmonicTerms(self, cycles: int = 3, omega: float = 1.0):
+    """adds the constant, t and harmonic bands in a single map"""
+    def _addHarmonicTerms(image: ee.Image):
+        return harmonic_terms(image, cycles, omega)
+
+    return self.map(_addHarmonicTerms)
+
+
 # Feature Collection bounding methods
 ColumnName = str
 
@@ -124,14 +140,42 @@ def add_y_coordinate(self, y: ColumnName = None):
     return self.map(_add_y_col)
 
 
-def generate_samples(self, image: ee.Image, props: list[ColumnName] = None, scale: int = 10, tileScale: int = 16) -> ee.FeatureCollection:
-    """ generates samples from the image. It is a geometry less feature collection"""
+def generate_samples(
+    self,
+    image: ee.Image,
+    props: list[ColumnName] = None,
+    scale: int = 10,
+    tileScale: int = 16,
+    bands: list[str] = None,
+    geometries: bool = False,
+    n_points: int = None,
+) -> ee.FeatureCollection:
+    """ generates samples from the image. It is a geometry less feature collection unless geometries is True.
+
+    Only the bands listed in bands are sampled and the points are pruned to props
+    before sampling. tileScale=None picks the tileScale from the number of bands
+    and points, n_points saves the round trip that counts them.
+    """
     props = [] if props is None else props
+    if bands is not None:
+        image = image.select(bands)
+    if tileScale is None:
+        counts = {}
+        if bands is None:
+            counts["bands"] = image.bandNames().size()
+        if n_points is None:
+            counts["points"] = self.size()
+        counts = get_info(counts) if counts else {}
+        tileScale = auto_tile_scale(
+            len(bands) if bands is not None else counts["bands"],
+            n_points if n_points is not None else counts["points"],
+        )
     sample = image.sampleRegions(
-        collection=self,
-        scale=10,
+        collection=self.select(props),
+        scale=scale,
         properties=props,
-        tileScale=16,
+        tileScale=tileScale,
+        geometries=geometries,
     )
     return sample
 
@@ -4,6 +4,7 @@ from typing import List, Dict, Union
 from abc import ABC, abstractmethod
 
 from eeng.server.models import RandomForestClassifier
+from eeng.server.graph import instrument
 
 
 TrainingData = ee.FeatureCollection
@@ -27,6 +28,7 @@ class RandomForestClassification:
         )
         return self
 
+    @instrument()
     def apply(
         self, X: Union[ee.Image, ee.FeatureCollection]
     ) -> Union[ee.Image, ee.FeatureCollection]:
@@ -15,7 +15,7 @@ class S2CloudMasks:
         self._qa_band = 'QA60'
 
     def __call__(self, image: ee.Image) -> ee.Image:
-        return image.updateMask(self.apply)
+        return image.updateMask(self.apply(image))
 
     def apply(self, image: ee.Image) -> ee.Image:
         qa = image.select(self._qa_band)
@@ -31,15 +31,25 @@ class S2CloudMasks:
         return mask
 
 class S2CloudlessAlgorithm:
-    """Constructs the S2 Cloudless Masking algorithm."""
-    def __init__(self, cloud_prb_thresh: int = 50, nir_drk_thresh: float = 0.15, cld_prj_dist: float = 1.0, sr_band_scale: float = 1e4, buffer: int = 50):
+    """Constructs the S2 Cloudless Masking algorithm.
+
+    With lean=True the mask is computed from the SCL, B8 and probability bands
+    only: the shadow projection and the focal operations run in a single
+    reprojection at mask_scale and the mask is applied to the reflectance bands
+    without adding the intermediate bands to the image.
+    """
+    def __init__(self, cloud_prb_thresh: int = 50, nir_drk_thresh: float = 0.15, cld_prj_dist: float = 1.0, sr_band_scale: float = 1e4, buffer: int = 50, lean: bool = False, mask_scale: int = 20):
         self.cloud_prb_thresh = cloud_prb_thresh
         self.nir_drk_thresh = nir_drk_thresh
         self.cld_prj_dist = cld_prj_dist
         self.sr_band_scale = sr_band_scale
         self.buffer = buffer
+        self.lean = lean
+        self.mask_scale = mask_scale
 
     def __call__(self, image: ee.Image) -> Any:
+        if self.lean:
+            return image.select("B.*").updateMask(self.apply(image))
         img_cloud = self.add_cloud_bands()(image)
         img_cloud_shadow = self.add_shadow_bands()(img_cloud)
         img_cloud_shadow_mask = self.add_cld_shadow_mask()(img_cloud_shadow)
@@ -116,3 +126,32 @@ class S2CloudlessAlgorithm:
             return img.select("B.*").updateMask(not_cld_shdw)
 
         return wrapper
+
+    @property
+    def projection_distance(self) -> float:
+        """cld_prj_dist in km as pixels at mask_scale"""
+        return self.cld_prj_dist * 1000 / self.mask_scale
+
+    def cloud_shadow_mask(self, img: S2Image) -> ee.Image:
+        """1 where the pixel is cloud or cloud shadow, computed at mask_scale"""
+        probability = ee.Image(img.get("s2cloudless")).select("probability")
+        clouds = probability.gt(self.cloud_prb_thresh)
+
+        # dark NIR pixels that are not water (SCL 6) are potential shadows
+        nir = img.select("B8")
+        dark_pixels = nir.lt(self.nir_drk_thresh * self.sr_band_scale).And(img.select("SCL").neq(6))
+
+        shadow_azimuth = ee.Number(90).subtract(ee.Number(img.get("MEAN_SOLAR_AZIMUTH_ANGLE")))
+        cld_proj = clouds.directionalDistanceTransform(shadow_azimuth, self.projection_distance).select("distance").mask()
+
+        return (
+            clouds.Or(cld_proj.And(dark_pixels))
+            .focalMin(2)
+            .focalMax(self.buffer * 2 / self.mask_scale)
+            .reproject(crs=nir.projection(), scale=self.mask_scale)
+            .rename("cloudmask")
+        )
+
+    def apply(self, image: ee.Image) -> ee.Image:
+        """1 where the pixel is clear"""
+        return self.cloud_shadow_mask(image).Not()
@@ -1,10 +1,20 @@
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass, field
+from typing import Any, List, Tuple
 
 import ee
 
+from .cache import graph_key
+from .graph import instrument
+
 
 CollectionID = str
 
+# number of built collections CollectionQuery keeps for reuse
+QUERY_CACHE_SIZE = 256
+
+
 @dataclass(frozen=True)
 class ImageCollectionIDs:
     """ Contains the image collection ids for the different data sources """
@@ -15,6 +25,94 @@ class ImageCollectionIDs:
     alos: CollectionID = field(default="JAXA/ALOS/PALSAR/YEARLY/SAR")
 
 
+@dataclass(frozen=True)
+class CollectionQuery:
+    """Declarative image collection query.
+
+    Every constraint becomes one ee.Filter and all of them are merged into a
+    single ee.Filter.And, always in the same order: bounds, date, then the
+    property filters (polarisations, instrument mode, orbit pass, cloud cover)
+    and finally any extra filters. Identical queries built within a process
+    return the same collection object.
+    """
+
+    dataset: CollectionID
+    start: Any = None
+    end: Any = None
+    aoi: ee.Geometry = None
+    polarisations: Tuple[str, ...] = ()
+    mode: str = None
+    orbit_pass: str = None
+    cloud_cover: float = None
+    cloud_property: str = "CLOUDY_PIXEL_PERCENTAGE"
+    filters: Tuple[ee.Filter, ...] = ()
+
+    def __post_init__(self):
+        # lists are accepted for convenience but the query must stay hashable
+        object.__setattr__(self, "polarisations", tuple(self.polarisations))
+        object.__setattr__(self, "filters", tuple(self.filters))
+
+    def key(self) -> tuple:
+        """hashable identity of the query, earth engine objects are keyed by
+        their serialized graph"""
+        return tuple(_freeze(getattr(self, f)) for f in self.__dataclass_fields__)
+
+    def filter_list(self) -> List[ee.Filter]:
+        filters = []
+        if self.aoi is not None:
+            filters.append(ee.Filter.bounds(self.aoi))
+        if self.start is not None or self.end is not None:
+            filters.append(ee.Filter.date(self.start, self.end))
+        for polarisation in self.polarisations:
+            filters.append(ee.Filter.listContains("transmitterReceiverPolarisation", polarisation))
+        if self.mode is not None:
+            filters.append(ee.Filter.eq("instrumentMode", self.mode))
+        if self.orbit_pass is not None:
+            filters.append(ee.Filter.eq("orbitProperties_pass", self.orbit_pass))
+        if self.cloud_cover is not None:
+            filters.append(ee.Filter.lt(self.cloud_property, self.cloud_cover))
+        filters.extend(self.filters)
+        return filters
+
+    def filter(self) -> ee.Filter:
+        """all constraints as one filter, None when there are none"""
+        filters = self.filter_list()
+        if not filters:
+            return None
+        return filters[0] if len(filters) == 1 else ee.Filter.And(*filters)
+
+    def build(self, collection: ee.ImageCollection = None) -> ee.ImageCollection:
+        """filters collection, by default ee.ImageCollection(dataset), in one
+        filter call. The type of collection is kept, so subclasses like
+        Sentinel1 come back as Sentinel1"""
+        collection = ee.ImageCollection(self.dataset) if collection is None else collection
+        key = (type(collection), graph_key(collection), self.key())
+        with _QUERY_LOCK:
+            if key in _QUERY_CACHE:
+                _QUERY_CACHE.move_to_end(key)
+                return _QUERY_CACHE[key]
+
+        combined = self.filter()
+        result = collection if combined is None else collection.filter(combined)
+        with _QUERY_LOCK:
+            _QUERY_CACHE[key] = result
+            while len(_QUERY_CACHE) > QUERY_CACHE_SIZE:
+                _QUERY_CACHE.popitem(last=False)
+        return result
+
+
+_QUERY_CACHE: "OrderedDict[tuple, ee.ImageCollection]" = OrderedDict()
+_QUERY_LOCK = threading.Lock()
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, ee.ComputedObject):
+        return graph_key(value)
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
 class ImageCollectionCreator:
     def __init__(self, collection_id: CollectionID, start, end, aoi) -> None:
         self.collection_id = collection_id
@@ -22,8 +120,9 @@ class ImageCollectionCreator:
         self.end = end
         self.aoi = aoi
 
+    @instrument()
     def get_collection(self, filter_function: ee.Filter) -> ee.ImageCollection:
-        date_filter = ee.Filter.date(self.start, self.end)
-        combo_filter = ee.Filter.And(date_filter, filter_function)
-        collection = ee.ImageCollection(self.collection_id).filterBounds(self.aoi).filter(combo_filter)
-        return collection
+        query = CollectionQuery(
+            self.collection_id, self.start, self.end, self.aoi, filters=(filter_function,)
+        )
+        return query.build()
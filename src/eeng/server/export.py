@@ -0,0 +1,270 @@
+import itertools
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Union
+
+import ee
+
+TaskId = str
+JobName = str
+
+# terminal states reported by the task backends, these match ee.batch.Task.State
+COMPLETED = "COMPLETED"
+FAILED = "FAILED"
+CANCELLED = "CANCELLED"
+# states used by the scheduler for jobs that are not in flight
+PENDING = "PENDING"
+RUNNING = "RUNNING"
+
+# messages of Earth Engine refusing a task because the account is at its limit
+TASK_LIMIT_MESSAGES = ("too many tasks", "task limit")
+
+
+class TaskLimitError(Exception):
+    """The backend refused to start a task because too many are queued. The
+    job was not started, so the scheduler waits and does not count an attempt"""
+
+
+@dataclass
+class ExportJob:
+    """An export of an image or table. The name is used as the task description
+    and identifies the job when a scheduler resumes from its state file.
+
+    destination is one of "drive", "asset" or "cloud", options are passed to the
+    matching ee.batch.Export function (folder, assetId, bucket, scale, ...).
+    """
+
+    name: JobName
+    obj: Union[ee.Image, ee.FeatureCollection]
+    region: ee.Geometry = None
+    destination: str = "drive"
+    options: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class JobState:
+    """Progress of a job, persisted by the scheduler"""
+
+    name: JobName
+    status: str = PENDING
+    attempts: int = 0
+    task_id: TaskId = None
+    error: str = None
+
+
+class TaskBackend(ABC):
+    """Starts export tasks and reports their state"""
+
+    @abstractmethod
+    def start(self, job: ExportJob) -> TaskId:
+        raise NotImplementedError
+
+    @abstractmethod
+    def status(self, task_id: TaskId) -> str:
+        raise NotImplementedError
+
+
+class EarthEngineTaskBackend(TaskBackend):
+    """Runs the jobs as Earth Engine batch tasks"""
+
+    _IMAGE_EXPORTS = {
+        "drive": ee.batch.Export.image.toDrive,
+        "asset": ee.batch.Export.image.toAsset,
+        "cloud": ee.batch.Export.image.toCloudStorage,
+    }
+
+    _TABLE_EXPORTS = {
+        "drive": ee.batch.Export.table.toDrive,
+        "asset": ee.batch.Export.table.toAsset,
+        "cloud": ee.batch.Export.table.toCloudStorage,
+    }
+
+    def start(self, job: ExportJob) -> TaskId:
+        if job.destination not in self._IMAGE_EXPORTS:
+            raise ValueError(f"unknown destination: {job.destination}")
+
+        if isinstance(job.obj, ee.Image):
+            options = dict(job.options)
+            if job.region is not None:
+                options.setdefault("region", job.region)
+            task = self._IMAGE_EXPORTS[job.destination](
+                image=job.obj, description=job.name, **options
+            )
+        else:
+            collection = ee.FeatureCollection(job.obj)
+            if job.region is not None:
+                collection = collection.filterBounds(job.region)
+            task = self._TABLE_EXPORTS[job.destination](
+                collection=collection, description=job.name, **job.options
+            )
+        try:
+            task.start()
+        except ee.EEException as e:
+            if any(m in str(e).lower() for m in TASK_LIMIT_MESSAGES):
+                raise TaskLimitError(str(e)) from e
+            raise
+        return task.id
+
+    def status(self, task_id: TaskId) -> str:
+        return ee.data.getTaskStatus(task_id)[0]["state"]
+
+
+class FakeTaskBackend(TaskBackend):
+    """In memory backend for tests. Each task runs for `polls` status calls and
+    then finishes with the next outcome listed for its job, COMPLETED by default.
+    """
+
+    def __init__(self, outcomes: Dict[JobName, List[str]] = None, polls: int = 1) -> None:
+        self.outcomes = {k: list(v) for k, v in (outcomes or {}).items()}
+        self.polls = polls
+        self.started: List[JobName] = []
+        self.max_in_flight = 0
+        self._tasks: Dict[TaskId, dict] = {}
+        self._ids = itertools.count()
+
+    @property
+    def in_flight(self) -> int:
+        return sum(1 for task in self._tasks.values() if task["state"] == RUNNING)
+
+    def start(self, job: ExportJob) -> TaskId:
+        task_id = f"task_{next(self._ids)}"
+        outcomes = self.outcomes.get(job.name, [])
+        outcome = outcomes.pop(0) if outcomes else COMPLETED
+        self._tasks[task_id] = {"state": RUNNING, "polls": 0, "outcome": outcome}
+        self.started.append(job.name)
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        return task_id
+
+    def status(self, task_id: TaskId) -> str:
+        task = self._tasks[task_id]
+        task["polls"] += 1
+        if task["state"] == RUNNING and task["polls"] >= self.polls:
+            task["state"] = task["outcome"]
+        return task["state"]
+
+
+class ExportScheduler:
+    """Runs export jobs with at most max_concurrent tasks in flight.
+
+    Task states are polled with exponential backoff while nothing changes,
+    failed tasks are restarted up to max_retries times. A start refused with
+    TaskLimitError is retried after the backoff without counting an attempt.
+    When state_path is set the progress of every job is written there after
+    each change, so a run that crashed can be resumed by calling run again
+    with the same jobs.
+    """
+
+    def __init__(
+        self,
+        backend: TaskBackend = None,
+        max_concurrent: int = 10,
+        max_retries: int = 2,
+        poll_interval: float = 10.0,
+        max_poll_interval: float = 120.0,
+        backoff: float = 2.0,
+        state_path: str = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be a positive integer")
+        self.backend = EarthEngineTaskBackend() if backend is None else backend
+        self.max_concurrent = max_concurrent
+        self.max_retries = max_retries
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.backoff = backoff
+        self.state_path = state_path
+        self.sleep = sleep
+        self.states: Dict[JobName, JobState] = {}
+
+    def run(self, jobs: List[ExportJob]) -> Dict[JobName, JobState]:
+        """runs the jobs until every one has completed or run out of retries"""
+        names = [job.name for job in jobs]
+        if len(set(names)) != len(names):
+            raise ValueError("job names must be unique")
+
+        by_name = {job.name: job for job in jobs}
+        saved = self._load()
+        self.states = {name: saved.get(name, JobState(name)) for name in names}
+
+        pending = [n for n in names if self.states[n].status == PENDING]
+        in_flight = [n for n in names if self.states[n].status == RUNNING]
+        interval = self.poll_interval
+
+        while pending or in_flight:
+            while pending and len(in_flight) < self.max_concurrent:
+                name = pending.pop(0)
+                if self._start(by_name[name]):
+                    in_flight.append(name)
+                    continue
+                # the backend refused the task, back off before trying again
+                if self.states[name].status == PENDING:
+                    pending.append(name)
+                break
+
+            changed = False
+            for name in list(in_flight):
+                state = self.states[name]
+                status = self.backend.status(state.task_id)
+                if status == COMPLETED:
+                    state.status = COMPLETED
+                elif status in (FAILED, CANCELLED):
+                    state.error = status
+                    state.status = PENDING if state.attempts <= self.max_retries else FAILED
+                    if state.status == PENDING:
+                        pending.append(name)
+                else:
+                    continue
+                in_flight.remove(name)
+                changed = True
+
+            if changed:
+                self._save()
+                interval = self.poll_interval
+                continue
+
+            if in_flight or pending:
+                self.sleep(interval)
+                interval = min(interval * self.backoff, self.max_poll_interval)
+
+        return self.states
+
+    def _start(self, job: ExportJob) -> bool:
+        state = self.states[job.name]
+        try:
+            state.task_id = self.backend.start(job)
+        except TaskLimitError as e:
+            # throttled, the job stays pending without using up a retry
+            state.error = str(e)
+            self._save()
+            return False
+        except Exception as e:
+            state.attempts += 1
+            state.error = str(e)
+            if state.attempts > self.max_retries:
+                state.status = FAILED
+            self._save()
+            return False
+
+        state.attempts += 1
+        state.status = RUNNING
+        state.error = None
+        self._save()
+        return True
+
+    def _load(self) -> Dict[JobName, JobState]:
+        if self.state_path is None or not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, "r") as f:
+            return {name: JobState(**state) for name, state in json.load(f).items()}
+
+    def _save(self) -> None:
+        if self.state_path is None:
+            return
+        tmp = f"{self.state_path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({name: asdict(s) for name, s in self.states.items()}, f, indent=2)
+        os.replace(tmp, self.state_path)
@@ -0,0 +1,150 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+import ee
+
+from .cache import MISSING, ResultCache, graph_key
+
+Name = str
+ComputedObjects = Dict[Name, ee.ComputedObject]
+Results = Dict[Name, Any]
+
+
+class Transport(ABC):
+    """Evaluates a dictionary of named computed objects in a single round trip"""
+
+    def __init__(self) -> None:
+        self.round_trips = 0
+        self._lock = threading.Lock()
+
+    def evaluate(self, objects: ComputedObjects) -> Results:
+        with self._lock:
+            self.round_trips += 1
+        return self._evaluate(objects)
+
+    @abstractmethod
+    def _evaluate(self, objects: ComputedObjects) -> Results:
+        raise NotImplementedError
+
+
+class EarthEngineTransport(Transport):
+    """Packs the objects into one ee.Dictionary and calls getInfo on it"""
+
+    def _evaluate(self, objects: ComputedObjects) -> Results:
+        return ee.Dictionary(objects).getInfo()
+
+
+class FakeTransport(Transport):
+    """In memory transport that never touches the network. The resolver turns
+    each object into its client side value, every request is recorded."""
+
+    def __init__(self, resolver: Callable[[Any], Any] = None, latency: float = 0.0) -> None:
+        super().__init__()
+        self.resolver = (lambda obj: obj) if resolver is None else resolver
+        self.latency = latency
+        self.requests: List[List[Name]] = []
+
+    def _evaluate(self, objects: ComputedObjects) -> Results:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.requests.append(list(objects))
+        return {name: self.resolver(obj) for name, obj in objects.items()}
+
+
+class BatchFetcher:
+    """Fetches many computed objects with as few round trips as possible.
+
+    Every object is packed into one dictionary and evaluated once. When
+    chunk_size is set, the objects are split into chunks of at most chunk_size
+    objects that are evaluated concurrently on a thread pool. With a cache,
+    objects whose graph has been fetched before are never sent again.
+    """
+
+    def __init__(
+        self,
+        transport: Transport = None,
+        chunk_size: int = None,
+        max_workers: int = 4,
+        cache: ResultCache = None,
+    ) -> None:
+        if chunk_size is not None and chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer")
+        self.transport = EarthEngineTransport() if transport is None else transport
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.cache = cache
+
+    def fetch(self, objects: ComputedObjects) -> Results:
+        """returns the client side value of every object, keyed by name"""
+        results = {}
+        keys = {}
+        if self.cache is not None:
+            keys = {name: graph_key(obj) for name, obj in objects.items()}
+            for name, key in keys.items():
+                value = self.cache.get(key)
+                if value is not MISSING:
+                    results[name] = value
+            objects = {k: v for k, v in objects.items() if k not in results}
+
+        if not objects:
+            return results
+
+        chunks = self._chunk(objects)
+        if len(chunks) == 1:
+            fetched = self.transport.evaluate(chunks[0])
+        else:
+            fetched = {}
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                for chunk in pool.map(self.transport.evaluate, chunks):
+                    fetched.update(chunk)
+
+        if self.cache is not None:
+            for name, value in fetched.items():
+                self.cache.put(keys[name], value)
+        results.update(fetched)
+        return results
+
+    def _chunk(self, objects: ComputedObjects) -> List[ComputedObjects]:
+        names = list(objects)
+        size = len(names) if self.chunk_size is None else self.chunk_size
+        return [
+            {name: objects[name] for name in names[i : i + size]}
+            for i in range(0, len(names), size)
+        ]
+
+
+def get_info(objects: ComputedObjects, fetcher: BatchFetcher = None) -> Results:
+    """fetches the named computed objects in one round trip"""
+    fetcher = BatchFetcher() if fetcher is None else fetcher
+    return fetcher.fetch(objects)
+
+
+def fetch_pages(
+    collection: ee.Collection,
+    page_size: int = 1000,
+    fetcher: BatchFetcher = None,
+    max_workers: int = 4,
+    size: int = None,
+) -> List[Any]:
+    """fetches the elements of a collection in pages of page_size elements, one
+    toList(page_size, offset) request per page, concurrently on a thread pool.
+    The size is fetched first unless it is given. Elements are returned in
+    collection order"""
+    if page_size < 1:
+        raise ValueError("page_size must be a positive integer")
+    fetcher = BatchFetcher() if fetcher is None else fetcher
+    if size is None:
+        size = get_info({"size": collection.size()}, fetcher)["size"]
+
+    def fetch_page(offset: int) -> List[Any]:
+        name = f"page_{offset}"
+        count = min(page_size, size - offset)
+        return fetcher.fetch({name: collection.toList(count, offset)})[name]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pages = list(pool.map(fetch_page, range(0, size, page_size)))
+    return [element for page in pages for element in page]
@@ -1,11 +1,18 @@
 from abc import ABC, abstractmethod
 import ee
 
+from .graph import instrument
+
 
 class SpatialFilters(ABC):
 
+    @instrument()
     def __call__(self, image: ee.Image) -> ee.Image:
-        return image.convolve(self.algo()).set('spatialFilter', 'Added')
+        return self.filter(image).set('spatialFilter', 'Added')
+
+    def filter(self, image: ee.Image) -> ee.Image:
+        """convolves the image with the kernel returned by algo"""
+        return image.convolve(self.algo())
 
     @abstractmethod
     def algo(self):
@@ -24,81 +31,62 @@ class BoxCar(SpatialFilters):
 
 
 class Gaussian(SpatialFilters):
-    def __init__(self, radius: float = 1.0, units: str = "pixels", normalize: bool = True, magnitude: float = 1.0):
+    def __init__(self, radius: float = 1.0, units: str = "pixels", normalize: bool = True, magnitude: float = 1.0, sigma: float = 1.0):
         self.radius = radius
         self.units = units
         self.normalize = normalize
         self.magnitude = magnitude
+        self.sigma = sigma
 
     def algo(self):
-        return ee.Kernel.gaussian(self.radius, self.units, self.normalize, self.magnitude)
+        return ee.Kernel.gaussian(
+            radius=self.radius,
+            sigma=self.sigma,
+            units=self.units,
+            normalize=self.normalize,
+            magnitude=self.magnitude,
+        )
 
 
 class PeronaMalik(SpatialFilters):
-    def __init__(self, K: float = 3.5, iterations: int = 10, method: int = 2):
+    """Perona-Malik anisotropic diffusion. Every band is diffused on its own,
+    each iteration takes the 4 neighbour gradients in one neighbourhood
+    operation and computes the conductance on all of them at once."""
+
+    def __init__(self, K: float = 3.5, iterations: int = 10, method: int = 2, lamb: float = 0.2):
         self.K = K
         self.iterations = iterations
         self.method = method
+        self.lamb = lamb
 
-    def algo(self, img: ee.Image):
-        dxW = ee.Kernel.fixed(3, 3, [[0, 0, 0], [1, -1, 0], [0, 0, 0]])
-
-        dxE = ee.Kernel.fixed(3, 3, [[0, 0, 0], [0, -1, 1], [0, 0, 0]])
-
-        dyN = ee.Kernel.fixed(3, 3, [[0, 1, 0], [0, -1, 0], [0, 0, 0]])
-
-        dyS = ee.Kernel.fixed(3, 3, [[0, 0, 0], [0, -1, 0], [0, 1, 0]])
-
-        lamb = 0.2
-
-        k1 = ee.Image(-1.0 / self.K)
-        k2 = ee.Image(self.K).multiply(ee.Image(self.K))
-
-        for _ in range(0, self.iterations):
-            dI_W = img.convolve(dxW)
-            dI_E = img.convolve(dxE)
-            dI_N = img.convolve(dyN)
-            dI_S = img.convolve(dyS)
-
-            if self.method == 1:
-                cW = dI_W.multiply(dI_W).multiply(k1).exp()
-                cE = dI_E.multiply(dI_E).multiply(k1).exp()
-                cN = dI_N.multiply(dI_N).multiply(k1).exp()
-                cS = dI_S.multiply(dI_S).multiply(k1).exp()
-
-                img = img.add(
-                    ee.Image(lamb).multiply(
-                        cN.multiply(dI_N)
-                        .add(cS.multiply(dI_S))
-                        .add(cE.multiply(dI_E))
-                        .add(cW.multiply(dI_W))
-                    )
-                )
-
-            else:
-                cW = ee.Image(1.0).divide(
-                    ee.Image(1.0).add(dI_W.multiply(dI_W).divide(k2))
-                )
-                cE = ee.Image(1.0).divide(
-                    ee.Image(1.0).add(dI_E.multiply(dI_E).divide(k2))
-                )
-                cN = ee.Image(1.0).divide(
-                    ee.Image(1.0).add(dI_N.multiply(dI_N).divide(k2))
-                )
-                cS = ee.Image(1.0).divide(
-                    ee.Image(1.0).add(dI_S.multiply(dI_S).divide(k2))
-                )
-
-                img = img.add(
-                    ee.Image(lamb).multiply(
-                        cN.multiply(dI_N)
-                        .add(cS.multiply(dI_S))
-                        .add(cE.multiply(dI_E))
-                        .add(cW.multiply(dI_W))
-                    )
-                )
-
-        return img
+    def algo(self):
+        """plus shaped kernel that selects the 4 neighbours of a pixel"""
+        return ee.Kernel.fixed(3, 3, [[0, 1, 0], [1, 0, 1], [0, 1, 0]])
+
+    def filter(self, image: ee.Image) -> ee.Image:
+        neighbours = self.algo()
+        # constants are hoisted out of the iterations
+        k1 = -1.0 / self.K
+        k2 = self.K * self.K
+
+        def diffuse(band):
+            img = image.select([band]).toFloat()
+            for _ in range(self.iterations):
+                gradients = img.neighborhoodToBands(neighbours).subtract(img)
+                squared = gradients.multiply(gradients)
+                if self.method == 1:
+                    conductance = squared.multiply(k1).exp()
+                else:
+                    conductance = squared.divide(k2).add(1.0).pow(-1.0)
+                flux = conductance.multiply(gradients).reduce(ee.Reducer.sum())
+                img = img.add(flux.multiply(self.lamb))
+            return img
+
+        # the iterations are built once and mapped over the band names, so the
+        # graph does not grow with the number of bands
+        bands = image.bandNames()
+        filtered = ee.ImageCollection.fromImages(bands.map(diffuse)).toBands().rename(bands)
+        return image.addBands(filtered, None, True)
 
 
 def denoise(self, algorithm: SpatialFilters):
@@ -0,0 +1,210 @@
+import functools
+import json
+import sys
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Tuple, Union
+
+import ee
+
+Expression = Dict[str, Any]
+Graph = Union[ee.ComputedObject, Expression, str]
+ComponentName = str
+
+
+@dataclass(frozen=True)
+class GraphStats:
+    """Size of the serialized expression graph of an ee.ComputedObject.
+
+    nodes counts the distinct function invocations, expanded_nodes the
+    invocations once every shared subexpression is written out in full.
+    functions counts the distinct invocations per function name and repeated
+    how often each shared subexpression is referenced, keyed by function name.
+    """
+
+    bytes: int
+    nodes: int
+    depth: int = 0
+    expanded_nodes: int = 0
+    functions: Dict[str, int] = field(default_factory=dict)
+    repeated: Dict[str, int] = field(default_factory=dict)
+
+
+def load_expression(obj: Graph) -> Expression:
+    """returns the compact cloud api expression ({"result": ..., "values": ...})
+    for a computed object, a serialized graph or an already parsed expression"""
+    if isinstance(obj, ee.ComputedObject):
+        obj = ee.serializer.encode(obj, for_cloud_api=True)
+    if isinstance(obj, (str, bytes)):
+        obj = json.loads(obj)
+    if not isinstance(obj, dict) or "values" not in obj:
+        raise TypeError("obj must be an ee.ComputedObject or a serialized expression")
+    return obj
+
+
+def _invocations(value: Any) -> Iterator[Expression]:
+    """yields every function invocation inlined in a value node, references to
+    other value nodes are not followed"""
+    if isinstance(value, dict):
+        if "functionInvocationValue" in value:
+            yield value["functionInvocationValue"]
+        for v in value.values():
+            yield from _invocations(v)
+    elif isinstance(value, list):
+        for v in value:
+            yield from _invocations(v)
+
+
+def _references(value: Any) -> Iterator[str]:
+    """yields the names of the value nodes a value node refers to"""
+    if isinstance(value, dict):
+        for key, v in value.items():
+            if key in ("valueReference", "functionReference", "body") and isinstance(v, str):
+                yield v
+            else:
+                yield from _references(v)
+    elif isinstance(value, list):
+        for v in value:
+            yield from _references(v)
+
+
+class _Walker:
+    """computes depth and expanded size of a compact expression, each shared
+    value node is only visited once"""
+
+    def __init__(self, values: Dict[str, Any]) -> None:
+        self.values = values
+        self.memo: Dict[str, Tuple[int, int]] = {}
+
+    def reference(self, name: str) -> Tuple[int, int]:
+        if name not in self.memo:
+            self.memo[name] = self.value(self.values[name])
+        return self.memo[name]
+
+    def value(self, value: Any) -> Tuple[int, int]:
+        """returns (depth, expanded invocation count) of a value node"""
+        depth, size = 0, 0
+        if isinstance(value, dict):
+            for key, v in value.items():
+                if key in ("valueReference", "functionReference", "body") and isinstance(v, str):
+                    d, s = self.reference(v)
+                else:
+                    d, s = self.value(v)
+                depth, size = max(depth, d), size + s
+            if "functionInvocationValue" in value:
+                depth, size = depth + 1, size + 1
+        elif isinstance(value, list):
+            for v in value:
+                d, s = self.value(v)
+                depth, size = max(depth, d), size + s
+        return depth, size
+
+
+def graph_stats(obj: Graph) -> GraphStats:
+    """measures the serialized byte size, number of function invocations,
+    depth and the shared subexpressions in the graph of obj"""
+    expression = load_expression(obj)
+    values = expression["values"]
+
+    functions = Counter()
+    for value in values.values():
+        for invocation in _invocations(value):
+            functions[invocation.get("functionName", "<custom function>")] += 1
+
+    references = Counter(ref for value in values.values() for ref in _references(value))
+    references[expression["result"]] += 1
+    repeated = Counter()
+    for name, count in references.items():
+        if count > 1:
+            node = values[name].get("functionInvocationValue")
+            if node is not None:
+                repeated[node.get("functionName", "<custom function>")] += count
+
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, 10 * len(values) + 1000))
+    try:
+        depth, expanded = _Walker(values).reference(expression["result"])
+    finally:
+        sys.setrecursionlimit(limit)
+
+    return GraphStats(
+        bytes=len(json.dumps(expression).encode()),
+        nodes=sum(functions.values()),
+        depth=depth,
+        expanded_nodes=expanded,
+        functions=dict(functions.most_common()),
+        repeated=dict(repeated.most_common()),
+    )
+
+
+class GraphProfiler:
+    """Records the graphs built by instrumented eeng components while active.
+
+    >>> with GraphProfiler() as profiler:
+    ...     stack = cnwi_stack(aoi, s1, s2, fourier, terrain)
+    >>> profiler.summary()
+
+    Mapped functions are only recorded once ee has named their variables, so
+    each mapped call is counted once per map.
+    """
+
+    def __init__(self) -> None:
+        self.records: List[Tuple[ComponentName, GraphStats]] = []
+
+    def __enter__(self) -> "GraphProfiler":
+        _PROFILERS.append(self)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        _PROFILERS.remove(self)
+
+    def record(self, component: ComponentName, obj: Any) -> None:
+        if not isinstance(obj, ee.ComputedObject):
+            return
+        try:
+            stats = graph_stats(obj)
+        except ee.EEException:
+            # variables of a mapped function that are not named yet
+            return
+        self.records.append((component, stats))
+
+    def summary(self) -> Dict[ComponentName, Dict[str, int]]:
+        """calls, total bytes and nodes per component, largest first"""
+        out: Dict[ComponentName, Dict[str, int]] = {}
+        for component, stats in self.records:
+            entry = out.setdefault(component, {"calls": 0, "bytes": 0, "nodes": 0, "depth": 0})
+            entry["calls"] += 1
+            entry["bytes"] += stats.bytes
+            entry["nodes"] += stats.nodes
+            entry["depth"] = max(entry["depth"], stats.depth)
+        return dict(sorted(out.items(), key=lambda kv: kv[1]["bytes"], reverse=True))
+
+
+_PROFILERS: List[GraphProfiler] = []
+
+
+def instrument(component: ComponentName = None) -> Callable:
+    """decorator that reports the object returned by the wrapped function to
+    every active GraphProfiler. Without a component name, methods are named
+    after the class of the instance (and the method, unless it is __call__)"""
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+            if _PROFILERS:
+                name = component if component is not None else _component_name(func, args)
+                for profiler in list(_PROFILERS):
+                    profiler.record(name, result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def _component_name(func: Callable, args: tuple) -> ComponentName:
+    if not args or isinstance(args[0], type):
+        return func.__qualname__
+    owner = type(args[0]).__name__
+    return owner if func.__name__ == "__call__" else f"{owner}.{func.__name__}"
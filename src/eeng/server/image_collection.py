@@ -1,8 +1,15 @@
+from typing import Any, Dict, List
+
 import ee
 
 from .filters import SpatialFilters
-from .calc import Calculator
+from .calc import Calculator, CalculatorChain
 from .cmasking import S2CloudlessAlgorithm
+from .collections import CollectionQuery, ImageCollectionIDs
+from .fetch import BatchFetcher, fetch_pages
+from .graph import instrument
+
+IDS = ImageCollectionIDs()
 
 
 class __ImageCollection(ee.ImageCollection):
@@ -17,10 +24,16 @@ class __ImageCollection(ee.ImageCollection):
             raise TypeError("filter must be a subclass of SpatialFilters")
         return self.map(filter)
 
-    def addCalculator(self, calculator: Calculator):
-        if not isinstance(calculator, Calculator):
-            raise TypeError("calculator must be a subclass of Calculator")
-        return self.map(calculator)
+    def addCalculator(self, *calculators: Calculator):
+        """maps the calculators over the collection, more than one calculator
+        is merged into a CalculatorChain so the collection is only mapped once
+        """
+        for calculator in calculators:
+            if not isinstance(calculator, Calculator):
+                raise TypeError("calculator must be a subclass of Calculator")
+        if len(calculators) == 1:
+            return self.map(calculators[0])
+        return self.map(CalculatorChain(*calculators))
 
     def addFDate(self, fmt: str = None):
         """adds the date of the image to the image formatted to the speification
@@ -41,17 +54,29 @@ class __ImageCollection(ee.ImageCollection):
 
         return self.map(add_prefix)
 
-    def toFeatureCollection(self) -> ee.FeatureCollection:
-        """Converts the Image Collection to a Feature Collection
-        note: it copies all non system properties
+    def toFeatureCollection(self, properties: List[str] = None) -> ee.FeatureCollection:
+        """Converts the Image Collection to a Feature Collection, one feature
+        with the image footprint per image. Copies the given properties, by
+        default all non system properties
         """
 
-        def to_feature(image: ee.ComputedObject) -> ee.Feature:
-            img = ee.Image(image)
-            return ee.Feature(img.geometry(), img.toDictionary())
+        def to_feature(image: ee.Image) -> ee.Feature:
+            values = image.toDictionary() if properties is None else image.toDictionary(properties)
+            return ee.Feature(image.geometry(), values)
 
-        as_list = self.toList(self.size()).map(to_feature)
-        return ee.FeatureCollection(as_list)
+        return ee.FeatureCollection(self.map(to_feature))
+
+    def fetchFeatures(
+        self,
+        properties: List[str] = None,
+        page_size: int = 1000,
+        fetcher: BatchFetcher = None,
+        max_workers: int = 4,
+    ) -> Dict[str, Any]:
+        """the toFeatureCollection as a GeoJSON FeatureCollection dictionary,
+        fetched in pages of page_size features, see fetch_pages"""
+        features = fetch_pages(self.toFeatureCollection(properties), page_size, fetcher, max_workers)
+        return {"type": "FeatureCollection", "features": features}
 
 
 class Sentinel1(__ImageCollection):
@@ -145,6 +170,7 @@ class Sentinel2Creator:
     def cp(self):
         return self._cp
 
+    @instrument()
     def get_toa_col(
         self,
         start_date: str,
@@ -152,12 +178,10 @@ class Sentinel2Creator:
         geometry: ee.Geometry,
         cloud_cover: float = 100.0,
     ):
-        return (
-            self.toa.filterDate(start_date, end_date)
-            .filterBounds(geometry)
-            .filter(ee.Filter.lt("CLOUDY_PIXEL_PERCENTAGE", cloud_cover))
-        )
+        query = CollectionQuery(IDS.s2, start_date, end_date, geometry, cloud_cover=cloud_cover)
+        return query.build(self.toa)
 
+    @instrument()
     def get_sr_col(
         self,
         start_date: str,
@@ -165,15 +189,14 @@ class Sentinel2Creator:
         geometry: ee.Geometry,
         cloud_cover: float = 100.0,
     ):
-        return (
-            self.sr.filterDate(start_date, end_date)
-            .filterBounds(geometry)
-            .filter(ee.Filter.lt("CLOUDY_PIXEL_PERCENTAGE", cloud_cover))
-        )
+        query = CollectionQuery(IDS.s2_sr, start_date, end_date, geometry, cloud_cover=cloud_cover)
+        return query.build(self.sr)
 
+    @instrument()
     def get_cp_col(self, start_date: str, end_date: str, geometry: ee.Geometry):
-        return self.cp.filterDate(start_date, end_date).filterBounds(geometry)
+        return CollectionQuery(IDS.s2_cloud_prob, start_date, end_date, geometry).build(self.cp)
 
+    @instrument()
     def get_s2_cloudless_col(self, s2_sr, s2_cp) -> Sentinel2Cloudless:
         return Sentinel2Cloudless((s2_sr, s2_cp))
 
@@ -186,67 +209,29 @@ class Sentinel1Creator:
     def s1(self):
         return self._s1
 
+    def _query(self, start_date, end_date, geometry, **constraints) -> Sentinel1:
+        return CollectionQuery(IDS.s1, start_date, end_date, geometry, **constraints).build(self.s1)
+
+    @instrument()
     def get_s1_col(self, start_date: str, end_date: str, geometry: ee.Geometry):
-        return self.s1.filterDate(start_date, end_date).filterBounds(geometry)
+        return self._query(start_date, end_date, geometry)
 
+    @instrument()
     def get_dv_col(self, start_date, end_date, geometry):
-        filter = ee.Filter(
-            [
-                ee.Filter.listContains("transmitterReceiverPolarisation", "VV"),
-                ee.Filter.listContains("transmitterReceiverPolarisation", "VH"),
-                ee.Filter.eq("instrumentMode", "IW"),
-            ]
-        )
-
-        return (
-            self._s1.filterDate(start_date, end_date)
-            .filterBounds(geometry)
-            .filter(filter)
-        )
+        return self._query(start_date, end_date, geometry, polarisations=("VV", "VH"), mode="IW")
 
+    @instrument()
     def get_dh_col(self, start_date, end_date, geometry):
-        filter = ee.Filter(
-            [
-                ee.Filter.listContains("transmitterReceiverPolarisation", "HH"),
-                ee.Filter.listContains("transmitterReceiverPolarisation", "HV"),
-                ee.Filter.eq("instrumentMode", "IW"),
-            ]
-        )
-
-        return (
-            self._s1.filterDate(start_date, end_date)
-            .filterBounds(geometry)
-            .filter(filter)
-        )
+        return self._query(start_date, end_date, geometry, polarisations=("HH", "HV"), mode="IW")
 
+    @instrument()
     def get_asc_dv_col(self, start_date, end_date, geometry):
-        filter = ee.Filter(
-            [
-                ee.Filter.listContains("transmitterReceiverPolarisation", "VV"),
-                ee.Filter.listContains("transmitterReceiverPolarisation", "VH"),
-                ee.Filter.eq("instrumentMode", "IW"),
-                ee.Filter.eq("orbitProperties_pass", "ASCENDING"),
-            ]
-        )
-
-        return (
-            self._s1.filterDate(start_date, end_date)
-            .filterBounds(geometry)
-            .filter(filter)
+        return self._query(
+            start_date, end_date, geometry, polarisations=("VV", "VH"), mode="IW", orbit_pass="ASCENDING"
         )
 
+    @instrument()
     def get_desc_dv_col(self, start_date, end_date, geometry):
-        filter = ee.Filter(
-            [
-                ee.Filter.listContains("transmitterReceiverPolarisation", "VV"),
-                ee.Filter.listContains("transmitterReceiverPolarisation", "VH"),
-                ee.Filter.eq("instrumentMode", "IW"),
-                ee.Filter.eq("orbitProperties_pass", "DESCENDING"),
-            ]
-        )
-
-        return (
-            self._s1.filterDate(start_date, end_date)
-            .filterBounds(geometry)
-            .filter(filter)
+        return self._query(
+            start_date, end_date, geometry, polarisations=("VV", "VH"), mode="IW", orbit_pass="DESCENDING"
         )
@@ -6,6 +6,11 @@ import ee
 TrainingData = ee.FeatureCollection
 ColumnName = str
 
+# column of a tree table and the newline replacement inside a row, shared with
+# eeng.client.trees which writes the table
+TREE_COLUMN = "tree"
+LINE_SEPARATOR = "#"
+
 
 class RandomForestModel:
     def __init__(
@@ -120,3 +125,31 @@ class RandomForestClassifier:
     @classifier.setter
     def classifier(self, classifier):
         self._classifier = classifier
+
+
+class DecisionTreeEnsembleClassifier:
+    """Classifies with a fixed set of decision tree strings, e.g. a forest trained
+    and written with eeng.client.forest, so nothing is trained on the server.
+    Trees are a list of strings or a tree table uploaded as an asset."""
+
+    def __init__(self, trees: Union[List[str], ee.List]) -> None:
+        self.trees = ee.List(trees)
+        self._classifier = ee.Classifier.decisionTreeEnsemble(self.trees)
+
+    @classmethod
+    def from_asset(cls, asset_id: str) -> "DecisionTreeEnsembleClassifier":
+        """reads a tree table, one tree per feature with newlines stored as #"""
+        rows = ee.FeatureCollection(asset_id).aggregate_array(TREE_COLUMN)
+        trees = rows.map(lambda row: ee.String(row).replace(LINE_SEPARATOR, "\n", "g"))
+        return cls(trees)
+
+    @property
+    def classifier(self) -> ee.Classifier:
+        return self._classifier
+
+    def apply(
+        self, X: Union[ee.Image, ee.FeatureCollection]
+    ) -> Union[ee.Image, ee.FeatureCollection]:
+        if isinstance(X, ee.Image):
+            return X.classify(self._classifier).uint8()
+        return X.classify(self._classifier)
@@ -0,0 +1,272 @@
+"""Tiled sampling of large point collections.
+
+Image.sampleRegions over a whole province of points runs as one large job that
+runs out of memory or takes hours. TiledSampler splits the points into tiles of
+a regular grid in EPSG:4326 (or by the values of a key property like group_id),
+samples every tile as its own request and merges the samples.
+
+Grid tiles adapt to the point density: the base tile size targets
+points_per_tile points on average, and every base tile holding more than
+max_points is split into 2**level x 2**level sub tiles, at the coarsest level
+where each sub tile fits. Tile membership is computed from the finest grid so
+sub tiles always nest exactly in their base tile.
+
+Tiles are either fetched concurrently through a BatchFetcher, whose cache skips
+tiles that were fetched before, or exported through an ExportScheduler, whose
+state file skips tiles that were exported before.
+"""
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence, Tuple
+
+import ee
+import pandas as pd
+
+from .export import ExportJob, ExportScheduler, JobState
+from .fetch import BatchFetcher, get_info
+
+ColumnName = str
+TileName = str
+
+TILE_PROPERTY = "tile"
+# cells are formatted as integers on the server so "<col>_<row>" never reads
+# "3.0" or an exponent and matches cell_name on the client
+CELL_FORMAT = "%d"
+# getInfo returns at most 5000 features of a collection
+MAX_POINTS_PER_TILE = 5000
+
+# band values (bands x points) sampled comfortably without splitting tiles,
+# every doubling of the load doubles the tileScale up to MAX_TILE_SCALE
+SAMPLE_LOAD_PER_TILE_SCALE = 2_000_000
+MAX_TILE_SCALE = 16
+
+
+def auto_tile_scale(n_bands: int, n_points: int) -> int:
+    """a power of two tileScale for sampling n_bands at n_points, 1 for small
+    point sets and MAX_TILE_SCALE for provincial stacks"""
+    load = max(n_bands, 1) * max(n_points, 1) / SAMPLE_LOAD_PER_TILE_SCALE
+    if load <= 1:
+        return 1
+    return int(min(2 ** math.ceil(math.log2(load)), MAX_TILE_SCALE))
+
+
+@dataclass(frozen=True)
+class Tile:
+    """A grid cell at a split level, or one value of the key property"""
+
+    name: TileName
+    level: int = 0
+    col: int = None
+    row: int = None
+    value: Any = None
+    count: int = None
+
+
+def tile_size(count: int, bounds: Sequence[float], points_per_tile: int) -> float:
+    """edge length in degrees of square tiles that hold points_per_tile points
+    on average, bounds is (xmin, ymin, xmax, ymax)"""
+    xmin, ymin, xmax, ymax = bounds
+    area = max(xmax - xmin, 1e-6) * max(ymax - ymin, 1e-6)
+    return math.sqrt(area * min(points_per_tile, max(count, 1)) / max(count, 1))
+
+
+def grid_name(level: int, col: int, row: int) -> TileName:
+    return f"{level}_{col}_{row}"
+
+
+def cell_name(col: int, row: int) -> str:
+    """the "<col>_<row>" key the server sets for a cell"""
+    return f"{CELL_FORMAT % col}_{CELL_FORMAT % row}"
+
+
+def split_tiles(histograms: Dict[int, Dict[str, int]], max_points: int) -> List[Tile]:
+    """chooses the split level of every base tile from the point count per
+    tile at every level, histograms[level] is keyed by "<col>_<row>" """
+    levels = sorted(histograms)
+    finest = levels[-1]
+    by_parent: Dict[int, Dict[Tuple[int, int], List[Tile]]] = {}
+    for level in levels:
+        shift = 2**level
+        parents = by_parent.setdefault(level, {})
+        for key, count in histograms[level].items():
+            col, row = (int(v) for v in key.split("_"))
+            tile = Tile(grid_name(level, col, row), level, col, row, count=int(count))
+            parents.setdefault((col // shift, row // shift), []).append(tile)
+
+    tiles = []
+    for parent in sorted(by_parent[levels[0]]):
+        for level in levels:
+            children = by_parent[level][parent]
+            if level == finest or max(t.count for t in children) <= max_points:
+                tiles.extend(sorted(children, key=lambda t: (t.col, t.row)))
+                break
+    return tiles
+
+
+def features_frame(collection: Dict[str, Any], tile: TileName = None) -> pd.DataFrame:
+    """properties of the features of a fetched FeatureCollection"""
+    frame = pd.DataFrame([f.get("properties") or {} for f in collection.get("features", [])])
+    if tile is not None:
+        frame[TILE_PROPERTY] = tile
+    return frame
+
+
+class TiledSampler:
+    """Samples an image at a collection of points one tile at a time.
+
+    Without a key the points are split on a density adapted grid, see the
+    module docstring. tile_size fixes the base tile size in degrees and skips
+    the request that measures the point density.
+    """
+
+    def __init__(
+        self,
+        image: ee.Image,
+        points: ee.FeatureCollection,
+        properties: List[ColumnName] = None,
+        scale: int = 10,
+        tileScale: int = 16,
+        key: ColumnName = None,
+        tile_size: float = None,
+        points_per_tile: int = 2000,
+        max_points: int = MAX_POINTS_PER_TILE,
+        max_level: int = 3,
+        fetcher: BatchFetcher = None,
+    ) -> None:
+        self.image = image
+        self.points = points
+        self.properties = [] if properties is None else list(properties)
+        self.scale = scale
+        self.tileScale = tileScale
+        self.key = key
+        self.tile_size = tile_size
+        self.points_per_tile = points_per_tile
+        self.max_points = max_points
+        self.max_level = max_level
+        self.fetcher = BatchFetcher() if fetcher is None else fetcher
+        self.failed: Dict[TileName, str] = {}
+        self._tiles = None
+
+    @property
+    def tiles(self) -> List[Tile]:
+        """the tiles holding at least one point, planned on first use"""
+        if self._tiles is None:
+            self._tiles = self._plan()
+        return self._tiles
+
+    def _plan(self) -> List[Tile]:
+        if self.key is not None:
+            values = get_info({"values": self.points.aggregate_array(self.key).distinct()}, self.fetcher)
+            return [Tile(str(v), value=v) for v in values["values"]]
+
+        if self.tile_size is None:
+            info = get_info(
+                {"count": self.points.size(), "bounds": self.points.geometry().bounds(1)},
+                self.fetcher,
+            )
+            ring = info["bounds"]["coordinates"][0]
+            xs, ys = [c[0] for c in ring], [c[1] for c in ring]
+            self.tile_size = tile_size(info["count"], (min(xs), min(ys), max(xs), max(ys)), self.points_per_tile)
+
+        levels = list(range(self.max_level + 1))
+        cells = self._with_cells(self.points, levels)
+        histograms = get_info(
+            {str(l): cells.aggregate_histogram(f"{TILE_PROPERTY}_{l}") for l in levels},
+            self.fetcher,
+        )
+        return split_tiles({int(l): h for l, h in histograms.items()}, self.max_points)
+
+    def _with_cells(self, points: ee.FeatureCollection, levels: Sequence[int]) -> ee.FeatureCollection:
+        """sets a "<col>_<row>" property per level, derived from the finest grid"""
+        finest = 2**self.max_level
+        size = self.tile_size / finest
+
+        def add_cells(feature):
+            coords = feature.geometry().centroid(1).coordinates()
+            col = ee.Number(coords.get(0)).divide(size).floor().int64()
+            row = ee.Number(coords.get(1)).divide(size).floor().int64()
+            cells = {}
+            for level in levels:
+                shift = self.max_level - level
+                cells[f"{TILE_PROPERTY}_{level}"] = (
+                    col.rightShift(shift).format(CELL_FORMAT).cat("_").cat(row.rightShift(shift).format(CELL_FORMAT))
+                )
+            return feature.set(cells)
+
+        return points.map(add_cells)
+
+    def tile_points(self, tile: Tile) -> ee.FeatureCollection:
+        if tile.value is not None:
+            return self.points.filter(ee.Filter.eq(self.key, tile.value))
+
+        size = self.tile_size / 2**tile.level
+        # a tiny margin keeps points on the edges, the cell filter keeps them unique
+        margin = size * 1e-6
+        rect = ee.Geometry.Rectangle(
+            [tile.col * size - margin, tile.row * size - margin, (tile.col + 1) * size + margin, (tile.row + 1) * size + margin],
+            "EPSG:4326",
+            False,
+        )
+        cells = self._with_cells(self.points.filterBounds(rect), [tile.level])
+        return cells.filter(ee.Filter.eq(f"{TILE_PROPERTY}_{tile.level}", cell_name(tile.col, tile.row)))
+
+    def tile_samples(self, tile: Tile) -> ee.FeatureCollection:
+        return self.image.sampleRegions(
+            collection=self.tile_points(tile),
+            properties=self.properties,
+            scale=self.scale,
+            tileScale=self.tileScale,
+            geometries=False,
+        )
+
+    def samples(self) -> ee.FeatureCollection:
+        """the samples of every tile merged into one collection on the server"""
+        return ee.FeatureCollection([self.tile_samples(t) for t in self.tiles]).flatten()
+
+    def fetch(self, max_workers: int = 4) -> pd.DataFrame:
+        """fetches the tiles concurrently and merges them into one frame with a
+        tile column. Tiles in the fetcher's cache are not requested again, tiles
+        that fail are listed in failed and the others are still returned"""
+        self.failed = {}
+        lock = threading.Lock()
+
+        def fetch_tile(tile: Tile) -> pd.DataFrame:
+            try:
+                result = self.fetcher.fetch({tile.name: self.tile_samples(tile)})
+            except Exception as e:
+                with lock:
+                    self.failed[tile.name] = str(e)
+                return None
+            return features_frame(result[tile.name], tile.name)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            frames = [f for f in pool.map(fetch_tile, self.tiles) if f is not None]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def export_jobs(self, prefix: str, destination: str = "drive", options: Dict[str, Any] = None) -> List[ExportJob]:
+        """one table export per tile, named <prefix>_<tile>"""
+        return [
+            ExportJob(
+                name=f"{prefix}_{tile.name}",
+                obj=self.tile_samples(tile),
+                destination=destination,
+                options=dict(options or {}),
+            )
+            for tile in self.tiles
+        ]
+
+    def export(
+        self,
+        prefix: str,
+        scheduler: ExportScheduler = None,
+        destination: str = "drive",
+        options: Dict[str, Any] = None,
+    ) -> Dict[str, JobState]:
+        """exports every tile, give the scheduler a state_path to skip the
+        tiles that were exported by an earlier run"""
+        scheduler = ExportScheduler() if scheduler is None else scheduler
+        return scheduler.run(self.export_jobs(prefix, destination, options))
@@ -1,6 +1,8 @@
 from typing import Any, List
 import ee
 
+from .fetch import BatchFetcher, get_info
+
 Labels = List[str]
 ConfusionMatrix = Any
 ColumnName = str
@@ -46,7 +48,7 @@ class Assessment:
     def add_matrix(self):
         """adds a formatted confusion matrix to the assessment"""
         self.cfm = ee.Feature(
-            None, {"cfm", self._matrix.array().slice(0, 1).slice(1, 1)}
+            None, {"cfm": self._matrix.array().slice(0, 1).slice(1, 1)}
         )
         return self
 
@@ -65,7 +67,7 @@ class Assessment:
 
     def add_consumers(self):
         """add the consumers accuracy to the assessment"""
-        self._producers = ee.Feature(
+        self._consumers = ee.Feature(
             None,
             {"consumers": self._matrix.consumersAccuracy().toList().flatten().slice(1)},
         )
@@ -83,3 +85,20 @@ class Assessment:
             [v for v in self.__dict__.values() if isinstance(v, ee.Feature)]
         )
         return self
+
+    def fetch(self, labels: Labels = None, fetcher: BatchFetcher = None) -> dict:
+        """fetches the matrix, overall, producers and consumers accuracy in one
+        round trip. The keys match the properties confusion_matrix_from_file reads"""
+        objects = {
+            "cfm": self._matrix.array().slice(0, 1).slice(1, 1),
+            "acc": self._matrix.accuracy(),
+            "pro": self._matrix.producersAccuracy().toList().flatten().slice(1),
+            "con": self._matrix.consumersAccuracy().toList().flatten().slice(1),
+        }
+        if labels is not None:
+            objects["labels"] = ee.List(labels)
+        return get_info(objects, fetcher)
+
+    def fetchTable(self, fetcher: BatchFetcher = None) -> dict:
+        """fetches the built assessment table to the client"""
+        return get_info({"table": self.table}, fetcher)["table"]
@@ -1,7 +1,14 @@
 import ee
 
+from .cfuncs import generate_samples
+from .fetch import BatchFetcher, get_info
+from .sampling import TiledSampler
+
 ColumnName = str
 
+# property added by balance to thin out the classes
+RANDOM_COLUMN = "random"
+
 
 class TrainingPoints:
     """This is a builder Class that is used to build Traning Points dataset from a Feature Collection that is assuemd to be a collection of points"""
@@ -17,16 +24,37 @@ class TrainingPoints:
         self._add_propertity(classProperty)
 
     @property
-    def labels(self):
-        return self.points.aggregate_array(self.classProperty).distinct()
+    def points(self) -> ee.FeatureCollection:
+        return self._points
+
+    @points.setter
+    def points(self, points: ee.FeatureCollection):
+        # labels, values and lookup are built once per points collection, the
+        # unbalanced histogram belongs to the points balance replaced
+        self._points = points
+        self._unbalanced = None
+        self._labels = None
+        self._values = None
+        self._lookup = None
+        self._client_lookup = None
+
+    @property
+    def labels(self) -> ee.List:
+        if self._labels is None:
+            self._labels = self.points.aggregate_array(self.classProperty).distinct()
+        return self._labels
 
     @property
-    def values(self):
-        return ee.List.sequence(1, self.labels.size())
+    def values(self) -> ee.List:
+        if self._values is None:
+            self._values = ee.List.sequence(1, self.labels.size())
+        return self._values
 
     @property
     def lookup(self) -> ee.Dictionary:
-        return ee.Dictionary.fromLists(self.labels, self.values)
+        if self._lookup is None:
+            self._lookup = ee.Dictionary.fromLists(self.labels, self.values)
+        return self._lookup
 
     def __repr__(self) -> str:
         return f"TrainingPoints({self.points}, {self.classProperty})"
@@ -64,32 +92,82 @@ class TrainingPoints:
         self.points = self.points.map(remap)
         return self
 
-    def addValues(self):
-        """adds the values of the lookup table to the feature collection"""
+    def addValues(self, inline: bool = False, fetcher: BatchFetcher = None):
+        """adds the values of the lookup table to the feature collection. The
+        lookup is built once outside of the mapped function, with inline=True it
+        is fetched to the client first and sent as a literal dictionary"""
+        lookup = self.clientLookup(fetcher) if inline else self.lookup
+        lookup = ee.Dictionary(lookup)
 
         def add_values(feature):
             return feature.set(
-                "value", self.lookup.get(feature.get(self.classProperty))
+                "value", lookup.get(feature.get(self.classProperty))
             )
 
         self._add_propertity("value")
         self.points = self.points.map(add_values)
         return self
 
-    def generateSamples(self, image: ee.Image, scale: int = 10, tileScale: int = 16):
-        """Uses Image.sampleRegions method to generate training points from an image. Returns a geometryless feature collection with the specified properties."""
-        sample = image.sampleRegions(
-            collection=self.points,
+    def histogram(self) -> ee.Dictionary:
+        """number of points per class"""
+        return self.points.aggregate_histogram(self.classProperty)
+
+    def balance(self, max_per_class: int, seed: int = 0):
+        """caps every class at max_per_class points. Each point draws a random
+        number and the max_per_class points with the lowest draws are kept, so
+        classes smaller than max_per_class keep all their points.
+        Classes are filtered by the label values in labels, the keys of lookup,
+        and merged, so numeric class properties (e.g. after remap) never have to
+        match the string keys of a dictionary. The histogram of the points before
+        this call is kept for fetchHistogram until the points are replaced"""
+        unbalanced = self.histogram()
+        points = self.points.randomColumn(RANDOM_COLUMN, seed)
+
+        def thin(label):
+            members = points.filter(ee.Filter.eq(self.classProperty, label))
+            return members.limit(max_per_class, RANDOM_COLUMN)
+
+        self.points = ee.FeatureCollection(self.labels.map(thin)).flatten()
+        self._unbalanced = unbalanced
+        return self
+
+    def fetchHistogram(self, fetcher: BatchFetcher = None) -> dict:
+        """fetches the class histogram in one round trip, after balance the
+        histogram before balancing is fetched with it"""
+        objects = {"histogram": self.histogram()}
+        if self._unbalanced is not None:
+            objects["unbalanced"] = self._unbalanced
+        return get_info(objects, fetcher)
+
+    def generateSamples(
+        self,
+        image: ee.Image,
+        scale: int = 10,
+        tileScale: int = 16,
+        bands: list = None,
+        n_points: int = None,
+    ):
+        """Uses Image.sampleRegions method to generate training points from an image. Returns a geometryless feature collection with the specified properties.
+        Only the bands listed in bands are sampled, tileScale=None picks the tileScale from the number of bands and points."""
+        sample = generate_samples(
+            self.points,
+            image,
+            props=self.properties,
             scale=scale,
-            properties=self.properties,
             tileScale=tileScale,
-            geometries=False,
+            bands=bands,
+            n_points=n_points,
         )
 
         pts = TrainingPoints(sample, self.classProperty)
         pts.properties = self.properties
         return pts
 
+    def tiledSampler(self, image: ee.Image, scale: int = 10, tileScale: int = 16, **kwargs) -> TiledSampler:
+        """samples the image one tile of points at a time, see eeng.server.sampling.
+        The keyword arguments are passed to TiledSampler"""
+        return TiledSampler(image, self.points, self.properties, scale, tileScale, **kwargs)
+
     def getLookupTable(self) -> ee.FeatureCollection:
         zipped = self.labels.zip(self.values)
 
@@ -99,6 +177,21 @@ class TrainingPoints:
 
         return ee.FeatureCollection(zipped.map(mkfeat))
 
+    def fetchLookup(self, fetcher: BatchFetcher = None) -> dict:
+        """fetches the labels and the lookup table to the client in one round trip.
+        Give the fetcher a ResultCache to reuse results across sessions"""
+        return get_info({"labels": self.labels, "lookup": self.lookup}, fetcher)
+
+    def clientLookup(self, fetcher: BatchFetcher = None) -> dict:
+        """the lookup as a client side dictionary, fetched once per points collection"""
+        if self._client_lookup is None:
+            self._client_lookup = get_info({"lookup": self.lookup}, fetcher)["lookup"]
+        return self._client_lookup
+
+    def fetchLookupTable(self, fetcher: BatchFetcher = None) -> dict:
+        """fetches the lookup table feature collection to the client"""
+        return get_info({"table": self.getLookupTable()}, fetcher)["table"]
+
     def _add_propertity(self, value):
         if value not in self.properties:
             self.properties.append(value)
@@ -1,121 +1,202 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence, Tuple, Union
+
+from eeng.server.cache import graph_key
 from eeng.server.calc import *
-from eeng.server.filters import BoxCar
 from eeng.server.collections import ImageCollectionIDs
+from eeng.server.export import ExportJob
+from eeng.server.filters import BoxCar
+from eeng.server.graph import instrument
 
+DayOfYear = int
+Season = Tuple[DayOfYear, DayOfYear]
+AOIs = Union[Sequence[ee.Geometry], Dict[str, ee.Geometry]]
 
-def cnwi_stack(aoi, s1, s2, fourier, terrain):
-    # Sentinel - 1
-    spring = (135, 181)
-    summer = (182, 244)
-    bxcr = BoxCar(1)
-    ratio = Ratio()
-    s1_col = (
-        ee.ImageCollection(s1)
-        .filterBounds(aoi)
-        .denoise(bxcr)
-        .addCalculator(ratio)
-        .select("V.*")
-    )
+# shared region stacks a builder keeps, and builders kept by cnwi_stack
+STACK_CACHE_SIZE = 16
+BUILDER_CACHE_SIZE = 16
 
-    s1_spri = s1_col.filter(ee.Filter.dayOfYear(spring[0], spring[1])).mosaic()
-    s1_summ = s1_col.filter(ee.Filter.dayOfYear(summer[0], summer[1])).mosaic()
 
-    s1_img = ee.Image.cat(s1_spri, s1_summ)
+@dataclass(frozen=True)
+class StackRecipe:
+    """The sources, seasons and bands of a CNWI stack.
 
-    # Sentinel - 2
-    # remove all non spectral bands
-    s2_col = (
-        ee.ImageCollection(s2)
-        .filterBounds(aoi)
-        .select("a_spri_b.*|b_summ_b.*|c_fall_b.*")
-    )
-    # create the create the calculators
-    # NDVI
-    spri_ndvi = NDVI(
-        nir="a_spri_b08_10m",
-        red="a_spri_b04_10m",
-    )
+    s1, s2, fourier and terrain are the ids of the image collections the stack
+    is built from. s2_seasons are the band prefixes of the seasonal Sentinel-2
+    composites and s2_bands the suffix of every band the indices read.
+    """
 
-    summ_ndvi = NDVI(
-        nir="b_summ_b08_10m",
-        red="b_summ_b04_10m",
+    s1: str
+    s2: str
+    fourier: str
+    terrain: str
+    s1_seasons: Tuple[Season, ...] = ((135, 181), (182, 244))
+    s1_bands: str = "V.*"
+    s2_seasons: Tuple[str, ...] = ("a_spri", "b_summ", "c_fall")
+    s2_bands: Tuple[Tuple[str, str], ...] = (
+        ("blue", "b02_10m"),
+        ("green", "b03_10m"),
+        ("red", "b04_10m"),
+        ("nir", "b08_10m"),
+        ("swir1", "b11_20m"),
+        ("swir2", "b12_20m"),
     )
+    alos: str = ImageCollectionIDs.alos
+    alos_start: str = "2019"
+    alos_end: str = "2020"
+    alos_bands: str = "H.*"
+    boxcar_radius: int = 1
 
-    fall_ndvi = NDVI(
-        nir="c_fall_b08_10m",
-        red="c_fall_b04_10m",
-    )
+    def s2_band(self, season: str, band: str) -> str:
+        """name of a band of a seasonal composite, e.g. ("a_spri", "nir")"""
+        return f"{season}_{dict(self.s2_bands)[band]}"
 
-    # SAVI
-    spri_savi = SAVI(
-        nir="a_spri_b08_10m",
-        red="a_spri_b04_10m",
-    )
+    @property
+    def s2_select(self) -> str:
+        """selects the spectral bands of every season"""
+        return "|".join(f"{season}_b.*" for season in self.s2_seasons)
 
-    summ_savi = SAVI(
-        nir="b_summ_b08_10m",
-        red="b_summ_b04_10m",
-    )
-    fall_savi = SAVI(
-        nir="c_fall_b08_10m",
-        red="c_fall_b04_10m",
-    )
 
-    # TASSLED CAP
-    spri_tcap = TasselCap(
-        blue="a_spri_b02_10m",
-        green="a_spri_b03_10m",
-        red="a_spri_b04_10m",
-        nir="a_spri_b08_10m",
-        swir1="a_spri_b11_20m",
-        swir2="a_spri_b12_20m",
-    )
-    summ_tcap = TasselCap(
-        blue="b_summ_b02_10m",
-        green="b_summ_b03_10m",
-        red="b_summ_b04_10m",
-        nir="b_summ_b08_10m",
-        swir1="b_summ_b11_20m",
-        swir2="b_summ_b12_20m",
-    )
-    fall_tcap = TasselCap(
-        blue="c_fall_b02_10m",
-        green="c_fall_b03_10m",
-        red="c_fall_b04_10m",
-        nir="c_fall_b08_10m",
-        swir1="c_fall_b11_20m",
-        swir2="c_fall_b12_20m",
-    )
+class CNWIStackBuilder:
+    """Builds the CNWI stack of any number of AOIs from one recipe.
 
-    # map the calculators
-    s2_col = (
-        s2_col.map(spri_ndvi)
-        .map(summ_ndvi)
-        .map(fall_ndvi)
-        .map(spri_savi)
-        .map(summ_savi)
-        .map(fall_savi)
-        .map(spri_tcap)
-        .map(summ_tcap)
-        .map(fall_tcap)
-    )
+    The parts that do not depend on the AOI, the ALOS composite, the filters
+    and the calculators, are built once per builder. build_many builds the
+    mosaics once for a region and clips every AOI from them, so the stacks of
+    many AOIs share one graph. The last STACK_CACHE_SIZE region stacks are
+    kept, single AOIs from build are not cached.
+    """
 
-    s2_img = s2_col.mosaic()
-
-    ratio.numerator = "HH"
-    ratio.demoninator = "HV"
-    ratio.name = "HH/HV"
-    alos_img = (
-        ee.ImageCollection(ImageCollectionIDs.alos)
-        .filterDate("2019", "2020")
-        .map(bxcr)
-        .map(ratio)
-        .first()
-        .select("H.*")
-    )
+    def __init__(self, recipe: StackRecipe) -> None:
+        self.recipe = recipe
+        self.boxcar = BoxCar(recipe.boxcar_radius)
+        self._alos = None
+        self._stacks: "OrderedDict[str, ee.Image]" = OrderedDict()
+
+    def s2_calculators(self) -> CalculatorChain:
+        """NDVI, SAVI and tassel cap of every season, in that order"""
+        band = self.recipe.s2_band
+        seasons = self.recipe.s2_seasons
+        return CalculatorChain(
+            *[NDVI(nir=band(s, "nir"), red=band(s, "red")) for s in seasons],
+            *[SAVI(nir=band(s, "nir"), red=band(s, "red")) for s in seasons],
+            *[
+                TasselCap(
+                    blue=band(s, "blue"),
+                    green=band(s, "green"),
+                    red=band(s, "red"),
+                    nir=band(s, "nir"),
+                    swir1=band(s, "swir1"),
+                    swir2=band(s, "swir2"),
+                )
+                for s in seasons
+            ],
+        )
+
+    @property
+    def alos(self) -> ee.Image:
+        """the ALOS composite, it does not depend on the AOI"""
+        if self._alos is None:
+            recipe = self.recipe
+            self._alos = (
+                ee.ImageCollection(recipe.alos)
+                .filterDate(recipe.alos_start, recipe.alos_end)
+                .map(self.boxcar)
+                .map(Ratio("HH", "HV"))
+                .first()
+                .select(recipe.alos_bands)
+            )
+        return self._alos
+
+    def s1_image(self, region: ee.Geometry) -> ee.Image:
+        s1_col = (
+            ee.ImageCollection(self.recipe.s1)
+            .filterBounds(region)
+            .denoise(self.boxcar)
+            .addCalculator(Ratio())
+            .select(self.recipe.s1_bands)
+        )
+        seasons = [s1_col.filter(ee.Filter.dayOfYear(start, end)).mosaic() for start, end in self.recipe.s1_seasons]
+        return ee.Image.cat(*seasons)
+
+    def s2_image(self, region: ee.Geometry) -> ee.Image:
+        s2_col = ee.ImageCollection(self.recipe.s2).filterBounds(region).select(self.recipe.s2_select)
+        # one chained calculator so every image gets a single addBands
+        return s2_col.addCalculator(self.s2_calculators()).mosaic()
+
+    def _stack(self, region: ee.Geometry) -> ee.Image:
+        recipe = self.recipe
+        return ee.Image.cat(
+            self.s1_image(region),
+            self.s2_image(region),
+            self.alos,
+            ee.ImageCollection(recipe.terrain).filterBounds(region).mosaic(),
+            ee.ImageCollection(recipe.fourier).filterBounds(region).mosaic(),
+        )
+
+    def stack(self, region: ee.Geometry) -> ee.Image:
+        """the unclipped stack of the sources covering region, reused while the
+        region is among the last STACK_CACHE_SIZE regions"""
+        key = graph_key(region)
+        if key in self._stacks:
+            self._stacks.move_to_end(key)
+            return self._stacks[key]
+        stack = self._stacks[key] = self._stack(region)
+        while len(self._stacks) > STACK_CACHE_SIZE:
+            self._stacks.popitem(last=False)
+        return stack
+
+    @instrument()
+    def build(self, aoi: ee.Geometry) -> ee.Image:
+        return self._stack(aoi).clip(aoi)
 
-    ter_col_img = ee.ImageCollection(terrain).filterBounds(aoi).mosaic()
-    four_col_img = ee.ImageCollection(fourier).filterBounds(aoi).mosaic()
+    def build_many(self, aois: AOIs, region: ee.Geometry = None) -> Dict[str, ee.Image]:
+        """clips of one shared stack, keyed by the names of aois or their
+        position. The stack covers region, by default the bounds of every AOI;
+        passing the study area keeps the graph of every clip small"""
+        aois = _named(aois)
+        if region is None:
+            region = ee.FeatureCollection([ee.Feature(aoi) for aoi in aois.values()]).geometry().bounds()
+        shared = self.stack(region)
+        return {name: shared.clip(aoi) for name, aoi in aois.items()}
 
-    # merge all the images
-    return ee.Image.cat(s1_img, s2_img, alos_img, ter_col_img, four_col_img).clip(aoi)
+    def export_jobs(
+        self,
+        aois: AOIs,
+        prefix: str,
+        destination: str = "drive",
+        options: Dict[str, Any] = None,
+        region: ee.Geometry = None,
+    ) -> List[ExportJob]:
+        """one image export per AOI, named <prefix>_<name>"""
+        named = _named(aois)
+        stacks = self.build_many(named, region)
+        return [
+            ExportJob(
+                name=f"{prefix}_{name}",
+                obj=stacks[name],
+                region=named[name],
+                destination=destination,
+                options=dict(options or {}),
+            )
+            for name in named
+        ]
+
+
+def _named(aois: AOIs) -> Dict[str, ee.Geometry]:
+    if isinstance(aois, dict):
+        return dict(aois)
+    return {str(i): aoi for i, aoi in enumerate(aois)}
+
+
+@lru_cache(maxsize=BUILDER_CACHE_SIZE)
+def _builder(recipe: StackRecipe) -> CNWIStackBuilder:
+    return CNWIStackBuilder(recipe)
+
+
+def cnwi_stack(aoi, s1, s2, fourier, terrain):
+    """the CNWI stack of one AOI, calls with the same sources share a builder.
+    Profiled as CNWIStackBuilder.build"""
+    return _builder(StackRecipe(s1, s2, fourier, terrain)).build(aoi)
@@ -1,120 +1,183 @@
 from math import pi
+from typing import List, Union
 import ee
 
-from ..calc import NDVI
+from ..calc import Calculator, NDVI
+from ..graph import instrument
+
+BandName = str
+
+
+def harmonic_names(cycles: int) -> List[BandName]:
+    """names of the cosine and sine terms of every cycle"""
+    cos = [f"cos_{i}" for i in range(1, cycles + 1)]
+    sin = [f"sin_{i}" for i in range(1, cycles + 1)]
+    return cos + sin
+
+
+def time_band(image: ee.Image, omega: float = 1.0) -> ee.Image:
+    """years since 1970 of the image in radians, as a float band named t"""
+    date = ee.Date(image.get("system:time_start"))
+    years = date.difference(ee.Date("1970-01-01"), "year")
+    return ee.Image(years.multiply(2 * pi * omega)).rename("t").float()
+
+
+def harmonic_bands(time: ee.Image, cycles: int) -> ee.Image:
+    """cos_1..cos_k and sin_1..sin_k of the t band. The t band is multiplied by
+    one constant image with a band per frequency, so all terms come from a
+    single cos() and sin()"""
+    frequencies = ee.Image.constant(list(range(1, cycles + 1)))
+    angles = time.multiply(frequencies)
+    names = harmonic_names(cycles)
+    return angles.cos().rename(names[:cycles]).addBands(angles.sin().rename(names[cycles:]))
+
+
+def harmonic_terms(image: ee.Image, cycles: int, omega: float = 1.0) -> ee.Image:
+    """adds the constant, t and harmonic bands in one step"""
+    time = time_band(image, omega)
+    return image.addBands(ee.Image.cat(ee.Image.constant(1), time, harmonic_bands(time, cycles)))
 
 
 class HarmonicsCollection(ee.ImageCollection):
-    def __init__(self, args, dependent = NDVI(), cycles: int = 3):
+    """ImageCollection that keeps track of the dependent band and the
+    independent bands (constant, t and the harmonic terms) of a harmonic
+    regression. Every method returns a new HarmonicsCollection."""
+
+    def __init__(
+        self,
+        args,
+        dependent: Union[Calculator, BandName] = NDVI(),
+        cycles: int = 3,
+        indep: List[BandName] = None,
+    ):
         super().__init__(args)
-        self.indep = ['constant', 't']
-        self.dep = dependent
+        self.indep = ['constant', 't'] if indep is None else list(indep)
+        self.dep = getattr(dependent, "name", dependent)
         self.cycles = cycles
 
-    def addDependent(self, calc):
-        self.dep = calc.name
-        return self.map(calc)
+    def _wrap(self, col: ee.ImageCollection, **changes) -> "HarmonicsCollection":
+        attrs = {"dependent": self.dep, "cycles": self.cycles, "indep": self.indep}
+        attrs.update(changes)
+        return HarmonicsCollection(col, **attrs)
+
+    @property
+    def harmonics(self) -> List[BandName]:
+        """names of the cosine and sine terms of every cycle"""
+        return harmonic_names(self.cycles)
+
+    def addDependent(self, calc: Calculator):
+        return self._wrap(self.map(calc), dependent=calc.name)
 
     def addConstant(self):
         def _addConstant(image: ee.Image):
             return image.addBands(ee.Image.constant(1))
-        return self.map(_addConstant)
+        return self._wrap(self.map(_addConstant))
 
     def addTime(self, omega: float = 1.0):
         def _addTime(image: ee.Image):
-            date = ee.Date(image.get("system:time_start"))
-            years = date.difference(ee.Date("1970-01-01"), "year")
-            time_radians = ee.Image(years.multiply(2 * pi * omega).rename("t"))
-            return image.addBands(time_radians.float())
-        return self.map(_addTime)
+            return image.addBands(time_band(image, omega))
+        return self._wrap(self.map(_addTime))
 
     def addHarmonics(self):
-        sin = [f"cos_{i}" for i in range(1, self.cycles + 1)]
-        cos = [f"sin_{i}" for i in range(1, self.cycles + 1)]
-
         def _addHarmonics(image: ee.Image):
-            frequencies = ee.Image.constant(self.cycles)
-            time = ee.Image(image).select("t")
-            cosines = time.multiply(frequencies).cos().rename(cos)
-            sines = time.multiply(frequencies).sin().rename(sin)
-            return image.addBands(cosines).addBands(sines)
+            return image.addBands(harmonic_bands(ee.Image(image).select("t"), self.cycles))
+
+        return self._wrap(self.map(_addHarmonics), indep=self._with_harmonics())
 
-        return self.map(_addHarmonics)
+    def addHarmonicTerms(self, omega: float = 1.0):
+        """addConstant, addTime and addHarmonics in a single map"""
+        def _addHarmonicTerms(image: ee.Image):
+            return harmonic_terms(image, self.cycles, omega)
+
+        return self._wrap(self.map(_addHarmonicTerms), indep=self._with_harmonics())
+
+    def _with_harmonics(self) -> List[BandName]:
+        return [b for b in self.indep if b not in self.harmonics] + self.harmonics
 
 
 class HarmonicModel:
+    """Linear regression of the dependent band on the independent bands of a
+    HarmonicsCollection. The collection is reduced once, the coefficient image
+    is built from that reduction the first time it is needed and reused."""
+
     def __init__(self, col: HarmonicsCollection) -> None:
         self.col = col
         self._model = None
         self._coefficients = None
 
     @property
-    def model(self) -> ee.ComputedObject:
+    def model(self) -> ee.Image:
         return self._model
-    
+
     @property
     def coefficients(self) -> ee.Image:
+        """one <band>_coeff band per independent band"""
+        if self._coefficients is None:
+            self.apply()
         return self._coefficients
 
-    def fit(self) -> None:
-        """ Sets the trend property. Reduces the ImageCollection to an image by Linear Regression """
-        self._model = self.col.select(self.col.indep.append(self.col.dep).reduce(
-            ee.Reducer.linearRegression(len(self.col.ind), 1)
-        ))
-        return None
-    
-    def apply(self) -> None:
+    def fit(self) -> "HarmonicModel":
+        """ Sets the model property. Reduces the ImageCollection to an image by Linear Regression """
         if self._model is None:
-            raise Exception("Fit must be run before you can apply the model")
-        
-        self._coefficients = (
-            self.col.select('coefficients')
-            .arrayProject([0])
-            .arrayFlatten([self.col.indep], ['coeff'])
-        )
-
-        return None
-
-
-class FourierTransform:
-    def __init__(self, model: HarmonicModel) -> None:
-        self.model = model
-
-        # TODO add validators, need strict types
-
-    def addCoefficients(self, coefficients: ee.Image) -> None:
-        self.col = self.col.map(lambda image: image.addBands(coefficients))
+            indep = list(self.col.indep)
+            self._model = self.col.select(indep + [self.col.dep]).reduce(
+                ee.Reducer.linearRegression(len(indep), 1)
+            )
         return self
 
-    def addAmplitude(self, mode: int):
-        def mk_amplitude(image):
-            sin_coef = image.select(f"sin_{mode}_coeff")
-            cos_coef = image.select(f"cos_{mode}_coeff")
-            amp = sin_coef.atan2(cos_coef).rename(f"amp_{mode}")
-            return image.addBands(amp)
+    def apply(self) -> "HarmonicModel":
+        if self._model is None:
+            raise Exception("Fit must be run before you can apply the model")
 
-        self.col = self.col.map(mk_amplitude)
+        if self._coefficients is None:
+            indep = list(self.col.indep)
+            self._coefficients = (
+                self._model.select('coefficients')
+                .arrayProject([0])
+                .arrayFlatten([indep])
+                .rename([f"{name}_coeff" for name in indep])
+            )
         return self
 
-    def addPhase(self, mode: int):
-        def mk_phase(image):
-            sin_coef = image.select(f"sin_{mode}")
-            cos_coef = image.select(f"cos_{mode}")
-            phase = sin_coef.atan2(cos_coef).rename(f"phase_{mode}")
-            return image.addBands(phase)
 
-        self.col = self.col.map(mk_phase)
-        return self
-
-    def build(self):
-        # build steps
+class FourierTransform:
+    """Amplitude and phase of every cycle of a fitted HarmonicModel. Everything
+    is derived from the coefficient image, the collection is not mapped again."""
 
-        coeff_col = self.addCoefficients(self.model.coefficients)
+    def __init__(self, model: HarmonicModel) -> None:
+        self.model = model
+        self._image = None
 
-        # 1. add coeff to collection
-        for cycle in list(range(0, self.col.cycles)):
-            coeff_col.addAmpliture(cycle)
-            coeff_col.addPhase(cycle)
-        
-        self.col = coeff_col.median().unitScale(-1, 1)
-        return self
+    @property
+    def cycles(self) -> int:
+        return self.model.col.cycles
+
+    def amplitude(self) -> ee.Image:
+        """amp_<cycle> bands, the magnitude of the sine and cosine coefficients"""
+        sin, cos = self._terms()
+        return sin.hypot(cos).rename([f"amp_{i}" for i in range(1, self.cycles + 1)])
+
+    def phase(self) -> ee.Image:
+        """phase_<cycle> bands in radians"""
+        sin, cos = self._terms()
+        return sin.atan2(cos).rename([f"phase_{i}" for i in range(1, self.cycles + 1)])
+
+    def _terms(self):
+        coefficients = self.model.coefficients
+        sin = coefficients.select([f"sin_{i}_coeff" for i in range(1, self.cycles + 1)])
+        cos = coefficients.select([f"cos_{i}_coeff" for i in range(1, self.cycles + 1)])
+        return sin, cos
+
+    @instrument()
+    def build(self) -> ee.Image:
+        """the coefficients, amplitudes and phases in one image, scaled from
+        [-1, 1] to [0, 1]"""
+        if self._image is None:
+            if self.model.model is None:
+                self.model.fit()
+            self._image = (
+                self.model.coefficients.addBands(self.amplitude())
+                .addBands(self.phase())
+                .unitScale(-1, 1)
+            )
+        return self._image
@@ -0,0 +1,87 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from eeng.client import assessment
+from eeng.client.assessment import (
+    confusion_matrix_from_file,
+    confusion_matrices_from_files,
+)
+
+ASSESSMENT = {
+    "cfm": [[50, 3, 2], [4, 40, 6], [1, 5, 39]],
+    "labels": ["bog", "fen", "marsh"],
+    "pro": [0.9091, 0.8, 0.8667],
+    "con": [0.9091, 0.8333, 0.8298],
+    "acc": 0.8533,
+}
+
+
+def feature(key):
+    return {"type": "Feature", "geometry": None, "properties": {key: ASSESSMENT[key]}}
+
+
+def write_geojson(path):
+    with open(path, "w") as f:
+        json.dump({"type": "FeatureCollection", "features": [feature(k) for k in ASSESSMENT]}, f)
+
+
+class TestConfusionMatrixFromFile(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.geojson = os.path.join(self.tmp.name, "region_a.geojson")
+        write_geojson(self.geojson)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_table_layout(self):
+        cfm = confusion_matrix_from_file(self.geojson)
+        self.assertEqual(list(cfm.columns), ["bog", "fen", "marsh", "Producers"])
+        self.assertEqual(list(cfm.index), ["bog", "fen", "marsh", "Consumers", "Overall Accuracy"])
+        self.assertEqual(cfm.loc["fen", "marsh"], 6)
+        self.assertEqual(cfm.loc["bog", "Producers"], 90.91)
+        self.assertEqual(cfm.loc["Consumers", "fen"], 83)
+        self.assertEqual(cfm.loc["Overall Accuracy", "bog"], 85.33)
+        self.assertTrue(np.isnan(cfm.loc["Consumers", "Producers"]))
+
+    def test_line_delimited(self):
+        path = os.path.join(self.tmp.name, "region_b.geojsonl")
+        with open(path, "w") as f:
+            for key in ASSESSMENT:
+                f.write(json.dumps(feature(key)) + "\n")
+        pd.testing.assert_frame_equal(
+            confusion_matrix_from_file(path), confusion_matrix_from_file(self.geojson)
+        )
+
+    @unittest.skipIf(assessment.ijson is None, "ijson is not installed")
+    def test_streamed_geojson(self):
+        streamed = confusion_matrix_from_file(self.geojson)
+        with mock.patch.object(assessment, "ijson", None):
+            loaded = confusion_matrix_from_file(self.geojson)
+        pd.testing.assert_frame_equal(streamed, loaded)
+
+    def test_stacked_regions(self):
+        write_geojson(os.path.join(self.tmp.name, "region_b.geojson"))
+        stacked = confusion_matrices_from_files(self.tmp.name)
+        self.assertEqual(list(stacked.index.get_level_values("region").unique()), ["region_a", "region_b"])
+        pd.testing.assert_frame_equal(
+            stacked.loc["region_b"], confusion_matrix_from_file(self.geojson)
+        )
+
+    def test_stacked_regions_in_process_pool(self):
+        write_geojson(os.path.join(self.tmp.name, "region_b.geojson"))
+        pattern = os.path.join(self.tmp.name, "*.geojson")
+        pd.testing.assert_frame_equal(
+            confusion_matrices_from_files(pattern, processes=2),
+            confusion_matrices_from_files(pattern),
+        )
+
+    def test_no_files(self):
+        with self.assertRaises(FileNotFoundError):
+            confusion_matrices_from_files(os.path.join(self.tmp.name, "*.csv"))
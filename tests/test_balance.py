@@ -0,0 +1,149 @@
+import random
+import types
+import unittest
+from collections import Counter
+from unittest import mock
+
+from eeng.server import tables
+from eeng.server.tables import RANDOM_COLUMN, TrainingPoints
+
+
+class FakeList(list):
+    def distinct(self):
+        return FakeList(dict.fromkeys(self))
+
+    def map(self, func):
+        return FakeList(func(v) for v in self)
+
+    def size(self):
+        return len(self)
+
+
+class FakeFeature(dict):
+    def set(self, prop, value):
+        return FakeFeature(self, **{prop: value})
+
+
+class FakeCollection:
+    """the few FeatureCollection methods balance uses, over property dicts"""
+
+    def __init__(self, features) -> None:
+        self.features = list(features)
+
+    def filter(self, predicate):
+        return FakeCollection(f for f in self.features if predicate(f))
+
+    def size(self):
+        return len(self.features)
+
+    def randomColumn(self, column, seed):
+        rng = random.Random(seed)
+        return FakeCollection({**f, column: rng.random()} for f in self.features)
+
+    def limit(self, n, prop):
+        return FakeCollection(sorted(self.features, key=lambda f: f[prop])[:n])
+
+    def aggregate_array(self, prop):
+        return FakeList(f[prop] for f in self.features)
+
+    def aggregate_histogram(self, prop):
+        # Earth Engine histograms are keyed by strings
+        return {str(k): v for k, v in Counter(f[prop] for f in self.features).items()}
+
+    def flatten(self):
+        return FakeCollection(f for c in self.features for f in c.features)
+
+    def map(self, func):
+        return FakeCollection(func(FakeFeature(f)) for f in self.features)
+
+
+fake_ee = types.SimpleNamespace(
+    Filter=types.SimpleNamespace(
+        # strict comparison, a string key never matches a numeric label
+        eq=lambda prop, value: lambda f: f[prop] == value and type(f[prop]) is type(value),
+    ),
+    FeatureCollection=FakeCollection,
+    List=types.SimpleNamespace(sequence=lambda start, end: FakeList(range(start, end + 1))),
+    Dictionary=types.SimpleNamespace(fromLists=lambda keys, values: dict(zip(keys, values))),
+)
+
+
+class TestBalanceKeys(unittest.TestCase):
+    sizes = (2000, 300, 40)
+
+    def points(self, labels):
+        counts = dict(zip(labels, self.sizes))
+        return FakeCollection({"class": label} for label, n in counts.items() for _ in range(n))
+
+    def balanced(self, labels):
+        with mock.patch.object(tables, "ee", fake_ee):
+            points = TrainingPoints(self.points(labels), "class").balance(100, seed=1)
+        return Counter(f["class"] for f in points.points.features), points
+
+    def check(self, labels):
+        counts, points = self.balanced(labels)
+        self.assertEqual(set(counts), set(labels))
+        # classes below max_per_class keep every point
+        for label, size in zip(labels, self.sizes):
+            self.assertEqual(counts[label], min(100, size))
+        self.assertTrue(all(RANDOM_COLUMN in f for f in points.points.features))
+
+    def test_numeric_labels(self):
+        self.check([1, 2, 3])
+
+    def test_string_labels(self):
+        self.check(["upland", "fen", "bog"])
+
+    def test_unbalanced_histogram_is_kept(self):
+        _, points = self.balanced([1, 2, 3])
+        self.assertEqual(points._unbalanced, {"1": 2000, "2": 300, "3": 40})
+
+    def test_keeps_the_lowest_draws(self):
+        _, points = self.balanced([1, 2, 3])
+        with mock.patch.object(tables, "ee", fake_ee):
+            drawn = self.points([1, 2, 3]).randomColumn(RANDOM_COLUMN, 1)
+        lowest = sorted(f[RANDOM_COLUMN] for f in drawn.features if f["class"] == 1)[:100]
+        kept = sorted(f[RANDOM_COLUMN] for f in points.points.features if f["class"] == 1)
+        self.assertEqual(kept, lowest)
+
+    def test_replacing_points_drops_the_unbalanced_histogram(self):
+        _, points = self.balanced([1, 2, 3])
+        points.points = self.points([1, 2, 3])
+        self.assertIsNone(points._unbalanced)
+        with mock.patch.object(tables, "get_info", side_effect=lambda objects, fetcher: objects):
+            self.assertEqual(set(points.fetchHistogram()), {"histogram"})
+
+
+class TestPointsMemo(unittest.TestCase):
+    def setUp(self) -> None:
+        patcher = mock.patch.object(tables, "ee", fake_ee)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.points = TrainingPoints(
+            FakeCollection({"class": label} for label in ["bog", "fen", "bog", "marsh"]), "class"
+        )
+
+    def test_lookup_is_memoized_per_points(self):
+        self.assertIs(self.points.labels, self.points.labels)
+        self.assertIs(self.points.lookup, self.points.lookup)
+        self.assertEqual(self.points.lookup, {"bog": 1, "fen": 2, "marsh": 3})
+
+    def test_replacing_points_rebuilds_the_lookup(self):
+        labels, lookup = self.points.labels, self.points.lookup
+        self.points.remap({"bog": "wetland", "fen": "wetland", "marsh": "marsh"})
+        self.assertIsNot(self.points.labels, labels)
+        self.assertEqual(self.points.lookup, {"wetland": 1, "marsh": 2})
+        self.assertIsNot(self.points.lookup, lookup)
+
+    def test_client_lookup_is_fetched_once_per_points(self):
+        fetch = mock.Mock(side_effect=lambda objects, fetcher: objects)
+        with mock.patch.object(tables, "get_info", fetch):
+            self.assertIs(self.points.clientLookup(), self.points.clientLookup())
+            self.assertEqual(fetch.call_count, 1)
+            self.points.points = self.points.points.map(lambda f: f)
+            self.points.clientLookup()
+            self.assertEqual(fetch.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
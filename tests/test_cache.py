@@ -0,0 +1,72 @@
+import os
+import tempfile
+import time
+import unittest
+
+from eeng.server.cache import MISSING, ResultCache, graph_key
+from eeng.server.fetch import BatchFetcher, FakeTransport
+
+
+class FakeGraph:
+    """stands in for an ee.ComputedObject, only the serialized graph matters"""
+
+    def __init__(self, expression: str, value=None) -> None:
+        self.expression = expression
+        self.value = value
+
+    def serialize(self) -> str:
+        return self.expression
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.sqlite")
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_identical_graph_is_fetched_once(self):
+        transport = FakeTransport(resolver=lambda obj: obj.value)
+        fetcher = BatchFetcher(transport, cache=ResultCache(self.path))
+        first = fetcher.fetch({"lookup": FakeGraph('{"a": 1}', {"bog": 1})})
+        second = fetcher.fetch({"again": FakeGraph('{"a": 1}', {"bog": 1})})
+        self.assertEqual(first["lookup"], second["again"])
+        self.assertEqual(transport.round_trips, 1)
+        self.assertEqual(fetcher.cache.hits, 1)
+        self.assertEqual(fetcher.cache.misses, 1)
+
+    def test_persists_across_instances(self):
+        ResultCache(self.path).put("key", [1, 2, 3])
+        cache = ResultCache(self.path)
+        self.assertEqual(cache.get("key"), [1, 2, 3])
+        self.assertIs(cache.get("other"), MISSING)
+        self.assertEqual(cache.stats, {"hits": 1, "misses": 1, "entries": 1})
+
+    def test_ttl_expires_entries(self):
+        cache = ResultCache(self.path, ttl=0.01)
+        cache.put("key", 1)
+        time.sleep(0.05)
+        self.assertIs(cache.get("key"), MISSING)
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_eviction_by_entries(self):
+        cache = ResultCache(self.path, max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+
+    def test_lru_eviction_by_bytes(self):
+        cache = ResultCache(self.path, max_bytes=20)
+        cache.put("a", "x" * 10)
+        cache.put("b", "y" * 10)
+        self.assertNotIn("a", cache)
+        self.assertIn("b", cache)
+
+    def test_graph_key(self):
+        self.assertEqual(graph_key(FakeGraph("{}")), graph_key(FakeGraph("{}")))
+        self.assertNotEqual(graph_key(FakeGraph("{}")), graph_key(FakeGraph("[]")))
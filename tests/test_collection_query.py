@@ -0,0 +1,121 @@
+import json
+import types
+import unittest
+from collections import OrderedDict
+from unittest import mock
+
+from eeng.server import collections
+from eeng.server.collections import CollectionQuery
+
+
+class FakeComputed:
+    """a computed object that serializes to its graph"""
+
+    def __init__(self, *graph) -> None:
+        self.graph = graph
+
+    def serialize(self):
+        return json.dumps(self.graph, default=lambda v: v.graph)
+
+
+class FakeCollection(FakeComputed):
+    def filter(self, combined):
+        return FakeCollection("filter", self, combined)
+
+
+fake_ee = types.SimpleNamespace(
+    ComputedObject=FakeComputed,
+    ImageCollection=FakeCollection,
+    Filter=types.SimpleNamespace(
+        bounds=lambda aoi: ("bounds", aoi.graph),
+        date=lambda start, end: ("date", start, end),
+        listContains=lambda prop, value: ("listContains", prop, value),
+        eq=lambda prop, value: ("eq", prop, value),
+        lt=lambda prop, value: ("lt", prop, value),
+        And=lambda *filters: ("and",) + filters,
+    ),
+)
+
+
+def point():
+    return FakeComputed("Point", -77.3619, 44.1786)
+
+
+class TestCollectionQuery(unittest.TestCase):
+    def setUp(self) -> None:
+        for patcher in (
+            mock.patch.object(collections, "ee", fake_ee),
+            mock.patch.object(collections, "_QUERY_CACHE", OrderedDict()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def query(self, **kwargs):
+        return CollectionQuery("COPERNICUS/S2_SR", "2019-01-01", "2019-12-31", point(), **kwargs)
+
+    def test_filter_order(self):
+        """bounds and date come first whatever the constraints are"""
+        query = CollectionQuery(
+            "COPERNICUS/S1_GRD",
+            "2019-01-01",
+            "2019-12-31",
+            point(),
+            polarisations=["VV", "VH"],
+            mode="IW",
+            orbit_pass="ASCENDING",
+            cloud_cover=10,
+            filters=[("extra",)],
+        )
+        self.assertEqual(
+            query.filter_list(),
+            [
+                ("bounds", point().graph),
+                ("date", "2019-01-01", "2019-12-31"),
+                ("listContains", "transmitterReceiverPolarisation", "VV"),
+                ("listContains", "transmitterReceiverPolarisation", "VH"),
+                ("eq", "instrumentMode", "IW"),
+                ("eq", "orbitProperties_pass", "ASCENDING"),
+                ("lt", "CLOUDY_PIXEL_PERCENTAGE", 10),
+                ("extra",),
+            ],
+        )
+
+    def test_filter_is_one_and(self):
+        self.assertIsNone(CollectionQuery("COPERNICUS/S2_SR").filter())
+        self.assertEqual(CollectionQuery("COPERNICUS/S2_SR", mode="IW").filter(), ("eq", "instrumentMode", "IW"))
+        self.assertEqual(self.query(cloud_cover=10).filter()[0], "and")
+
+    def test_key(self):
+        # geometries are keyed by their graph and lists by their items
+        self.assertEqual(self.query(polarisations=["VV"]).key(), self.query(polarisations=("VV",)).key())
+        self.assertNotEqual(self.query().key(), self.query(cloud_cover=10).key())
+        other = CollectionQuery("COPERNICUS/S2_SR", "2019-01-01", "2019-12-31", FakeComputed("Point", 0, 0))
+        self.assertNotEqual(self.query().key(), other.key())
+
+    def test_identical_queries_are_memoized(self):
+        first = self.query(cloud_cover=10).build()
+        self.assertIs(self.query(cloud_cover=10).build(), first)
+        self.assertIsNot(self.query(cloud_cover=20).build(), first)
+
+    def test_memo_is_keyed_by_collection_type(self):
+        class Subclass(FakeCollection):
+            pass
+
+        built = self.query().build(Subclass("COPERNICUS/S2_SR"))
+        self.assertIsNot(self.query().build(FakeCollection("COPERNICUS/S2_SR")), built)
+        self.assertIsInstance(built, FakeCollection)
+
+    def test_least_recently_used_query_is_evicted(self):
+        with mock.patch.object(collections, "QUERY_CACHE_SIZE", 2):
+            first = self.query(cloud_cover=10).build()
+            second = self.query(cloud_cover=20).build()
+            # using first again makes second the least recently used
+            self.assertIs(self.query(cloud_cover=10).build(), first)
+            self.query(cloud_cover=30).build()
+            self.assertEqual(len(collections._QUERY_CACHE), 2)
+            self.assertIs(self.query(cloud_cover=10).build(), first)
+            self.assertIsNot(self.query(cloud_cover=20).build(), second)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import json
+import os
+import tempfile
+import unittest
+
+from eeng.server.export import (
+    COMPLETED,
+    FAILED,
+    ExportJob,
+    ExportScheduler,
+    FakeTaskBackend,
+    TaskLimitError,
+)
+
+
+class RefusingBackend(FakeTaskBackend):
+    """refuses the first start calls, like an account over its task limit"""
+
+    def __init__(self, refusals: int = 1) -> None:
+        super().__init__()
+        self.refusals = refusals
+
+    def start(self, job):
+        if self.refusals:
+            self.refusals -= 1
+            raise TaskLimitError("Too many tasks already in the queue")
+        return super().start(job)
+
+
+class BrokenBackend(FakeTaskBackend):
+    """fails to start every task"""
+
+    def start(self, job):
+        raise RuntimeError("invalid region")
+
+
+class TestExportScheduler(unittest.TestCase):
+    def setUp(self) -> None:
+        self.jobs = [ExportJob(f"tile_{i}", obj=None) for i in range(7)]
+        self.sleeps = []
+
+    def scheduler(self, backend, **kwargs):
+        return ExportScheduler(backend, sleep=self.sleeps.append, poll_interval=1, **kwargs)
+
+    def test_limits_tasks_in_flight(self):
+        backend = FakeTaskBackend(polls=3)
+        states = self.scheduler(backend, max_concurrent=3).run(self.jobs)
+        self.assertTrue(all(s.status == COMPLETED for s in states.values()))
+        self.assertEqual(backend.max_in_flight, 3)
+        self.assertEqual(len(backend.started), 7)
+
+    def test_polls_with_backoff(self):
+        backend = FakeTaskBackend(polls=5)
+        self.scheduler(backend, max_concurrent=10, max_poll_interval=4).run(self.jobs[:1])
+        self.assertEqual(self.sleeps, [1, 2, 4, 4])
+
+    def test_retries_failed_tasks(self):
+        backend = FakeTaskBackend(outcomes={"tile_0": [FAILED, COMPLETED], "tile_1": [FAILED] * 3})
+        states = self.scheduler(backend, max_retries=1).run(self.jobs)
+        self.assertEqual(states["tile_0"].status, COMPLETED)
+        self.assertEqual(states["tile_0"].attempts, 2)
+        self.assertEqual(states["tile_1"].status, FAILED)
+        self.assertEqual(states["tile_1"].attempts, 2)
+
+    def test_refused_start_is_retried(self):
+        states = self.scheduler(RefusingBackend()).run(self.jobs[:2])
+        self.assertTrue(all(s.status == COMPLETED for s in states.values()))
+
+    def test_throttling_does_not_use_retries(self):
+        states = self.scheduler(RefusingBackend(refusals=5), max_retries=1).run(self.jobs[:1])
+        self.assertEqual(states["tile_0"].status, COMPLETED)
+        self.assertEqual(states["tile_0"].attempts, 1)
+
+    def test_start_errors_use_retries(self):
+        states = self.scheduler(BrokenBackend(), max_retries=1).run(self.jobs[:1])
+        self.assertEqual(states["tile_0"].status, FAILED)
+        self.assertEqual(states["tile_0"].attempts, 2)
+
+    def test_resume_skips_completed_jobs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "state.json")
+            self.scheduler(FakeTaskBackend(), state_path=path).run(self.jobs[:4])
+            with open(path) as f:
+                self.assertEqual(len(json.load(f)), 4)
+
+            backend = FakeTaskBackend()
+            states = self.scheduler(backend, state_path=path).run(self.jobs)
+            self.assertEqual(backend.started, ["tile_4", "tile_5", "tile_6"])
+            self.assertEqual(len(states), 7)
+
+    def test_duplicate_names(self):
+        with self.assertRaises(ValueError):
+            self.scheduler(FakeTaskBackend()).run([ExportJob("a", None), ExportJob("a", None)])
@@ -0,0 +1,77 @@
+import unittest
+
+from eeng.server.fetch import BatchFetcher, FakeTransport, fetch_pages, get_info
+
+
+class TestBatchFetcher(unittest.TestCase):
+    def setUp(self) -> None:
+        self.objects = {f"obj_{i}": i for i in range(10)}
+
+    def test_single_round_trip(self):
+        transport = FakeTransport(resolver=lambda obj: obj * 2)
+        results = get_info(self.objects, BatchFetcher(transport))
+        self.assertEqual(transport.round_trips, 1)
+        self.assertEqual(results, {k: v * 2 for k, v in self.objects.items()})
+
+    def test_chunks_are_fetched_concurrently(self):
+        transport = FakeTransport(latency=0.05)
+        fetcher = BatchFetcher(transport, chunk_size=3, max_workers=4)
+        results = fetcher.fetch(self.objects)
+        self.assertEqual(transport.round_trips, 4)
+        self.assertEqual(sorted(len(r) for r in transport.requests), [1, 3, 3, 3])
+        self.assertEqual(results, self.objects)
+
+    def test_empty_request_has_no_round_trip(self):
+        transport = FakeTransport()
+        self.assertEqual(BatchFetcher(transport).fetch({}), {})
+        self.assertEqual(transport.round_trips, 0)
+
+    def test_invalid_chunk_size(self):
+        with self.assertRaises(ValueError):
+            BatchFetcher(FakeTransport(), chunk_size=0)
+
+
+class FakeCatalogue:
+    """stands in for a collection, size and toList return request specs that
+    the resolver turns into values"""
+
+    def __init__(self, n: int) -> None:
+        self.n = n
+
+    def size(self):
+        return ("size",)
+
+    def toList(self, count, offset=0):
+        return ("list", count, offset)
+
+    def resolve(self, request):
+        if request[0] == "size":
+            return self.n
+        _, count, offset = request
+        return [{"id": i} for i in range(offset, min(offset + count, self.n))]
+
+
+class TestFetchPages(unittest.TestCase):
+    def setUp(self) -> None:
+        self.catalogue = FakeCatalogue(2500)
+        self.transport = FakeTransport(resolver=self.catalogue.resolve)
+        self.fetcher = BatchFetcher(self.transport)
+
+    def test_pages_in_collection_order(self):
+        features = fetch_pages(self.catalogue, page_size=1000, fetcher=self.fetcher, max_workers=3)
+        self.assertEqual([f["id"] for f in features], list(range(2500)))
+        # the size and three pages
+        self.assertEqual(self.transport.round_trips, 4)
+        self.assertEqual(sorted(r[0] for r in self.transport.requests[1:]), ["page_0", "page_1000", "page_2000"])
+
+    def test_known_size_skips_the_size_request(self):
+        features = fetch_pages(self.catalogue, page_size=500, fetcher=self.fetcher, size=1200)
+        self.assertEqual(len(features), 1200)
+        self.assertEqual(self.transport.round_trips, 3)
+
+    def test_empty_collection(self):
+        self.assertEqual(fetch_pages(FakeCatalogue(0), fetcher=BatchFetcher(FakeTransport(FakeCatalogue(0).resolve))), [])
+
+    def test_invalid_page_size(self):
+        with self.assertRaises(ValueError):
+            fetch_pages(self.catalogue, page_size=0, fetcher=self.fetcher)
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry import box
+
+from eeng.client.footprints import FootprintIndex, scene_id
+
+
+def footprint_table(n: int, seed: int = 0) -> pd.DataFrame:
+    """a fake footprint export with GeoJSON footprints like a csv export"""
+    rng = np.random.default_rng(seed)
+    x, y = rng.uniform(-80, -70, n), rng.uniform(42, 48, n)
+    boxes = [box(a, b, a + 2.5, b + 1.5) for a, b in zip(x, y)]
+    dates = pd.Timestamp("2019-01-01") + pd.to_timedelta(rng.integers(0, 365, n), unit="D")
+    return pd.DataFrame(
+        {
+            "system_id": [f"COPERNICUS/S1_GRD/S1A_IW_GRDH_{i:05d}" for i in range(n)],
+            "date": dates.strftime("%Y-%m-%d"),
+            "relativeOrbitNumber_start": rng.integers(1, 175, n),
+            ".geo": shapely.to_geojson(np.array(boxes, dtype=object)),
+        }
+    )
+
+
+def brute_force(table, aoi, start=None, end=None, orbits=None):
+    geometries = shapely.from_geojson(table[".geo"].to_numpy())
+    dates = pd.to_datetime(table["date"])
+    ids = []
+    for i, geometry in enumerate(geometries):
+        if not geometry.intersects(aoi):
+            continue
+        if start is not None and dates[i] < pd.Timestamp(start):
+            continue
+        if end is not None and dates[i] >= pd.Timestamp(end):
+            continue
+        if orbits is not None and table["relativeOrbitNumber_start"][i] not in orbits:
+            continue
+        ids.append(scene_id(table["system_id"][i]))
+    return sorted(ids)
+
+
+class TestFootprintIndex(unittest.TestCase):
+    def setUp(self):
+        self.table = footprint_table(500)
+        self.index = FootprintIndex.from_frame(self.table)
+        rng = np.random.default_rng(1)
+        self.aois = [box(a, b, a + 0.2, b + 0.2) for a, b in zip(rng.uniform(-80, -70, 50), rng.uniform(42, 48, 50))]
+
+    def test_scene_id(self):
+        self.assertEqual(scene_id("COPERNICUS/S2_SR/20190601T160901_T17TQJ"), "20190601T160901_T17TQJ")
+        self.assertEqual(scene_id("20190601T160901_T17TQJ"), "20190601T160901_T17TQJ")
+
+    def test_query_bulk_matches_brute_force(self):
+        results = self.index.query_bulk(self.aois)
+        self.assertEqual(len(results), len(self.aois))
+        for aoi, ids in zip(self.aois, results):
+            self.assertEqual(sorted(ids), brute_force(self.table, aoi))
+
+    def test_date_and_orbit_filters(self):
+        orbits = list(range(1, 90))
+        results = self.index.query_bulk(self.aois, start="2019-04-01", end="2019-09-01", orbits=orbits)
+        for aoi, ids in zip(self.aois, results):
+            self.assertEqual(sorted(ids), brute_force(self.table, aoi, "2019-04-01", "2019-09-01", orbits))
+
+    def test_scenes_are_distinct(self):
+        scenes = self.index.scenes(self.aois)
+        expected = sorted({i for aoi in self.aois for i in brute_force(self.table, aoi)})
+        self.assertEqual(scenes, expected)
+        self.assertEqual(self.index.query(self.aois[0]), sorted(brute_force(self.table, self.aois[0])))
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "footprints.npz")
+            self.index.save(path)
+            loaded = FootprintIndex.load(path)
+        np.testing.assert_array_equal(loaded.ids, self.index.ids)
+        np.testing.assert_array_equal(loaded.dates, self.index.dates)
+        np.testing.assert_array_equal(loaded.orbits, self.index.orbits)
+        self.assertTrue(all(shapely.equals(loaded.geometries, self.index.geometries)))
+        self.assertEqual(loaded.query_bulk(self.aois), self.index.query_bulk(self.aois))
+
+    def test_geodataframe_without_optional_columns(self):
+        frame = pd.DataFrame(
+            {"system_id": ["a", "b"], "geometry": [box(0, 0, 1, 1), box(5, 5, 6, 6)]}
+        )
+        index = FootprintIndex.from_frame(frame)
+        self.assertEqual(index.query(box(0.5, 0.5, 2, 2)), ["a"])
+        self.assertEqual(index.query(box(0.5, 0.5, 2, 2), start="2019-01-01"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from eeng.client import forest
+from eeng.client.forest import LocalRandomForest
+
+
+def samples(n: int = 300, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    y = rng.choice(["bog", "fen", "marsh"], n)
+    centres = {"bog": 0.0, "fen": 1.0, "marsh": 2.0}
+    X = np.array([centres[c] for c in y])[:, None] + rng.normal(0, 0.4, (n, 4))
+    return X, y
+
+
+class TestLocalRandomForest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.X, self.y = samples()
+
+    def test_parameter_mapping(self):
+        rf = LocalRandomForest(n_trees=10, var_per_split=2, min_leaf_pop=3, bag_frac=0.7, max_nodes=20, seed=4)
+        self.assertEqual(
+            rf.ee_params(),
+            {
+                "numberOfTrees": 10,
+                "variablesPerSplit": 2,
+                "minLeafPopulation": 3,
+                "bagFraction": 0.7,
+                "maxNodes": 20,
+                "seed": 4,
+            },
+        )
+        params = rf.sklearn_params()
+        self.assertEqual(params["n_estimators"], 10)
+        self.assertEqual(params["max_samples"], 0.7)
+        self.assertEqual(LocalRandomForest().sklearn_params()["max_features"], "sqrt")
+
+    def test_fit_predict(self):
+        rf = LocalRandomForest(n_trees=20).fit(self.X, self.y)
+        self.assertGreater(rf.score(self.X, self.y), 0.9)
+        with self.assertRaises(ValueError):
+            LocalRandomForest().predict(self.X)
+
+    def test_grid_search(self):
+        result = forest.grid_search(self.X, self.y, {"n_trees": [5, 20], "max_nodes": [2, None]})
+        self.assertEqual(len(result.results), 4)
+        self.assertEqual(result.results["score"].iloc[0], result.results["score"].max())
+        self.assertEqual(result.best_score, result.results["score"].max())
+        self.assertEqual(result.best_forest().params["n_trees"], result.best_params["n_trees"])
+
+    def test_grid_search_processes(self):
+        serial = forest.grid_search(self.X, self.y, {"n_trees": [5, 10]})
+        parallel = forest.grid_search(self.X, self.y, {"n_trees": [5, 10]}, processes=2)
+        self.assertEqual(serial.results["score"].tolist(), parallel.results["score"].tolist())
+
+    def test_random_search(self):
+        result = forest.random_search(self.X, self.y, {"n_trees": [5, 10], "min_leaf_pop": [1, 5]}, n_iter=10)
+        self.assertEqual(len(result.results), 4)
+        with self.assertRaises(ValueError):
+            forest.grid_search(self.X, self.y, {"trees": [5]})
+
+    def test_missing_sklearn(self):
+        with mock.patch.object(forest, "StratifiedKFold", None), mock.patch.object(forest, "_SklearnForest", None):
+            with self.assertRaises(ImportError):
+                forest.cross_validate({"n_trees": 5}, self.X, self.y)
+            with self.assertRaises(ImportError):
+                LocalRandomForest()
+
+
+if __name__ == "__main__":
+    unittest.main()
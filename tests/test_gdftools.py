@@ -0,0 +1,63 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from eeng.client.gdftools import extract_s1_swaths
+
+
+def footprints(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 365, n), unit="D")
+    return pd.DataFrame(
+        {
+            "date": dates.strftime("%Y-%m-%d"),
+            "relorb": rng.integers(1, 10, n),
+            "group_id": rng.integers(0, 20, n).astype(str),
+        }
+    )
+
+
+def reference(gdf, relobits):
+    """row wise implementation the vectorized version replaced"""
+    gdfc = gdf.copy()
+    gdfc["date"] = pd.to_datetime(gdfc["date"], format="%Y-%m-%d")
+    gdfc["doy"] = gdfc["date"].dt.dayofyear
+    gdfc = gdfc[gdfc["relorb"].isin(relobits)]
+    gdfc = gdfc[(gdfc["doy"] >= 135) & (gdfc["doy"] <= 243)]
+    gdfc["season"] = gdfc["doy"].apply(lambda x: "early" if x <= 181 else "mid")
+    gdfc["mid_point"] = gdfc.apply(
+        lambda x: (181 + 135) // 2 if x["season"] == "early" else (243 + 182) // 2, axis=1
+    )
+    gdfc["diff"] = gdfc.apply(lambda x: x["doy"] - x["mid_point"], axis=1)
+    gdfc["diff_abs"] = gdfc["diff"].abs()
+    diffs = gdfc.groupby(["group_id", "season"])["diff_abs"].min().reset_index()
+    frames = []
+    for _, d in diffs.iterrows():
+        frames.append(
+            gdfc[
+                (gdfc["group_id"] == d["group_id"])
+                & (gdfc["season"] == d["season"])
+                & (gdfc["diff_abs"] == d["diff_abs"])
+            ]
+        )
+    return pd.concat(frames, ignore_index=True)
+
+
+class TestExtractS1Swaths(unittest.TestCase):
+    def setUp(self) -> None:
+        self.gdf = footprints(2000)
+
+    def test_matches_row_wise_implementation(self):
+        expected = reference(self.gdf, [1, 2, 3])
+        out = extract_s1_swaths(self.gdf, [1, 2, 3])
+        pd.testing.assert_frame_equal(out, expected, check_dtype=False)
+
+    def test_custom_seasons(self):
+        seasons = {"spring": (100, 150), "summer": (151, 200), "fall": (201, 280)}
+        out = extract_s1_swaths(self.gdf, list(range(1, 10)), seasons=seasons)
+        self.assertEqual(set(out["season"]), set(seasons))
+        self.assertTrue(out["doy"].between(100, 280).all())
+        self.assertTrue((out.loc[out["season"] == "spring", "mid_point"] == 125).all())
+        closest = out.groupby(["group_id", "season"])["diff_abs"].nunique()
+        self.assertTrue((closest == 1).all())
@@ -0,0 +1,93 @@
+import unittest
+from unittest import mock
+
+from eeng.server import cfuncs
+from eeng.server.sampling import auto_tile_scale
+
+
+class FakeSize:
+    """a server side size, resolved by the fake get_info"""
+
+    def __init__(self, value) -> None:
+        self.value = value
+
+
+class FakeImage:
+    def __init__(self, bands) -> None:
+        self.bands = list(bands)
+        self.sampled = None
+
+    def select(self, bands):
+        return FakeImage(bands)
+
+    def bandNames(self):
+        return mock.Mock(size=lambda: FakeSize(len(self.bands)))
+
+    def sampleRegions(self, **kwargs):
+        self.sampled = kwargs
+        return self
+
+
+class FakePoints:
+    def __init__(self, n, props=("class", "x", "y", "note")) -> None:
+        self.n = n
+        self.props = list(props)
+
+    def select(self, props):
+        return FakePoints(self.n, props)
+
+    def size(self):
+        return FakeSize(self.n)
+
+
+def resolve(objects, fetcher=None):
+    return {k: v.value for k, v in objects.items()}
+
+
+class TestGenerateSamples(unittest.TestCase):
+    def setUp(self) -> None:
+        self.image = FakeImage([f"B{i}" for i in range(1, 13)])
+        self.points = FakePoints(2_000_000)
+        patcher = mock.patch.object(cfuncs, "get_info", side_effect=resolve)
+        self.get_info = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sample(self, **kwargs):
+        return cfuncs.generate_samples(self.points, self.image, props=["class"], **kwargs)
+
+    def test_passes_scale_and_tile_scale(self):
+        sample = self.sample(scale=30, tileScale=4)
+        self.assertEqual(sample.sampled["scale"], 30)
+        self.assertEqual(sample.sampled["tileScale"], 4)
+        self.assertEqual(sample.sampled["properties"], ["class"])
+        self.assertFalse(sample.sampled["geometries"])
+        self.get_info.assert_not_called()
+
+    def test_selects_bands(self):
+        sample = self.sample(bands=["B2", "B8"])
+        self.assertEqual(sample.bands, ["B2", "B8"])
+
+    def test_prunes_points_to_props(self):
+        sample = self.sample()
+        self.assertEqual(sample.sampled["collection"].props, ["class"])
+
+    def test_auto_tile_scale_counts_in_one_round_trip(self):
+        sample = self.sample(tileScale=None)
+        self.get_info.assert_called_once()
+        self.assertEqual(set(self.get_info.call_args[0][0]), {"bands", "points"})
+        self.assertEqual(sample.sampled["tileScale"], auto_tile_scale(12, 2_000_000))
+
+    def test_auto_tile_scale_counts_only_what_is_missing(self):
+        sample = self.sample(tileScale=None, bands=["B2", "B8"])
+        self.get_info.assert_called_once()
+        self.assertEqual(set(self.get_info.call_args[0][0]), {"points"})
+        self.assertEqual(sample.sampled["tileScale"], auto_tile_scale(2, 2_000_000))
+
+    def test_auto_tile_scale_without_round_trip(self):
+        sample = self.sample(tileScale=None, bands=["B2", "B8"], n_points=8_000_000)
+        self.get_info.assert_not_called()
+        self.assertEqual(sample.sampled["tileScale"], auto_tile_scale(2, 8_000_000))
+
+
+if __name__ == "__main__":
+    unittest.main()
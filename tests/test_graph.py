@@ -0,0 +1,65 @@
+import unittest
+
+import ee
+
+from eeng.server.graph import GraphProfiler, graph_stats, instrument
+
+ADD = ee.ApiFunction("Image.add", {"args": [{"name": "image1"}, {"name": "image2"}], "returns": "Image"})
+LOAD = ee.ApiFunction("Image.load", {"args": [{"name": "id"}], "returns": "Image"})
+
+
+def add(a, b):
+    return ee.ComputedObject(ADD, {"image1": a, "image2": b})
+
+
+def load(asset):
+    return ee.ComputedObject(LOAD, {"id": asset})
+
+
+class Doubler:
+    @instrument()
+    def __call__(self, obj):
+        return add(obj, obj)
+
+
+class TestGraphStats(unittest.TestCase):
+    def test_shared_subexpressions(self):
+        img = load("a")
+        for _ in range(4):
+            img = add(img, img)
+        stats = graph_stats(img)
+        self.assertEqual(stats.nodes, 5)
+        self.assertEqual(stats.depth, 5)
+        self.assertEqual(stats.expanded_nodes, 1 + 2 + 4 + 8 + 16)
+        self.assertEqual(stats.functions, {"Image.add": 4, "Image.load": 1})
+        self.assertEqual(stats.repeated, {"Image.add": 6, "Image.load": 2})
+        self.assertEqual(stats.bytes, len(img.serialize()))
+
+    def test_serialized_input(self):
+        img = add(load("a"), load("b"))
+        self.assertEqual(graph_stats(img.serialize()), graph_stats(img))
+
+    def test_invalid_input(self):
+        with self.assertRaises(TypeError):
+            graph_stats({"not": "a graph"})
+
+
+class TestGraphProfiler(unittest.TestCase):
+    def test_records_instrumented_components(self):
+        doubler = Doubler()
+        with GraphProfiler() as profiler:
+            doubler(doubler(load("a")))
+        summary = profiler.summary()
+        self.assertEqual(list(summary), ["Doubler"])
+        self.assertEqual(summary["Doubler"]["calls"], 2)
+        self.assertEqual(summary["Doubler"]["depth"], 3)
+
+    def test_skips_unnamed_variables(self):
+        with GraphProfiler() as profiler:
+            Doubler()(ee.ComputedObject(None, None, None))
+        self.assertEqual(profiler.records, [])
+
+    def test_inactive(self):
+        profiler = GraphProfiler()
+        Doubler()(load("a"))
+        self.assertEqual(profiler.records, [])
@@ -0,0 +1,71 @@
+import unittest
+
+import numpy as np
+
+from eeng.client import harmonics
+
+
+class TestHarmonics(unittest.TestCase):
+    def setUp(self) -> None:
+        dates = np.arange("2018-01-01", "2021-01-01", 5, dtype="datetime64[D]")
+        self.t = harmonics.time_radians(dates)
+        self.y = (
+            0.3
+            + 0.001 * self.t
+            + 0.2 * np.cos(self.t + 0.5)
+            + 0.05 * np.sin(2 * self.t)
+        )
+
+    def test_design_matrix_columns(self):
+        x = harmonics.design_matrix(self.t, cycles=2)
+        self.assertEqual(x.shape, (len(self.t), 6))
+        np.testing.assert_allclose(x[:, 0], 1)
+        np.testing.assert_allclose(x[:, 1], self.t)
+        np.testing.assert_allclose(x[:, 3], np.cos(2 * self.t))
+        np.testing.assert_allclose(x[:, 5], np.sin(2 * self.t))
+
+    def test_fit_recovers_coefficients(self):
+        coefficients = harmonics.fit(self.y, self.t, cycles=3)
+        self.assertEqual(list(coefficients)[:2], ["constant_coeff", "t_coeff"])
+        self.assertAlmostEqual(coefficients["constant_coeff"], 0.3, places=6)
+        self.assertAlmostEqual(coefficients["t_coeff"], 0.001, places=8)
+        # 0.2 cos(t + 0.5) = 0.2 cos(0.5) cos(t) - 0.2 sin(0.5) sin(t)
+        self.assertAlmostEqual(coefficients["cos_1_coeff"], 0.2 * np.cos(0.5), places=6)
+        self.assertAlmostEqual(coefficients["sin_1_coeff"], -0.2 * np.sin(0.5), places=6)
+        self.assertAlmostEqual(coefficients["sin_2_coeff"], 0.05, places=6)
+        self.assertAlmostEqual(coefficients["cos_3_coeff"], 0.0, places=6)
+
+    def test_amplitude_phase(self):
+        out = harmonics.amplitude_phase(harmonics.fit(self.y, self.t, cycles=2), cycles=2)
+        self.assertAlmostEqual(out["amp_1"], 0.2, places=6)
+        self.assertAlmostEqual(out["phase_1"], np.arctan2(-np.sin(0.5), np.cos(0.5)), places=6)
+        self.assertAlmostEqual(out["amp_2"], 0.05, places=6)
+
+    def test_fit_cube_matches_single_fits(self):
+        rng = np.random.default_rng(0)
+        cube = self.y[:, None, None] + rng.normal(0, 0.01, (len(self.t), 7, 5))
+        cube[3, 2, 1] = np.nan
+        cube[:, 4, 4] = np.nan
+        for chunk_pixels, max_workers in ((1000, None), (6, 3)):
+            out = harmonics.fit_cube(cube, self.t, cycles=2, chunk_pixels=chunk_pixels, max_workers=max_workers)
+            self.assertEqual(out.coefficients.shape, (6, 7, 5))
+            self.assertEqual(out.amplitude.shape, (2, 7, 5))
+            for r, c in ((0, 0), (2, 1), (6, 4)):
+                series = cube[:, r, c]
+                valid = ~np.isnan(series)
+                expected = harmonics.fit(series[valid], self.t[valid], cycles=2)
+                np.testing.assert_allclose(out.coefficients[:, r, c], list(expected.values()), rtol=1e-6, atol=1e-9)
+                ap = harmonics.amplitude_phase(expected, cycles=2)
+                self.assertAlmostEqual(out.amplitude[0, r, c], ap["amp_1"], places=6)
+                self.assertAlmostEqual(out.phase[1, r, c], ap["phase_2"], places=5)
+            self.assertTrue(np.isnan(out.coefficients[:, 4, 4]).all())
+
+    def test_fit_cube_shape_checks(self):
+        with self.assertRaises(ValueError):
+            harmonics.fit_cube(np.zeros((3, 2)), [0, 1, 2])
+        with self.assertRaises(ValueError):
+            harmonics.fit_cube(np.zeros((3, 2, 2)), [0, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
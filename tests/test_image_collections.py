@@ -4,6 +4,9 @@ import eeng
 
 import ee
 
+from eeng.server.cmasking import S2CloudlessAlgorithm
+from eeng.server.image_collection import Sentinel1, Sentinel1Creator
+
 ee.Initialize()
 
 
@@ -51,4 +54,43 @@ class TestImageCollections(unittest.TestCase):
         try:
             pprint(sentinel2CloudProbability.first().getInfo())
         except ee.EEException as e:
-            self.fail(e)
\ No newline at end of file
+            self.fail(e)
+
+class TestCollectionCreator(unittest.TestCase):
+    def setUp(self):
+        self.start = "2019-01-01"
+        self.end = "2019-12-31"
+        self.aoi = ee.Geometry.Point([-77.3619, 44.1786])
+
+    def test_creator_keeps_subclass(self):
+        collection = Sentinel1Creator().get_asc_dv_col(self.start, self.end, self.aoi)
+        self.assertIsInstance(collection, Sentinel1)
+        self.assertTrue(hasattr(collection, "addGroupId"))
+        self.assertGreater(collection.size().getInfo(), 0)
+
+
+class TestToFeatureCollection(unittest.TestCase):
+    def setUp(self):
+        aoi = ee.Geometry.Point([-77.3619, 44.1786])
+        self.collection = Sentinel1Creator().get_dv_col("2019-06-01", "2019-07-01", aoi)
+
+    def test_selected_properties(self):
+        features = self.collection.toFeatureCollection(["relativeOrbitNumber_start"])
+        first = features.first().getInfo()
+        self.assertEqual(list(first["properties"]), ["relativeOrbitNumber_start"])
+        self.assertEqual(features.size().getInfo(), self.collection.size().getInfo())
+
+    def test_fetch_features_in_pages(self):
+        fetched = self.collection.fetchFeatures(["relativeOrbitNumber_start"], page_size=5)
+        self.assertEqual(len(fetched["features"]), self.collection.size().getInfo())
+
+
+class TestS2CloudlessLean(unittest.TestCase):
+    def test_lean_mask_keeps_reflectance_bands(self):
+        aoi = ee.Geometry.Point([-77.3619, 44.1786])
+        sr = ee.ImageCollection.sentinel2SR("2019-06-01", "2019-07-01", aoi)
+        cp = ee.ImageCollection.sentinel2CloudProbability("2019-06-01", "2019-07-01", aoi)
+        image = ee.Image(ee.ImageCollection.sentinel2Cloudless(sr, cp).first())
+        masked = S2CloudlessAlgorithm(lean=True, mask_scale=20)(image)
+        bands = masked.bandNames().getInfo()
+        self.assertTrue(bands and all(b.startswith("B") for b in bands))
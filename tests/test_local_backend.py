@@ -0,0 +1,165 @@
+import unittest
+
+import numpy as np
+
+from eeng.client import local
+from eeng.server.calc import NDVI, SAVI, TasselCap, Ratio, CalculatorChain
+from eeng.server.filters import BoxCar, Gaussian, PeronaMalik
+from eeng.server.cmasking import S2CloudMasks, S2CloudlessAlgorithm
+
+
+class TestLocalBackend(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        shape = (8, 9)
+        self.image = {
+            name: rng.uniform(100, 3000, shape)
+            for name in ["B2", "B3", "B4", "B8", "B11", "B12", "VV", "VH"]
+        }
+
+    def test_ndvi(self):
+        out = local.evaluate(NDVI(), self.image)
+        nir, red = self.image["B8"], self.image["B4"]
+        np.testing.assert_allclose(out["NDVI"], (nir - red) / (nir + red))
+        self.assertEqual(list(out)[:-1], list(self.image))
+
+    def test_savi(self):
+        out = local.evaluate(SAVI(name="savi"), self.image)
+        nir, red = self.image["B8"], self.image["B4"]
+        np.testing.assert_allclose(out["savi"], 1.5 * (nir - red) / (nir + red + 0.5))
+
+    def test_ratio(self):
+        out = local.evaluate(Ratio(), self.image)
+        np.testing.assert_allclose(out["VV/VH"], self.image["VV"] / self.image["VH"])
+
+    def test_tassel_cap(self):
+        out = local.calc(TasselCap(), self.image)
+        self.assertEqual(list(out), ["Brightness", "Greenness", "Wetness"])
+        expected = sum(
+            w * self.image[b]
+            for w, b in zip([0.3037, 0.2793, 0.4743, 0.5585, 0.5082, 0.1863], ["B2", "B3", "B4", "B8", "B11", "B12"])
+        )
+        np.testing.assert_allclose(out["Brightness"], expected)
+
+    def test_chain_matches_sequential_calls(self):
+        calculators = [NDVI(), NDVI(), SAVI(), TasselCap(), TasselCap()]
+        sequential = self.image
+        for calculator in calculators:
+            sequential = local.evaluate(calculator, sequential)
+        chained = local.evaluate(CalculatorChain(*calculators), self.image)
+        self.assertEqual(list(sequential), list(chained))
+        self.assertIn("NDVI_1", chained)
+        self.assertIn("Wetness_1", chained)
+        for name in chained:
+            np.testing.assert_allclose(chained[name], sequential[name])
+
+    def test_boxcar_is_local_mean(self):
+        out = local.evaluate(BoxCar(1), self.image)
+        self.assertEqual(list(out), list(self.image))
+        np.testing.assert_allclose(out["VV"][4, 4], self.image["VV"][3:6, 3:6].mean())
+
+    def test_gaussian_is_normalized(self):
+        weights = local.kernel(Gaussian(2, sigma=1.5))
+        self.assertEqual(weights.shape, (5, 5))
+        self.assertAlmostEqual(weights.sum(), 1.0)
+        flat = {"b": np.full((6, 6), 7.0)}
+        np.testing.assert_allclose(local.evaluate(Gaussian(), flat)["b"], 7.0)
+
+    def test_meters_kernel_raises(self):
+        with self.assertRaises(ValueError):
+            local.kernel(BoxCar(30, units="meters"))
+
+    def test_perona_malik_smooths(self):
+        for method in (1, 2):
+            out = local.evaluate(PeronaMalik(K=500, iterations=5, method=method), self.image)
+            self.assertEqual(out["VV"].shape, self.image["VV"].shape)
+            self.assertLess(out["VV"].std(), self.image["VV"].std())
+            # diffusion conserves the mean away from the padded edges
+            self.assertAlmostEqual(out["VV"].mean(), self.image["VV"].mean(), delta=50)
+
+    def test_unsupported_type(self):
+        for dispatch in (lambda: local.evaluate("NDVI", self.image), lambda: local.calc(object(), self.image)):
+            with self.assertRaisesRegex(TypeError, "no local implementation for"):
+                dispatch()
+        with self.assertRaisesRegex(TypeError, "no local implementation for PeronaMalik"):
+            local.kernel(PeronaMalik())
+
+    def test_s2_cloud_mask(self):
+        qa = np.zeros((2, 2), dtype=np.uint16)
+        qa[0, 0] = 1 << 10
+        qa[1, 1] = 1 << 11
+        out = local.evaluate(S2CloudMasks(), {"QA60": qa, "B2": np.ones((2, 2))})
+        np.testing.assert_array_equal(out["B2"].mask, [[True, False], [False, True]])
+
+
+class TestS2Cloudless(unittest.TestCase):
+    """lean S2 Cloudless mask on a synthetic 15 x 15 chip at mask_scale"""
+
+    def setUp(self) -> None:
+        # 3 pixel shadow projection and a 1 pixel buffer at 20 m
+        self.algorithm = S2CloudlessAlgorithm(cld_prj_dist=0.06, buffer=10, lean=True, mask_scale=20)
+        shape = (15, 15)
+        probability = np.zeros(shape)
+        probability[3:12, 2:7] = 90
+        b8 = np.full(shape, 3000.0)
+        # dark pixels east of the cloud, columns 10-12 are beyond the projection
+        b8[:, 7:13] = 500
+        scl = np.full(shape, 4)
+        # water is never shadow
+        scl[:, 9] = 6
+        self.image = {"probability": probability, "B8": b8, "SCL": scl, "B2": np.ones(shape)}
+
+    def test_projection_distance(self):
+        self.assertEqual(self.algorithm.projection_distance, 3)
+        self.assertEqual(S2CloudlessAlgorithm(mask_scale=10).projection_distance, 100)
+
+    def test_directional_projection(self):
+        source = np.zeros((7, 7), dtype=bool)
+        source[3, 3] = True
+        # pixels that have the source within 2 pixels to their east
+        east = np.zeros_like(source)
+        east[3, 1:4] = True
+        np.testing.assert_array_equal(local.directional_projection(source, 0, 2), east)
+        # rows run north to south, pixels south of the source look north to it
+        north = np.zeros_like(source)
+        north[3:6, 3] = True
+        np.testing.assert_array_equal(local.directional_projection(source, 90, 2), north)
+
+    def test_focal(self):
+        block = np.zeros((7, 7), dtype=bool)
+        block[2:5, 2:5] = True
+        centre = np.zeros_like(block)
+        centre[3, 3] = True
+        np.testing.assert_array_equal(local.focal(block, 1, "min"), centre)
+        plus = np.zeros_like(block)
+        plus[2:5, 3] = True
+        plus[3, 2:5] = True
+        np.testing.assert_array_equal(local.focal(centre, 1, "max"), plus)
+
+    def expected(self, rows, cols):
+        """the rectangle [rows) x [cols) eroded by the radius 2 circle and
+        dilated by the radius 1 circle (a plus)"""
+        eroded = np.zeros((15, 15), dtype=bool)
+        eroded[rows[0] + 2 : rows[1] - 2, cols[0] + 2 : cols[1] - 2] = True
+        return local.focal(eroded, 1, "max")
+
+    def test_shadow_along_solar_azimuth(self):
+        # with the sun in the west (azimuth 270) shadows fall east: cloud
+        # columns 2-6, shadow 7-8, column 9 is water and 10-12 are too far
+        mask = local.s2cloudless_mask(self.algorithm, self.image, 270)
+        expected = np.zeros((15, 15), dtype=bool)
+        expected[4:11, 4:7] = True
+        expected[5:10, 3:8] = True
+        np.testing.assert_array_equal(mask, expected)
+        np.testing.assert_array_equal(mask, self.expected((3, 12), (2, 9)))
+
+    def test_shadow_away_from_dark_pixels(self):
+        # with the sun in the east shadows fall west, there are no dark pixels there
+        mask = local.s2cloudless_mask(self.algorithm, self.image, 90)
+        np.testing.assert_array_equal(mask, self.expected((3, 12), (2, 7)))
+
+    def test_lean_mode_masks_reflectance_bands(self):
+        image = dict(self.image, MEAN_SOLAR_AZIMUTH_ANGLE=np.array(270.0))
+        out = local.evaluate(self.algorithm, image)
+        self.assertEqual(set(out), {"B2", "B8"})
+        np.testing.assert_array_equal(out["B2"].mask, self.expected((3, 12), (2, 9)))
@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from eeng.client import metrics
+from eeng.client.metrics import AccuracyAssessment
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(1)
+        self.y_true = rng.choice(["bog", "fen", "marsh"], 500)
+        noise = rng.random(500) < 0.2
+        self.y_pred = np.where(noise, rng.choice(["bog", "fen", "marsh"], 500), self.y_true)
+        self.assessment = AccuracyAssessment(self.y_true, self.y_pred)
+
+    def test_confusion_matrix(self):
+        cm = self.assessment.matrix
+        self.assertEqual(self.assessment.labels.tolist(), ["bog", "fen", "marsh"])
+        self.assertEqual(cm.sum(), 500)
+        self.assertEqual(cm[0, 1], np.sum((self.y_true == "bog") & (self.y_pred == "fen")))
+
+    def test_label_order_and_unknown_labels(self):
+        cm, labels = metrics.confusion_matrix([2, 1, 1], [2, 2, 1], labels=[2, 1])
+        np.testing.assert_array_equal(cm, [[1, 0], [1, 1]])
+        with self.assertRaises(ValueError):
+            metrics.confusion_matrix([3], [1], labels=[1, 2])
+
+    def test_metrics(self):
+        cm = np.array([[50, 3, 2], [4, 40, 6], [1, 5, 39]])
+        self.assertAlmostEqual(metrics.overall_accuracy(cm), 129 / 150)
+        np.testing.assert_allclose(metrics.producers_accuracy(cm), [50 / 55, 40 / 50, 39 / 45])
+        np.testing.assert_allclose(metrics.consumers_accuracy(cm), [50 / 55, 40 / 48, 39 / 47])
+        expected = (55 * 55 + 50 * 48 + 45 * 47) / 150**2
+        self.assertAlmostEqual(metrics.kappa(cm), (129 / 150 - expected) / (1 - expected))
+
+    def test_metrics_are_vectorized(self):
+        stack = np.stack([self.assessment.matrix] * 4)
+        np.testing.assert_allclose(metrics.f1_score(stack)[2], self.assessment.f1)
+        self.assertEqual(metrics.kappa(stack).shape, (4,))
+
+    def test_bootstrap_intervals(self):
+        intervals = self.assessment.confidence_intervals(n_resamples=200, seed=3)
+        overall = intervals["overall"].loc["overall"]
+        self.assertLess(overall["lower"], overall["estimate"])
+        self.assertGreater(overall["upper"], overall["estimate"])
+        self.assertEqual(list(intervals["producers"].index), ["bog", "fen", "marsh"])
+
+    def test_bootstrap_batches(self):
+        original = metrics.BOOTSTRAP_BATCH_ELEMENTS
+        try:
+            metrics.BOOTSTRAP_BATCH_ELEMENTS = 1000
+            matrices = metrics.bootstrap_matrices(self.assessment._true, self.assessment._pred, 3, 7)
+        finally:
+            metrics.BOOTSTRAP_BATCH_ELEMENTS = original
+        self.assertEqual(matrices.shape, (7, 3, 3))
+        self.assertTrue((matrices.sum(axis=(1, 2)) == 500).all())
+
+    def test_table_layout(self):
+        frame = pd.DataFrame({"Wetland": self.y_true, "classification": self.y_pred})
+        table = AccuracyAssessment.from_frame(frame).table()
+        self.assertEqual(list(table.columns), ["bog", "fen", "marsh", "Producers"])
+        self.assertEqual(table.index[-1], "Overall Accuracy")
+        self.assertAlmostEqual(table.iloc[-1, 0], round(self.assessment.overall * 100, 2))
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from eeng.client.samples import SampleStore
+
+
+class TestSampleStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        self.frame = pd.DataFrame(
+            {
+                "VV": rng.random(50),
+                "VV/VH": rng.random(50),
+                "Wetland": rng.choice(["bog", "fen", "marsh"], 50),
+                "value": rng.integers(1, 4, 50),
+            }
+        )
+        self.path = os.path.join(self.tmp.name, "samples")
+        self.store = SampleStore.from_frame(self.frame, self.path, "Wetland", ["Wetland", "value"])
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_schema(self):
+        store = SampleStore(self.path)
+        self.assertEqual(len(store), 50)
+        self.assertEqual(store.columns, ["Wetland", "value", "VV", "VV/VH"])
+        self.assertEqual(store.bands, ["VV", "VV/VH"])
+        self.assertEqual(store.class_property, "Wetland")
+        self.assertEqual(store.categories("Wetland"), ["bog", "fen", "marsh"])
+        self.assertIsNone(store.categories("VV"))
+
+    def test_columns_are_lazy_memory_maps(self):
+        store = SampleStore(self.path)
+        self.assertEqual(store._columns, {})
+        vv = store.column("VV")
+        self.assertIsInstance(vv, np.memmap)
+        np.testing.assert_array_equal(vv, self.frame["VV"])
+        store.read(["VV/VH"])
+        self.assertEqual(set(store._columns), {"VV", "VV/VH"})
+
+    def test_class_filtered_read(self):
+        out = self.store.read(["Wetland", "VV"], classes=["fen", "marsh"])
+        expected = self.frame[self.frame["Wetland"].isin(["fen", "marsh"])]
+        self.assertEqual(out["Wetland"].astype(str).tolist(), expected["Wetland"].tolist())
+        np.testing.assert_array_equal(out["VV"], expected["VV"])
+        self.assertEqual(set(self.store._columns), {"Wetland", "VV"})
+
+    def test_arrays(self):
+        features, labels = self.store.arrays(classes=["bog"])
+        expected = self.frame[self.frame["Wetland"] == "bog"]
+        self.assertEqual(features.shape, (len(expected), 2))
+        self.assertEqual(labels.tolist(), expected["Wetland"].tolist())
+
+    def test_from_csv(self):
+        datafile = os.path.join(self.tmp.name, "samples.csv")
+        self.frame.assign(**{"system:index": range(50), ".geo": ""}).to_csv(datafile, index=False)
+        store = SampleStore.from_file(datafile, os.path.join(self.tmp.name, "csv"), "Wetland")
+        self.assertEqual(store.columns, ["Wetland", "VV", "VV/VH", "value"])
+        pd.testing.assert_series_equal(store.read()["value"], self.frame["value"])
+
+    def test_missing_property(self):
+        with self.assertRaises(KeyError):
+            SampleStore.from_frame(self.frame, os.path.join(self.tmp.name, "x"), "class")
+
+
+if __name__ == "__main__":
+    unittest.main()
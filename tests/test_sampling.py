@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+
+from eeng.server.cache import ResultCache
+from eeng.server.export import COMPLETED, ExportScheduler, FakeTaskBackend
+from eeng.server.fetch import BatchFetcher, FakeTransport
+from eeng.server import sampling
+from eeng.server.sampling import Tile, TiledSampler
+
+
+class FakeSampler(TiledSampler):
+    """samples are plain dictionaries that the fake transport resolves"""
+
+    def tile_samples(self, tile):
+        return {"tile": tile.name}
+
+
+def resolve(obj):
+    if obj["tile"] == "0_9_9":
+        raise RuntimeError("tile failed")
+    return {"features": [{"properties": {"class": "bog", "VV": i}} for i in range(2)]}
+
+
+class TestTilePlanning(unittest.TestCase):
+    def test_tile_size_targets_points_per_tile(self):
+        size = sampling.tile_size(10_000, (0, 0, 10, 10), 100)
+        self.assertAlmostEqual(size * size * 100, 100)
+        # fewer points than points_per_tile gives one tile over the bounds
+        self.assertAlmostEqual(sampling.tile_size(50, (0, 0, 4, 4), 100), 4)
+
+    def test_split_tiles(self):
+        histograms = {
+            0: {"0_0": 10, "1_0": 30, "-1_0": 3},
+            1: {"0_0": 10, "2_0": 20, "3_0": 10, "-1_1": 3},
+            2: {"0_0": 10, "4_0": 15, "5_0": 5, "6_0": 9, "7_0": 1, "-1_2": 3},
+        }
+        tiles = sampling.split_tiles(histograms, max_points=20)
+        self.assertEqual([t.name for t in tiles], ["0_-1_0", "0_0_0", "1_2_0", "1_3_0"])
+        self.assertEqual(sum(t.count for t in tiles), 43)
+
+        tiles = sampling.split_tiles(histograms, max_points=12)
+        self.assertEqual([t.name for t in tiles], ["0_-1_0", "0_0_0", "2_4_0", "2_5_0", "2_6_0", "2_7_0"])
+
+    def test_split_tiles_reads_server_cell_keys(self):
+        # keys as the server formats them with CELL_FORMAT, including negative cells
+        histograms = {0: {sampling.cell_name(col, 0): 5 for col in (-2, -1, 0, 1)}}
+        self.assertEqual(list(histograms[0]), ["-2_0", "-1_0", "0_0", "1_0"])
+        tiles = sampling.split_tiles(histograms, max_points=20)
+        self.assertEqual([(t.col, t.row) for t in tiles], [(-2, 0), (-1, 0), (0, 0), (1, 0)])
+        self.assertEqual([sampling.cell_name(t.col, t.row) for t in tiles], list(histograms[0]))
+
+    def test_auto_tile_scale(self):
+        self.assertEqual(sampling.auto_tile_scale(10, 1000), 1)
+        self.assertEqual(sampling.auto_tile_scale(50, 80_000), 2)
+        self.assertEqual(sampling.auto_tile_scale(100, 100_000), 8)
+        self.assertEqual(sampling.auto_tile_scale(150, 1_000_000), 16)
+
+    def test_features_frame(self):
+        frame = sampling.features_frame({"features": [{"properties": {"a": 1}}, {"properties": None}]}, "t")
+        self.assertEqual(frame["tile"].tolist(), ["t", "t"])
+        self.assertEqual(len(sampling.features_frame({"features": []})), 0)
+
+
+class TestTiledSampler(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tiles = [Tile(f"0_{i}_0", 0, i, 0) for i in range(4)]
+
+    def sampler(self, fetcher):
+        sampler = FakeSampler(image=None, points=None, properties=["class"], fetcher=fetcher)
+        sampler._tiles = list(self.tiles)
+        return sampler
+
+    def test_fetch_merges_tiles(self):
+        transport = FakeTransport(resolver=resolve)
+        frame = self.sampler(BatchFetcher(transport)).fetch(max_workers=3)
+        self.assertEqual(transport.round_trips, 4)
+        self.assertEqual(len(frame), 8)
+        self.assertEqual(sorted(frame["tile"].unique()), [t.name for t in self.tiles])
+
+    def test_cached_tiles_are_skipped(self):
+        cache = ResultCache(":memory:")
+        transport = FakeTransport(resolver=resolve)
+        self.sampler(BatchFetcher(transport, cache=cache)).fetch()
+        self.tiles.append(Tile("0_9_9", 0, 9, 9))
+        sampler = self.sampler(BatchFetcher(transport, cache=cache))
+        frame = sampler.fetch()
+        self.assertEqual(transport.round_trips, 5)
+        self.assertEqual(len(frame), 8)
+        self.assertEqual(list(sampler.failed), ["0_9_9"])
+
+    def test_export_resumes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            state = os.path.join(tmp, "state.json")
+            backend = FakeTaskBackend()
+            scheduler = ExportScheduler(backend, state_path=state, sleep=lambda s: None)
+            states = self.sampler(None).export("samples", scheduler)
+            self.assertEqual({s.status for s in states.values()}, {COMPLETED})
+            self.assertEqual(backend.started, [f"samples_{t.name}" for t in self.tiles])
+
+            self.tiles.append(Tile("0_4_0", 0, 4, 0))
+            backend = FakeTaskBackend()
+            scheduler = ExportScheduler(backend, state_path=state, sleep=lambda s: None)
+            self.sampler(None).export("samples", scheduler)
+            self.assertEqual(backend.started, ["samples_0_4_0"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+from eeng.server.calc import NDVI, SAVI, Ratio, TasselCap
+from eeng.server.toolboxs.stacking import BUILDER_CACHE_SIZE, CNWIStackBuilder, StackRecipe, _builder
+
+
+class TestStackRecipe(unittest.TestCase):
+    def setUp(self):
+        self.recipe = StackRecipe("s1", "s2", "fourier", "terrain")
+
+    def test_band_names(self):
+        self.assertEqual(self.recipe.s2_band("a_spri", "nir"), "a_spri_b08_10m")
+        self.assertEqual(self.recipe.s2_band("c_fall", "swir2"), "c_fall_b12_20m")
+        self.assertEqual(self.recipe.s2_select, "a_spri_b.*|b_summ_b.*|c_fall_b.*")
+
+    def test_calculators_follow_the_recipe(self):
+        chain = CNWIStackBuilder(self.recipe).s2_calculators()
+        self.assertEqual([type(c) for c in chain.calculators], [NDVI] * 3 + [SAVI] * 3 + [TasselCap] * 3)
+        self.assertEqual([c.nir for c in chain.calculators[:3]], ["a_spri_b08_10m", "b_summ_b08_10m", "c_fall_b08_10m"])
+        self.assertEqual(chain.calculators[-1].swir1, "c_fall_b11_20m")
+
+    def test_custom_seasons(self):
+        recipe = StackRecipe("s1", "s2", "fourier", "terrain", s2_seasons=("a_spri",))
+        self.assertEqual(len(CNWIStackBuilder(recipe).s2_calculators()), 3)
+        self.assertEqual(recipe.s2_select, "a_spri_b.*")
+
+    def test_same_sources_share_a_builder(self):
+        self.assertIs(_builder(self.recipe), _builder(StackRecipe("s1", "s2", "fourier", "terrain")))
+        self.assertIsNot(_builder(self.recipe), _builder(StackRecipe("s1", "s2", "fourier", "dem")))
+
+    def test_builder_cache_is_bounded(self):
+        for i in range(BUILDER_CACHE_SIZE + 5):
+            _builder(StackRecipe("s1", "s2", "fourier", f"terrain_{i}"))
+        self.assertEqual(_builder.cache_info().currsize, BUILDER_CACHE_SIZE)
+
+    def test_ratio_names(self):
+        self.assertEqual(Ratio().name, "VV/VH")
+        ratio = Ratio("HH", "HV")
+        self.assertEqual((ratio.numerator, ratio.demoninator, ratio.name), ("HH", "HV", "HH/HV"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+import ee
+
+ee.Initialize()
+
+from eeng.server.tables import TrainingPoints
+
+
+class TestTrainingPoints(unittest.TestCase):
+    def setUp(self) -> None:
+        self.fc = ee.FeatureCollection("users/ryangilberthamilton/BC/widgeon/3Class/wd_tr_3")
+
+    def test_balance(self):
+        points = TrainingPoints(self.fc, "class").balance(50, seed=1)
+        histogram = points.fetchHistogram()
+        self.assertEqual(set(histogram), {"histogram", "unbalanced"})
+        self.assertEqual(set(histogram["histogram"]), set(histogram["unbalanced"]))
+        for label, count in histogram["histogram"].items():
+            self.assertEqual(count, min(50, histogram["unbalanced"][label]))
+
+    def test_add_values_inline(self):
+        points = TrainingPoints(self.fc, "class")
+        lookup = points.clientLookup()
+        feature = points.addValues(inline=True).points.first().getInfo()
+        self.assertEqual(feature["properties"]["value"], lookup[feature["properties"]["class"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
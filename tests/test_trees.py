@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from eeng.client import trees
+from eeng.client.forest import LocalRandomForest
+
+
+class TestTrees(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        self.y = rng.choice(["bog", "fen", "marsh"], 300)
+        centres = {"bog": 0.0, "fen": 1.0, "marsh": 2.0}
+        self.X = np.array([centres[c] for c in self.y])[:, None] + rng.normal(0, 0.6, (300, 3))
+        self.bands = ["VV", "VV/VH", "NDVI"]
+        self.lookup = {"bog": 1, "fen": 2, "marsh": 3}
+        self.forest = LocalRandomForest(n_trees=15, bag_frac=1.0).fit(self.X, self.y)
+
+    def test_tree_string_layout(self):
+        tree = self.forest.to_trees(self.bands, self.lookup)[0]
+        lines = tree.splitlines()
+        self.assertRegex(lines[0], r"^1\) root \d+ \d+ [123]$")
+        self.assertRegex(lines[1], r"^  2\) (VV|VV/VH|NDVI)<=\S+ \d+ \d+ [123]( \*)?$")
+        self.assertTrue(any(line.endswith(" *") for line in lines))
+
+    def majority_vote(self, forest, values=(1, 2, 3)):
+        """hard vote of the sklearn trees, ties go to the smallest value"""
+        votes = np.column_stack([np.array(values)[e.predict(self.X).astype(int)] for e in forest.model.estimators_])
+        counts = np.stack([(votes == v).sum(axis=1) for v in values], axis=1)
+        return np.array(values)[np.argmax(counts, axis=1)]
+
+    def assert_round_trip(self, forest):
+        strings = forest.to_trees(self.bands, self.lookup)
+        for estimator, string in zip(forest.model.estimators_, strings):
+            parsed = trees.ParsedTree(string, self.bands).predict(self.X)
+            expected = np.array([1, 2, 3])[estimator.predict(self.X).astype(int)]
+            np.testing.assert_array_equal(parsed, expected)
+        np.testing.assert_array_equal(trees.predict_trees(strings, self.bands, self.X), self.majority_vote(forest))
+
+    def test_round_trip_matches_local_predictions(self):
+        self.assertEqual(len(self.forest.to_trees(self.bands, self.lookup)), 15)
+        self.assert_round_trip(self.forest)
+
+    def test_round_trip_with_impure_leaves(self):
+        forest = LocalRandomForest(n_trees=25, min_leaf_pop=20, max_nodes=6, seed=3).fit(self.X, self.y)
+        leaves = [e.tree_ for e in forest.model.estimators_]
+        impure = any((t.value[t.children_left == -1, 0] > 0).sum(axis=1).max() > 1 for t in leaves)
+        self.assertTrue(impure)
+        self.assert_round_trip(forest)
+
+    def test_save_and_load(self):
+        strings = self.forest.to_trees(self.bands, self.lookup)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trees.csv")
+            trees.save_trees(strings, path)
+            self.assertEqual(trees.load_trees(path), strings)
+
+    def test_labels_need_lookup(self):
+        with self.assertRaises(ValueError):
+            self.forest.to_trees(self.bands)
+        numeric = LocalRandomForest(n_trees=2).fit(self.X, np.array([self.lookup[c] for c in self.y]))
+        self.assertEqual(len(numeric.to_trees(self.bands)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()